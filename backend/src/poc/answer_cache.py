@@ -0,0 +1,224 @@
+"""
+EchoLink Answer Cache
+Two-level (exact + semantic) cache of synthesized answers, scoped to a KB version
+"""
+
+import os
+import re
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "2048"))
+DEFAULT_TTL_SECONDS = float(os.getenv("ANSWER_CACHE_TTL_SECONDS", "3600"))
+DEFAULT_SEMANTIC_THRESHOLD = float(os.getenv("ANSWER_CACHE_SEMANTIC_THRESHOLD", "0.95"))
+
+TOKEN_TAG_PATTERN = re.compile(r'[\[\(]\s*(token|payment)\s*:[^\]\)]*[\]\)]', re.IGNORECASE)
+
+
+def normalize_question(question: str) -> str:
+    """Lowercase, drop [token:..]/[payment:..] tags and punctuation, collapse whitespace"""
+    text = TOKEN_TAG_PATTERN.sub(' ', question.lower())
+    text = re.sub(r"[^\w\s']", ' ', text)
+    return ' '.join(text.split())
+
+
+class _CachedAnswer:
+    def __init__(self, answer: str, expires_at: float, embedding: Optional[np.ndarray]):
+        self.answer = answer
+        self.expires_at = expires_at
+        self.embedding = embedding
+
+
+class _SemanticScope:
+    """
+    Question embeddings of one (token, version), kept as rows of one matrix
+    so a lookup is a single matrix-vector product. Freed rows are zeroed and
+    reused.
+    """
+
+    def __init__(self, dimension: int):
+        self.matrix = np.zeros((8, dimension), dtype=np.float32)
+        self.questions: List[Optional[str]] = []
+        self.rows: Dict[str, int] = {}
+        self.free: List[int] = []
+
+    def add(self, question: str, embedding: np.ndarray) -> None:
+        row = self.rows.get(question)
+        if row is None:
+            if self.free:
+                row = self.free.pop()
+                self.questions[row] = question
+            else:
+                row = len(self.questions)
+                if row == len(self.matrix):
+                    self.matrix = np.concatenate([self.matrix, np.zeros_like(self.matrix)])
+                self.questions.append(question)
+            self.rows[question] = row
+        self.matrix[row] = embedding
+
+    def discard(self, question: str) -> None:
+        row = self.rows.pop(question, None)
+        if row is not None:
+            self.matrix[row] = 0.0
+            self.questions[row] = None
+            self.free.append(row)
+
+    def matches(self, query: np.ndarray, threshold: float) -> List[Tuple[str, float]]:
+        """Questions scoring at least threshold, best first"""
+        scores = self.matrix[:len(self.questions)] @ query
+        candidates = np.flatnonzero(scores >= threshold)
+        ordered = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [(self.questions[i], float(scores[i])) for i in ordered if self.questions[i] is not None]
+
+
+class AnswerCache:
+    """
+    Answer cache keyed by (token_id, KB version, normalized question).
+
+    The exact tier is a dict lookup. The semantic tier scores the question
+    embedding against the cached questions of the same token and version in
+    one matrix-vector product and returns the best match above the cosine
+    threshold. Both tiers share one LRU/TTL store, so evicting or expiring an
+    entry removes it from both.
+    Because the KB version is part of every key, a re-ingested Echo can never
+    be answered from the old version's entries; invalidate_token() frees them
+    eagerly.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        semantic_threshold: float = DEFAULT_SEMANTIC_THRESHOLD
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.semantic_threshold = semantic_threshold
+
+        self._entries: "OrderedDict[Tuple[str, str, str], _CachedAnswer]" = OrderedDict()
+        self._semantic: Dict[Tuple[str, str], _SemanticScope] = {}
+        self._lock = threading.Lock()
+
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get_exact(self, token_id: str, version: str, question: str) -> Optional[str]:
+        """Exact-tier lookup on the normalized question"""
+        key = (token_id, version, normalize_question(question))
+        with self._lock:
+            entry = self._live_entry(key)
+            if entry is None:
+                return None
+            self.exact_hits += 1
+            return entry.answer
+
+    def get_semantic(self, token_id: str, version: str, embedding) -> Optional[str]:
+        """Semantic-tier lookup; counts a miss when nothing is close enough"""
+        query = _unit(embedding)
+        best_key, best_score = None, 0.0
+
+        with self._lock:
+            scope = self._semantic.get((token_id, version))
+            matches = scope.matches(query, self.semantic_threshold) if scope is not None else []
+            for question, score in matches:
+                key = (token_id, version, question)
+                if not self._expired(key, self._entries[key]):
+                    best_key, best_score = key, score
+                    break
+
+            if best_key is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(best_key)
+            self.semantic_hits += 1
+            logger.info(f"💡 Semantic answer cache hit (cos={best_score:.3f}): '{best_key[2]}'")
+            return self._entries[best_key].answer
+
+    def put(self, token_id: str, version: str, question: str, answer: str, embedding=None) -> None:
+        """Store an answer (and optionally its question embedding for the semantic tier)"""
+        key = (token_id, version, normalize_question(question))
+        entry = _CachedAnswer(
+            answer,
+            time.time() + self.ttl_seconds,
+            None if embedding is None else _unit(embedding)
+        )
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = entry
+            if entry.embedding is not None:
+                scope = self._semantic.get(key[:2])
+                if scope is None:
+                    scope = self._semantic[key[:2]] = _SemanticScope(len(entry.embedding))
+                scope.add(key[2], entry.embedding)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate_token(self, token_id: str, version: Optional[str] = None) -> int:
+        """Drop a token's entries (all versions other than `version` if given)"""
+        with self._lock:
+            stale = [k for k in self._entries if k[0] == token_id and k[1] != version]
+            for key in stale:
+                self._remove(key)
+            self.invalidations += len(stale)
+        if stale:
+            logger.info(f"🧹 Invalidated {len(stale)} cached answers for token {token_id}")
+        return len(stale)
+
+    def _live_entry(self, key) -> Optional[_CachedAnswer]:
+        """Fetch a non-expired entry and mark it recently used (caller holds lock)"""
+        entry = self._entries.get(key)
+        if entry is None or self._expired(key, entry):
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _expired(self, key, entry: _CachedAnswer) -> bool:
+        if entry.expires_at > time.time():
+            return False
+        self._remove(key)
+        self.expirations += 1
+        return True
+
+    def _remove(self, key) -> None:
+        """Drop an entry from both tiers (caller holds lock)"""
+        if self._entries.pop(key, None) is None:
+            return
+        scope = self._semantic.get(key[:2])
+        if scope is not None:
+            scope.discard(key[2])
+            if not scope.rows:
+                del self._semantic[key[:2]]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits = self.exact_hits + self.semantic_hits
+            lookups = hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "exact_hits": self.exact_hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+
+def _unit(vector) -> np.ndarray:
+    vector = np.asarray(vector, dtype=np.float32).reshape(-1)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
@@ -0,0 +1,342 @@
+"""
+EchoLink BM25 Index
+Per-Echo lexical index over fact texts with CSR numpy postings, fused with
+FAISS vector results by reciprocal rank fusion
+"""
+
+import os
+import re
+import time
+import logging
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+BM25_K1 = float(os.getenv("BM25_K1", "1.2"))
+BM25_B = float(os.getenv("BM25_B", "0.75"))
+HYBRID_SEARCH_ENABLED = os.getenv("HYBRID_SEARCH_ENABLED", "1") == "1"
+# Candidates taken from each retriever before fusion
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "20"))
+# RRF constant: larger flattens the advantage of top ranks
+RRF_K = int(os.getenv("RRF_K", "60"))
+# Vector-only candidates below this cosine are noise (the old fixed cutoff)
+VECTOR_SCORE_FLOOR = float(os.getenv("VECTOR_SCORE_FLOOR", "0.2"))
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+# Question words and glue; names, dates and rare terms are what BM25 is here for
+STOPWORDS = frozenset(
+    "a an the of in on at to for by with from as and or is are was were be been being do does did "
+    "what which who whom whose when where why how this that these those it its has have had about "
+    "into than then there their they them he she his her you your i me my we our us can could would "
+    "should will shall may might must not no".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _TOKEN.findall(str(text).lower()) if t not in STOPWORDS]
+
+
+def bm25_path(token_id: str, base_dir: Path = Path("knowledge_bases")) -> Path:
+    return Path(base_dir) / f"bm25_{token_id}.npz"
+
+
+class BM25Index:
+    """
+    Okapi BM25 over one Echo's facts.
+
+    Postings are CSR: term t's documents are doc_ids[offsets[t]:offsets[t+1]]
+    with their precomputed BM25 term weights (the tf / length-normalization
+    part) in weights, so a query is one gather per term and a bincount.
+    The vocabulary is stored as one UTF-8 blob plus offsets, which keeps the
+    .npz small and pickle-free.
+    """
+
+    def __init__(self, vocab: List[str], offsets: np.ndarray, doc_ids: np.ndarray, weights: np.ndarray, idf: np.ndarray, num_docs: int):
+        self.vocab = vocab
+        self.term_index = {term: i for i, term in enumerate(vocab)}
+        self.offsets = offsets
+        self.doc_ids = doc_ids
+        self.weights = weights
+        self.idf = idf
+        self.num_docs = num_docs
+
+    @classmethod
+    def build(cls, texts: List[str], k1: float = BM25_K1, b: float = BM25_B) -> "BM25Index":
+        postings: Dict[str, Dict[int, int]] = {}
+        lengths = np.zeros(len(texts), dtype=np.float32)
+        for doc_id, text in enumerate(texts):
+            tokens = tokenize(text)
+            lengths[doc_id] = len(tokens)
+            for token in tokens:
+                counts = postings.setdefault(token, {})
+                counts[doc_id] = counts.get(doc_id, 0) + 1
+
+        vocab = sorted(postings)
+        avg_length = float(lengths.mean()) if len(texts) and lengths.mean() > 0 else 1.0
+        offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+        doc_ids, freqs = [], []
+        for i, term in enumerate(vocab):
+            docs = sorted(postings[term].items())
+            offsets[i + 1] = offsets[i] + len(docs)
+            doc_ids.extend(d for d, _ in docs)
+            freqs.extend(f for _, f in docs)
+
+        doc_ids = np.asarray(doc_ids, dtype=np.int32)
+        freqs = np.asarray(freqs, dtype=np.float32)
+        norm = k1 * (1 - b + b * lengths[doc_ids] / avg_length) if len(doc_ids) else freqs
+        weights = (freqs * (k1 + 1) / (freqs + norm)).astype(np.float32)
+
+        doc_freq = np.diff(offsets).astype(np.float32)
+        idf = np.log(1 + (len(texts) - doc_freq + 0.5) / (doc_freq + 0.5)).astype(np.float32)
+        return cls(vocab, offsets, doc_ids, weights, idf, len(texts))
+
+    def save(self, path: Path) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        encoded = [term.encode("utf-8") for term in self.vocab]
+        vocab_offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(e) for e in encoded], out=vocab_offsets[1:])
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                vocab_blob=np.frombuffer(b"".join(encoded), dtype=np.uint8),
+                vocab_offsets=vocab_offsets,
+                offsets=self.offsets,
+                doc_ids=self.doc_ids,
+                weights=self.weights,
+                idf=self.idf,
+                num_docs=np.array(self.num_docs, dtype=np.int64)
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["BM25Index"]:
+        """The index at path, or None if there is none (Echo ingested before BM25)"""
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                blob = data["vocab_blob"].tobytes()
+                vocab_offsets = data["vocab_offsets"]
+                vocab = [blob[vocab_offsets[i]:vocab_offsets[i + 1]].decode("utf-8") for i in range(len(vocab_offsets) - 1)]
+                return cls(vocab, data["offsets"], data["doc_ids"], data["weights"], data["idf"], int(data["num_docs"]))
+        except (OSError, KeyError, ValueError) as e:
+            if Path(path).exists():
+                logger.warning(f"⚠️ Could not load BM25 index {path}: {e}")
+            return None
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.offsets.nbytes + self.doc_ids.nbytes + self.weights.nbytes + self.idf.nbytes + sum(len(t) for t in self.vocab))
+
+    def scores(self, query: str) -> np.ndarray:
+        """BM25 score of every document for the query"""
+        terms = [self.term_index[t] for t in set(tokenize(query)) if t in self.term_index]
+        if not terms:
+            return np.zeros(self.num_docs, dtype=np.float32)
+        slices = [slice(self.offsets[t], self.offsets[t + 1]) for t in terms]
+        ids = np.concatenate([self.doc_ids[s] for s in slices])
+        contributions = np.concatenate([self.weights[s] * self.idf[t] for s, t in zip(slices, terms)])
+        return np.bincount(ids, weights=contributions, minlength=self.num_docs).astype(np.float32)
+
+    def search(self, query: str, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(scores, doc_ids) of the top_k matching documents, best first (only score > 0)"""
+        scores = self.scores(query)
+        matched = np.flatnonzero(scores > 0)
+        if len(matched) > top_k:
+            matched = matched[np.argpartition(-scores[matched], top_k - 1)[:top_k]]
+        order = matched[np.argsort(-scores[matched], kind="stable")]
+        return scores[order], order
+
+# ============================================================================
+# Fusion
+# ============================================================================
+
+def reciprocal_rank_fusion(rankings: List[List[int]], k: int = RRF_K) -> List[Tuple[int, float]]:
+    """Fuse ranked id lists: score(d) = sum over lists of 1 / (k + rank), rank from 1"""
+    fused: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
+
+
+def _cosines(faiss_index, query_vector: np.ndarray, doc_ids: List[int]) -> Dict[int, float]:
+    """Vector scores for documents FAISS didn't return (flat indexes can reconstruct)"""
+    result = {}
+    query = np.asarray(query_vector, dtype=np.float32).reshape(-1)
+    for doc_id in doc_ids:
+        try:
+            result[doc_id] = float(np.dot(faiss_index.reconstruct(int(doc_id)), query))
+        except Exception:
+            result[doc_id] = 0.0
+    return result
+
+
+def hybrid_search(
+    faiss_index,
+    bm25: Optional[BM25Index],
+    query: str,
+    query_vector: np.ndarray,
+    top_k: int,
+    candidates: int = HYBRID_CANDIDATES,
+    vector_floor: float = VECTOR_SCORE_FLOOR
+) -> List[Tuple[int, float, float]]:
+    """
+    Top-k facts by RRF over vector and BM25 rankings.
+
+    Vector candidates need the cosine floor; BM25 candidates need a lexical
+    match, which is how exact names and dates below the floor get in.
+
+    Returns:
+        [(fact_index, cosine, fused_score)] best first. Without a BM25 index,
+        vector results over the floor with fused_score = cosine.
+    """
+    scores, indices = faiss_index.search(query_vector, max(top_k, candidates) if bm25 is not None else top_k)
+    vector_hits = [(int(i), float(s)) for s, i in zip(scores[0], indices[0]) if i >= 0 and s > vector_floor]
+    if bm25 is None:
+        return [(i, s, s) for i, s in vector_hits[:top_k]]
+
+    _, lexical_ids = bm25.search(query, candidates)
+    lexical_ranking = [int(i) for i in lexical_ids]
+    fused = reciprocal_rank_fusion([[i for i, _ in vector_hits], lexical_ranking])[:top_k]
+
+    cosine = dict(vector_hits)
+    cosine.update(_cosines(faiss_index, query_vector, [i for i, _ in fused if i not in cosine]))
+    return [(i, cosine[i], score) for i, score in fused]
+
+
+def search_facts(kb, query: str, query_vector: np.ndarray, top_k: int) -> Dict[str, List]:
+    """
+    Retrieval for one encoded query against a loaded knowledge base, shared
+    by the Knowledge Agent and the query planner replay.
+
+    Returns:
+        {"facts", "triples", "scores"} aligned and best first, plus
+        "fused_scores" when BM25 took part
+    """
+    if not kb.faiss_index or not kb.fact_mapping:
+        return {"facts": [], "triples": [], "scores": []}
+
+    # Vector-only when the Echo has no BM25 index (ingested before it existed)
+    bm25 = kb.bm25 if HYBRID_SEARCH_ENABLED else None
+    hits = hybrid_search(kb.faiss_index, bm25, query, query_vector, top_k)
+    logger.info(f"🔍 {'Hybrid' if bm25 is not None else 'Vector'} search results: {len(hits)} candidates")
+
+    facts = kb.fact_mapping.get('facts', [])
+    triples = kb.fact_mapping.get('triples', [])
+    results = {"facts": [], "triples": [], "scores": []}
+    fused_scores = []
+    for i, (idx, score, fused) in enumerate(hits):
+        logger.info(f"  {i+1}. Score: {score:.3f}, Fused: {fused:.4f}, Index: {idx}")
+        if idx >= len(facts):
+            logger.warning(f"    ❌ Index {idx} out of bounds or no facts array")
+            continue
+        results["facts"].append(facts[idx])
+        results["scores"].append(score)
+        fused_scores.append(fused)
+        if idx < len(triples):
+            results["triples"].append(triples[idx])
+        logger.info(f"    ✅ Added fact: {facts[idx][:100]}...")
+
+    if bm25 is not None:
+        results["fused_scores"] = fused_scores
+    return results
+
+# ============================================================================
+# Benchmark
+# ============================================================================
+
+def synthetic_queries(fact_mapping: Dict[str, Any], limit: int = 200, seed: int = 7) -> List[Tuple[str, List[int]]]:
+    """
+    Questions generated from triples, each relevant to every fact that shares
+    its (subject, relation): "What is the date of birth of Marie Curie?"
+    """
+    triples = fact_mapping.get("triples", [])
+    groups: Dict[Tuple[str, str], List[int]] = {}
+    for i, triple in enumerate(triples):
+        key = (str(triple.get("subject", "")).lower(), str(triple.get("relation", "")).lower())
+        if all(key):
+            groups.setdefault(key, []).append(i)
+
+    rng = np.random.default_rng(seed)
+    keys = list(groups)
+    rng.shuffle(keys)
+    return [
+        (f"What is the {relation.replace('_', ' ')} of {subject.replace('_', ' ')}?", groups[(subject, relation)])
+        for subject, relation in keys[:limit]
+    ]
+
+
+def benchmark(token_id: str, ks=(1, 5, 10), limit: int = 200) -> Dict[str, Dict[str, Any]]:
+    """recall@k and retrieval latency of vector-only vs hybrid search for one Echo"""
+    from kb_cache import load_knowledge_base
+    from query_encoder import get_local_query_encoder
+
+    kb = load_knowledge_base(token_id)
+    bm25 = kb.bm25 or BM25Index.build(kb.fact_mapping.get("facts", []))
+    queries = synthetic_queries(kb.fact_mapping, limit)
+    encoder = get_local_query_encoder()
+    vectors = np.asarray(encoder.encode([q for q, _ in queries]), dtype=np.float32)
+
+    report = {}
+    top_k = max(ks)
+    for mode, index in (("vector", None), ("hybrid", bm25)):
+        hits = {k: 0 for k in ks}
+        latencies = []
+        for (query, relevant), vector in zip(queries, vectors):
+            start = time.perf_counter()
+            results = hybrid_search(kb.faiss_index, index, query, vector[np.newaxis, :], top_k)
+            latencies.append((time.perf_counter() - start) * 1000)
+            ranked = [i for i, _, _ in results]
+            for k in ks:
+                hits[k] += 1 if set(ranked[:k]) & set(relevant) else 0
+        latencies.sort()
+        report[mode] = {
+            **{f"recall@{k}": round(hits[k] / max(1, len(queries)), 4) for k in ks},
+            "p50_ms": round(latencies[len(latencies) // 2], 3) if latencies else None,
+            "p95_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 3) if latencies else None,
+        }
+    report["index"] = {"queries": len(queries), "facts": bm25.num_docs, "terms": len(bm25.vocab), "bytes": bm25.nbytes}
+    return report
+
+
+def main():
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Build BM25 indexes and benchmark hybrid vs vector-only retrieval")
+    parser.add_argument("token_ids", nargs="+", help="Echo token IDs")
+    parser.add_argument("--build", action="store_true", help="(Re)build bm25_{token}.npz from the fact mapping")
+    parser.add_argument("--queries", type=int, default=200, help="Synthetic benchmark queries per Echo")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    from kb_cache import knowledge_base_paths
+
+    for token_id in args.token_ids:
+        if args.build:
+            faiss_file, mapping_file, _ = knowledge_base_paths(token_id)
+            with open(mapping_file, "r") as f:
+                facts = json.load(f).get("facts", [])
+            BM25Index.build(facts).save(bm25_path(token_id, faiss_file.parent))
+            print(f"✅ Built BM25 index for {token_id} ({len(facts)} facts)")
+
+        report = benchmark(token_id, limit=args.queries)
+        print("=" * 70)
+        print(f"📊 RETRIEVAL BENCHMARK {token_id}: {report['index']['queries']} queries, "
+              f"{report['index']['facts']} facts, {report['index']['terms']} terms, {report['index']['bytes'] / 1024:.1f} KB")
+        print("=" * 70)
+        print(f"{'mode':<8}{'recall@1':>10}{'recall@5':>10}{'recall@10':>11}{'p50 ms':>9}{'p95 ms':>9}")
+        for mode in ("vector", "hybrid"):
+            r = report[mode]
+            print(f"{mode:<8}{r['recall@1']:>10.2%}{r['recall@5']:>10.2%}{r['recall@10']:>11.2%}{r['p50_ms']:>9.3f}{r['p95_ms']:>9.3f}")
+        print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
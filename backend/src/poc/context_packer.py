@@ -0,0 +1,248 @@
+"""
+EchoLink Context Packer
+Builds the LLM synthesis prompt: deduplicated, score-ranked facts and MeTTa
+results packed into a token budget behind a byte-identical instruction prefix
+"""
+
+import os
+import re
+import logging
+from typing import Any, Dict, List, Optional, Set
+
+from lazy_imports import lazy_import
+from metrics import Counters
+
+# tiktoken is optional; without it tokens are estimated from character count
+tiktoken = lazy_import("tiktoken")
+
+logger = logging.getLogger(__name__)
+
+# Tokens available to facts and MeTTa results (instructions and query come on top)
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1024"))
+# Word-set Jaccard similarity at which two context lines count as duplicates
+CONTEXT_DEDUP_JACCARD = float(os.getenv("CONTEXT_DEDUP_JACCARD", "0.8"))
+CONTEXT_TOKENIZER = os.getenv("CONTEXT_TOKENIZER", "cl100k_base")
+
+# Static instruction block. It leads every prompt and never contains per-request
+# text, so the provider can cache it; change it only deliberately.
+SYNTHESIS_INSTRUCTIONS = """You are an intelligent knowledge assistant for EchoLink, a decentralized knowledge marketplace powered by AI.
+
+## CRITICAL INSTRUCTIONS
+**YOU MUST ONLY USE INFORMATION FROM THE CONTEXT SECTION BELOW. DO NOT ADD ANY GENERAL KNOWLEDGE OR ASSUMPTIONS.**
+
+## TASK
+Synthesize a comprehensive, accurate, and conversational answer to the user query by:
+
+1. **Direct Answer First**: Lead with the most direct answer EXTRACTED from the facts in the context
+2. **Strict Evidence-Based**:
+   - **ONLY** use information that appears in the semantic search results or MeTTa knowledge graph results
+   - **NEVER** add general domain knowledge or common sense reasoning
+   - **NEVER** say "based on the context" or "from the search results" - just state facts directly
+   - **NEVER** make assumptions about what typical optoelectronic devices are - only use what's explicitly in the facts
+3. **Citation Format**:
+   - When referring to specific information, reference it naturally (e.g., "The material has X property")
+   - DO NOT say "According to research" or "Studies suggest" - just state the facts
+4. **Natural Conversation**:
+   - Use clear, engaging language
+   - Structure your answer logically (main answer → supporting details)
+   - Be concise but thorough
+5. **Uncertainty Handling**:
+   - If information is incomplete in the provided facts, simply say "Based on the available information: [state only what's in the facts]"
+   - DO NOT fill gaps with general knowledge
+
+"""
+
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+
+def _normalize(text: str) -> str:
+    return _NON_WORD.sub(" ", str(text).lower()).strip()
+
+
+def _words(text: str) -> Set[str]:
+    return set(_normalize(text).split())
+
+
+class TokenCounter:
+    """Local token counts: tiktoken when installed, else ~4 characters per token"""
+
+    def __init__(self, encoding: str = CONTEXT_TOKENIZER):
+        self._encoding = None
+        if tiktoken is not None:
+            try:
+                self._encoding = tiktoken.get_encoding(encoding)
+            except Exception as e:
+                logger.warning(f"⚠️ tiktoken encoding '{encoding}' unavailable ({e}); estimating tokens")
+
+    @property
+    def exact(self) -> bool:
+        return self._encoding is not None
+
+    def count(self, text: str) -> int:
+        if self._encoding is not None:
+            return len(self._encoding.encode(text, disallowed_special=()))
+        return (len(text) + 3) // 4
+
+
+class PackedPrompt:
+    """A built prompt and what went into it"""
+
+    def __init__(self, prompt: str, prompt_tokens: int, context_tokens: int, facts: List[str], metta: List[str], duplicates: int, dropped: int):
+        self.prompt = prompt
+        self.prompt_tokens = prompt_tokens
+        self.context_tokens = context_tokens
+        self.facts = facts
+        self.metta = metta
+        self.duplicates = duplicates
+        self.dropped = dropped
+
+    def summary(self) -> str:
+        return (
+            f"{self.prompt_tokens} prompt tokens ({len(self.facts)} facts, {len(self.metta)} MeTTa results, "
+            f"{self.duplicates} duplicates removed, {self.dropped} over budget)"
+        )
+
+
+class ContextPacker:
+    """
+    Packs retrieval results into the synthesis prompt.
+
+    Layout is instructions, then context, then the query, so everything
+    before the context is identical from request to request. Facts carry
+    their retrieval scores; a MeTTa result takes the best score of the facts
+    whose triples mention its entity, so it ranks with the evidence that
+    produced it. Lines that repeat a higher-ranked line (same words, or a
+    MeTTa result whose words all appear in a kept fact) are dropped, then
+    lines are added in score order while they fit the budget.
+    """
+
+    def __init__(
+        self,
+        budget_tokens: int = CONTEXT_TOKEN_BUDGET,
+        instructions: str = SYNTHESIS_INSTRUCTIONS,
+        dedup_jaccard: float = CONTEXT_DEDUP_JACCARD,
+        counter: Optional[TokenCounter] = None
+    ):
+        self.budget_tokens = budget_tokens
+        self.instructions = instructions
+        self.dedup_jaccard = dedup_jaccard
+        self.counter = counter or TokenCounter()
+        self.instruction_tokens = self.counter.count(instructions)
+        self.counters = Counters()
+        self.max_prompt_tokens = 0
+
+    @staticmethod
+    def _metta_line(result: Dict[str, Any]) -> str:
+        if "value" in result:
+            return f"- {result.get('relation', 'Unknown')}: {result.get('entity', 'Unknown')} → {result['value']}"
+        # Inverse probe: subject was found for (relation, object)
+        return f"- {result.get('relation', 'Unknown')}: {result.get('subject', 'Unknown')} → {result.get('object', 'Unknown')}"
+
+    @staticmethod
+    def _metta_score(result: Dict[str, Any], entity_scores: Dict[str, float], floor: float) -> float:
+        keys = (result.get("entity"), result.get("object"), result.get("subject"))
+        return max((entity_scores.get(_normalize(k), floor) for k in keys if k), default=floor)
+
+    def _is_duplicate(self, words: Set[str], kind: str, kept: List[Dict[str, Any]]) -> bool:
+        for item in kept:
+            other = item["words"]
+            union = len(words | other)
+            if union and len(words & other) / union >= self.dedup_jaccard:
+                return True
+            # A MeTTa result restating a kept fact adds nothing
+            if kind == "metta" and item["kind"] == "fact" and words <= other:
+                return True
+        return False
+
+    def pack(
+        self,
+        query: str,
+        facts: List[str],
+        scores: Optional[List[float]] = None,
+        triples: Optional[List[Dict[str, Any]]] = None,
+        metta_results: Optional[List[Dict[str, Any]]] = None
+    ) -> PackedPrompt:
+        """
+        Build the prompt for a query.
+
+        Args:
+            query: User query (placed after the context)
+            facts: Retrieved fact texts
+            scores: Ranking score per fact, cosine or fused (defaults to retrieval order)
+            triples: Triple per fact, used to score MeTTa results
+            metta_results: Dicts from the MeTTa probes (relation/entity/value or relation/object/subject)
+        """
+        scores = list(scores) if scores is not None else [1.0 - i * 1e-3 for i in range(len(facts))]
+        triples = triples or []
+        metta_results = metta_results or []
+
+        entity_scores: Dict[str, float] = {}
+        for triple, score in zip(triples, scores):
+            for key in (triple.get("subject"), triple.get("object")):
+                if key:
+                    norm = _normalize(key)
+                    entity_scores[norm] = max(entity_scores.get(norm, score), score)
+        floor = min(scores) if scores else 0.0
+
+        candidates = [
+            {"kind": "fact", "text": str(fact), "score": float(score)}
+            for fact, score in zip(facts, scores)
+        ] + [
+            {"kind": "metta", "text": self._metta_line(r), "score": self._metta_score(r, entity_scores, floor)}
+            for r in metta_results
+        ]
+        # Stable sort keeps facts ahead of MeTTa results on equal scores
+        candidates.sort(key=lambda item: item["score"], reverse=True)
+
+        kept: List[Dict[str, Any]] = []
+        duplicates = dropped = 0
+        used_tokens = 0
+        for item in candidates:
+            item["words"] = _words(item["text"] if item["kind"] == "fact" else item["text"].split(":", 1)[-1])
+            if not item["words"] or self._is_duplicate(item["words"], item["kind"], kept):
+                duplicates += 1
+                continue
+            tokens = self.counter.count(item["text"]) + 1  # + the newline
+            # The best line always goes in, even alone over budget
+            if kept and used_tokens + tokens > self.budget_tokens:
+                dropped += 1
+                continue
+            kept.append(item)
+            used_tokens += tokens
+
+        fact_lines = [item["text"] for item in kept if item["kind"] == "fact"]
+        metta_lines = [item["text"] for item in kept if item["kind"] == "metta"]
+
+        prompt = (
+            f"{self.instructions}"
+            f"## CONTEXT\n\n"
+            f"### Semantic Search Results (Most Relevant First):\n"
+            f"{chr(10).join(f'{i + 1}. {fact}' for i, fact in enumerate(fact_lines)) or 'No relevant facts found'}\n\n"
+            f"### MeTTa Knowledge Graph Query Results:\n"
+            f"{chr(10).join(metta_lines) or 'No structured knowledge graph results available'}\n\n"
+            f"## USER QUERY\n{query}\n\n"
+            f"## ANSWER:\n"
+        )
+        prompt_tokens = self.counter.count(prompt)
+
+        self.counters.inc("prompts")
+        self.counters.inc("prompt_tokens", prompt_tokens)
+        self.counters.inc("duplicates_removed", duplicates)
+        self.counters.inc("dropped_over_budget", dropped)
+        self.max_prompt_tokens = max(self.max_prompt_tokens, prompt_tokens)
+
+        return PackedPrompt(prompt, prompt_tokens, used_tokens, fact_lines, metta_lines, duplicates, dropped)
+
+    def stats(self) -> Dict[str, Any]:
+        counts = self.counters.snapshot()
+        prompts = counts.get("prompts", 0)
+        return {
+            "budget_tokens": self.budget_tokens,
+            "instruction_tokens": self.instruction_tokens,
+            "exact_tokenizer": self.counter.exact,
+            "prompts": prompts,
+            "mean_prompt_tokens": round(counts.get("prompt_tokens", 0) / prompts, 1) if prompts else 0.0,
+            "max_prompt_tokens": self.max_prompt_tokens,
+            "duplicates_removed": counts.get("duplicates_removed", 0),
+            "dropped_over_budget": counts.get("dropped_over_budget", 0),
+        }
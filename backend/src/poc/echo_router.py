@@ -0,0 +1,197 @@
+"""
+EchoLink Echo Router
+Routes token-less questions to the Echos most likely to answer them, using
+a handful of k-means centroids per Echo as its profile
+"""
+
+import os
+import time
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from global_index import file_lock
+from lazy_imports import lazy_import
+
+faiss = lazy_import("faiss")
+
+logger = logging.getLogger(__name__)
+
+ROUTER_PATH = Path(os.getenv("ECHO_ROUTER_PATH", "knowledge_bases/echo_router.npz"))
+DEFAULT_CENTROIDS = int(os.getenv("ECHO_ROUTER_CENTROIDS", "4"))
+DEFAULT_MIN_SCORE = float(os.getenv("ECHO_ROUTER_MIN_SCORE", "0.25"))
+
+
+def compute_profile(embeddings, num_centroids: int = DEFAULT_CENTROIDS) -> np.ndarray:
+    """
+    Summarize an Echo's fact embeddings as up to num_centroids unit vectors.
+
+    A single mean vector blurs Echos that cover several topics, so facts are
+    clustered with k-means and each cluster centroid is kept. Small Echos
+    (fewer than ~10 facts per centroid) fall back to fewer centroids.
+    """
+    embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+    k = max(1, min(num_centroids, len(embeddings) // 10))
+
+    if k == 1 or faiss is None:
+        centroids = embeddings.mean(axis=0, keepdims=True)
+    else:
+        kmeans = faiss.Kmeans(
+            embeddings.shape[1], k, niter=20, seed=1234, verbose=False, min_points_per_centroid=10
+        )
+        kmeans.train(embeddings)
+        centroids = kmeans.centroids
+
+    norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (centroids / norms).astype(np.float32)
+
+
+class EchoRouter:
+    """
+    Small in-memory routing index: all Echos' centroid rows in one matrix,
+    grouped by token. Routing is one matrix-vector product plus a per-token
+    max, which stays well under a millisecond for thousands of Echos.
+    """
+
+    def __init__(self, path: Path = ROUTER_PATH):
+        self.path = Path(path)
+        self.tokens: List[str] = []
+        self.offsets = np.zeros(1, dtype=np.int64)  # rows of tokens[i] are offsets[i]:offsets[i+1]
+        self.vectors = np.zeros((0, 0), dtype=np.float32)
+        self._mtime: Optional[int] = None
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def load(self) -> "EchoRouter":
+        """Load the routing index from disk if it exists"""
+        try:
+            mtime = self.path.stat().st_mtime_ns
+            with np.load(self.path, allow_pickle=False) as data:
+                tokens = [str(t) for t in data["tokens"]]
+                offsets = data["offsets"].astype(np.int64)
+                vectors = data["vectors"].astype(np.float32)
+        except (OSError, KeyError, ValueError):
+            return self
+
+        with self._lock:
+            self.tokens, self.offsets, self.vectors = tokens, offsets, vectors
+            self._mtime = mtime
+        logger.info(f"🧭 Echo router loaded: {len(tokens)} Echos, {len(vectors)} centroids")
+        return self
+
+    def refresh(self) -> bool:
+        """Reload if ingest.py rewrote the routing index; returns True when reloaded"""
+        try:
+            mtime = self.path.stat().st_mtime_ns
+        except OSError:
+            return False
+        if mtime == self._mtime:
+            return False
+        self.load()
+        return True
+
+    def _save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            np.savez(f, tokens=np.array(self.tokens, dtype=str), offsets=self.offsets, vectors=self.vectors)
+        os.replace(tmp_path, self.path)
+        self._mtime = self.path.stat().st_mtime_ns
+
+    def add_echo(self, token_id: str, embeddings, num_centroids: int = DEFAULT_CENTROIDS) -> None:
+        """Compute and store (or replace) one Echo's profile centroids"""
+        profile = compute_profile(embeddings, num_centroids)
+
+        with file_lock(self.path.with_name(self.path.name + ".lock")):
+            self.load()
+            with self._lock:
+                blocks = {
+                    token: self.vectors[self.offsets[i]:self.offsets[i + 1]]
+                    for i, token in enumerate(self.tokens)
+                }
+                blocks[token_id] = profile
+
+                self.tokens = list(blocks)
+                self.offsets = np.cumsum([0] + [len(b) for b in blocks.values()]).astype(np.int64)
+                self.vectors = np.vstack(list(blocks.values())).astype(np.float32)
+                self._save()
+
+        logger.info(f"🧭 Echo router updated: token {token_id} ({len(profile)} centroids)")
+
+    # ------------------------------------------------------------------
+    # Routing
+    # ------------------------------------------------------------------
+
+    def route(self, query_vector, top_n: int = 3, min_score: float = DEFAULT_MIN_SCORE) -> List[Tuple[str, float]]:
+        """
+        Pick the Echos whose closest centroid best matches the question.
+
+        Returns:
+            Up to top_n (token_id, score) pairs scoring at least min_score, best first
+        """
+        with self._lock:
+            tokens, offsets, vectors = self.tokens, self.offsets, self.vectors
+        if not tokens:
+            return []
+
+        query = np.asarray(query_vector, dtype=np.float32).reshape(-1)
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+
+        best = np.maximum.reduceat(vectors @ query, offsets[:-1])
+        n = min(top_n, len(tokens))
+        top = np.argpartition(-best, n - 1)[:n]
+        top = top[np.argsort(-best[top])]
+        return [(tokens[i], float(best[i])) for i in top if best[i] >= min_score]
+
+    def stats(self) -> Dict[str, int]:
+        return {"echos": len(self.tokens), "centroids": int(len(self.vectors))}
+
+# ============================================================================
+# CLI: backfill and routing check
+# ============================================================================
+
+def rebuild_from_knowledge_bases(knowledge_dir: str = "knowledge_bases") -> EchoRouter:
+    """Compute profiles for every existing per-token fact index"""
+    router = EchoRouter()
+    for faiss_path in sorted(Path(knowledge_dir).glob("fact_index_*.faiss")):
+        token_id = faiss_path.stem[len("fact_index_"):]
+        index = faiss.read_index(str(faiss_path))
+        router.add_echo(token_id, index.reconstruct_n(0, index.ntotal))
+    return router
+
+
+def main():
+    import argparse
+    from model_registry import get_sentence_transformer
+
+    parser = argparse.ArgumentParser(description="Build or query the Echo routing index")
+    parser.add_argument("--rebuild", action="store_true", help="Recompute profiles from knowledge_bases/")
+    parser.add_argument("--query", type=str, help="Show which Echos a question routes to")
+    parser.add_argument("--top", type=int, default=3, help="Number of Echos to return")
+    args = parser.parse_args()
+
+    router = rebuild_from_knowledge_bases() if args.rebuild else EchoRouter().load()
+    print(f"🧭 {router.stats()['echos']} Echos, {router.stats()['centroids']} centroids")
+
+    if args.query:
+        query_vector = get_sentence_transformer().encode([args.query])[0]
+        start = time.perf_counter()
+        routes = router.route(query_vector, top_n=args.top, min_score=-1.0)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        for token_id, score in routes:
+            print(f"  {token_id:<24} {score:.3f}")
+        print(f"⏱️  Routed in {elapsed_ms:.3f}ms")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    main()
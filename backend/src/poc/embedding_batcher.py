@@ -0,0 +1,213 @@
+"""
+EchoLink Embedding Batcher
+Dynamic micro-batching of query embeddings across concurrent requests
+"""
+
+import os
+import time
+import asyncio
+import logging
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from metrics import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "32"))
+DEFAULT_MAX_WAIT_MS = float(os.getenv("EMBED_BATCH_WAIT_MS", "5"))
+
+
+class EmbeddingBatcher:
+    """
+    Collects concurrent encode requests and runs them as one batched encode.
+
+    A batch is flushed as soon as it holds max_batch_size texts or max_wait_ms
+    after its first text arrived, whichever comes first. A lone request
+    therefore pays at most max_wait_ms extra latency, while bursts of
+    single-sentence encodes collapse into a handful of model calls.
+    """
+
+    def __init__(
+        self,
+        encode_fn: Callable[[List[str]], Any],
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        max_wait_ms: float = DEFAULT_MAX_WAIT_MS,
+        executor=None
+    ):
+        """
+        Args:
+            encode_fn: Blocking batch encoder, e.g. SentenceTransformer.encode
+            max_batch_size: Flush once this many texts are queued
+            max_wait_ms: Flush this long after the first queued text
+            executor: Optional StageExecutor; batches run in its "embed" stage
+        """
+        self.encode_fn = encode_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.executor = executor
+
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._worker: Optional[asyncio.Task] = None
+
+        self.batches = 0
+        self.items = 0
+        self.batch_latency = LatencyHistogram()
+
+    def _ensure_worker(self) -> None:
+        if self._worker is None or self._worker.done():
+            self._wakeup = asyncio.Event()
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def encode(self, text: str):
+        """Encode one text; returns its embedding row"""
+        self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((text, future))
+        self._wakeup.set()
+        return await future
+
+    async def encode_many(self, texts: List[str]) -> List[Any]:
+        """Encode several texts through the shared batches"""
+        return list(await asyncio.gather(*(self.encode(text) for text in texts)))
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            if not self._pending:
+                continue
+
+            # Give concurrent callers a short window to join this batch
+            deadline = loop.time() + self.max_wait_ms / 1000
+            while len(self._pending) < self.max_batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=remaining)
+                    self._wakeup.clear()
+                except asyncio.TimeoutError:
+                    break
+
+            batch = self._pending[:self.max_batch_size]
+            self._pending = self._pending[self.max_batch_size:]
+            if self._pending:
+                self._wakeup.set()  # leftovers start the next batch immediately
+
+            # Callers that gave up don't need encoding
+            batch = [(text, future) for text, future in batch if not future.done()]
+            if batch:
+                await self._flush(batch)
+
+    async def _flush(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        texts = [text for text, _ in batch]
+        start = time.perf_counter()
+        try:
+            if self.executor is not None:
+                vectors = await self.executor.run("embed", self.encode_fn, texts)
+            else:
+                vectors = await asyncio.get_running_loop().run_in_executor(None, self.encode_fn, texts)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self.batch_latency.observe((time.perf_counter() - start) * 1000)
+        self.batches += 1
+        self.items += len(batch)
+
+        for i, (_, future) in enumerate(batch):
+            if not future.done():
+                future.set_result(vectors[i])
+
+    def close(self) -> None:
+        """Stop the background worker"""
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_ms,
+            "batch_latency": self.batch_latency.snapshot(),
+        }
+
+# ============================================================================
+# Throughput Benchmark
+# ============================================================================
+
+async def _drive(encode, clients: int, requests_per_client: int) -> float:
+    """Run `clients` concurrent loops of `requests_per_client` encodes; return encodes/sec"""
+    async def client(client_id: int):
+        for i in range(requests_per_client):
+            await encode(f"benchmark question {client_id} number {i} about the echo")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(c) for c in range(clients)))
+    return clients * requests_per_client / (time.perf_counter() - start)
+
+
+async def benchmark(
+    encode_fn: Callable[[List[str]], Any],
+    concurrency_levels=(1, 10, 100),
+    requests_per_client: int = 20,
+    max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+    max_wait_ms: float = DEFAULT_MAX_WAIT_MS
+) -> List[Dict[str, Any]]:
+    """Compare per-request encodes against the batcher at each concurrency level"""
+    loop = asyncio.get_running_loop()
+
+    async def unbatched(text: str):
+        return (await loop.run_in_executor(None, encode_fn, [text]))[0]
+
+    results = []
+    for clients in concurrency_levels:
+        batcher = EmbeddingBatcher(encode_fn, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms)
+        single_qps = await _drive(unbatched, clients, requests_per_client)
+        batched_qps = await _drive(batcher.encode, clients, requests_per_client)
+        batcher.close()
+        results.append({
+            "clients": clients,
+            "unbatched_qps": single_qps,
+            "batched_qps": batched_qps,
+            "speedup": batched_qps / single_qps if single_qps else 0.0,
+            "mean_batch_size": batcher.stats()["mean_batch_size"],
+        })
+    return results
+
+
+def main():
+    import argparse
+    from model_registry import get_sentence_transformer
+
+    parser = argparse.ArgumentParser(description="Benchmark dynamic embedding batching")
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 10, 100], help="Concurrency levels")
+    parser.add_argument("--requests", type=int, default=20, help="Encodes per client")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_MAX_BATCH_SIZE, help="Max batch size")
+    parser.add_argument("--wait-ms", type=float, default=DEFAULT_MAX_WAIT_MS, help="Max batch wait")
+    args = parser.parse_args()
+
+    model = get_sentence_transformer()
+    results = asyncio.run(benchmark(
+        model.encode, args.clients, args.requests, args.batch_size, args.wait_ms
+    ))
+
+    print("=" * 70)
+    print("📊 EMBEDDING BATCHER THROUGHPUT")
+    print("=" * 70)
+    print(f"{'clients':>8}{'unbatched/s':>14}{'batched/s':>12}{'speedup':>10}{'mean batch':>12}")
+    for r in results:
+        print(f"{r['clients']:>8}{r['unbatched_qps']:>14.1f}{r['batched_qps']:>12.1f}"
+              f"{r['speedup']:>9.2f}x{r['mean_batch_size']:>12.1f}")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
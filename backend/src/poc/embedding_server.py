@@ -0,0 +1,246 @@
+"""
+EchoLink Embedding Server
+One shared query-embedding model per node, served to co-located agents over a Unix socket
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import struct
+import asyncio
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from embedding_batcher import EmbeddingBatcher, DEFAULT_MAX_BATCH_SIZE, DEFAULT_MAX_WAIT_MS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SOCKET_PATH = "/tmp/echolink-embed.sock"
+
+# Every message is a 4-byte big-endian length followed by the payload
+_LENGTH = struct.Struct("!I")
+
+# ============================================================================
+# Wire Protocol
+#
+# request:  frame(JSON {"texts": [...]})
+# response: frame(JSON {"shape": [n, d], "dtype": "float32"}) + frame(raw row-major vectors)
+#           or frame(JSON {"error": "..."})
+# ============================================================================
+
+def _frame(payload: bytes) -> bytes:
+    return _LENGTH.pack(len(payload)) + payload
+
+
+async def _read_frame(reader: asyncio.StreamReader) -> bytes:
+    (length,) = _LENGTH.unpack(await reader.readexactly(_LENGTH.size))
+    return await reader.readexactly(length)
+
+
+def _recv_exactly(sock: socket.socket, length: int) -> bytearray:
+    """Receive exactly `length` bytes into one preallocated buffer"""
+    buffer = bytearray(length)
+    view = memoryview(buffer)
+    received = 0
+    while received < length:
+        n = sock.recv_into(view[received:])
+        if n == 0:
+            raise ConnectionError("embedding server closed the connection")
+        received += n
+    return buffer
+
+
+def _recv_frame(sock: socket.socket) -> bytearray:
+    (length,) = _LENGTH.unpack(_recv_exactly(sock, _LENGTH.size))
+    return _recv_exactly(sock, length)
+
+# ============================================================================
+# Server
+# ============================================================================
+
+class EmbeddingServer:
+    """
+    Owns the node's single embedding model. Requests from every connected
+    agent go through one EmbeddingBatcher, so concurrent queries from
+    different processes share model calls.
+    """
+
+    def __init__(
+        self,
+        encode_fn,
+        socket_path: str = DEFAULT_SOCKET_PATH,
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        max_wait_ms: float = DEFAULT_MAX_WAIT_MS
+    ):
+        self.socket_path = socket_path
+        self.batcher = EmbeddingBatcher(encode_fn, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms)
+        self.connections = 0
+        self.requests = 0
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        try:
+            while True:
+                try:
+                    request = json.loads(await _read_frame(reader))
+                except asyncio.IncompleteReadError:
+                    break
+
+                try:
+                    rows = await self.batcher.encode_many(request["texts"])
+                    vectors = np.ascontiguousarray(np.stack(rows), dtype=np.float32)
+                    header = {"shape": list(vectors.shape), "dtype": "float32"}
+                    writer.write(_frame(json.dumps(header).encode()) + _frame(vectors.tobytes()))
+                except Exception as e:
+                    logger.error(f"❌ Embedding request failed: {e}")
+                    writer.write(_frame(json.dumps({"error": str(e)}).encode()))
+
+                self.requests += 1
+                await writer.drain()
+        finally:
+            self.connections -= 1
+            writer.close()
+
+    async def serve_forever(self, stats_interval: float = 60.0) -> None:
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)  # stale socket from a previous run
+
+        server = await asyncio.start_unix_server(self._handle, path=self.socket_path)
+        os.chmod(self.socket_path, 0o600)  # local agents of the same user only
+        logger.info(f"🧮 Embedding server listening on {self.socket_path}")
+
+        async with server:
+            while True:
+                await asyncio.sleep(stats_interval)
+                stats = self.batcher.stats()
+                logger.info(
+                    f"📊 {self.connections} connections, {self.requests} requests, "
+                    f"{stats['items']} texts in {stats['batches']} batches (mean {stats['mean_batch_size']})"
+                )
+
+# ============================================================================
+# Client
+# ============================================================================
+
+class EmbeddingClient:
+    """
+    Drop-in for SentenceTransformer.encode backed by the node's embedding server.
+
+    Each calling thread keeps its own connection, so the agents' stage pool can
+    encode in parallel. If the server is unreachable the client falls back to
+    an in-process model (loaded only then) and retries the server after
+    retry_after seconds.
+    """
+
+    def __init__(self, socket_path: str = DEFAULT_SOCKET_PATH, timeout: float = 10.0, retry_after: float = 30.0):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self._local = threading.local()
+        self._server_down_until = 0.0
+        self.remote_calls = 0
+        self.fallback_calls = 0
+
+    def _connection(self) -> socket.socket:
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.socket_path)
+            except OSError:
+                sock.close()
+                raise
+            self._local.sock = sock
+        return sock
+
+    def _drop_connection(self) -> None:
+        sock = getattr(self._local, "sock", None)
+        if sock is not None:
+            sock.close()
+            self._local.sock = None
+
+    def _encode_remote(self, texts: List[str]) -> Optional[np.ndarray]:
+        if time.monotonic() < self._server_down_until:
+            return None
+        try:
+            sock = self._connection()
+            sock.sendall(_frame(json.dumps({"texts": texts}).encode()))
+            header = json.loads(_recv_frame(sock))
+            if "error" in header:
+                raise RuntimeError(header["error"])
+            # The receive buffer becomes the array's memory; no copy
+            body = _recv_frame(sock)
+            vectors = np.frombuffer(body, dtype=header["dtype"]).reshape(header["shape"])
+        except (OSError, ConnectionError, ValueError, RuntimeError) as e:
+            self._drop_connection()
+            self._server_down_until = time.monotonic() + self.retry_after
+            logger.warning(f"⚠️ Embedding server unavailable ({e}); using in-process model for {self.retry_after:.0f}s")
+            return None
+
+        self.remote_calls += 1
+        return vectors
+
+    def encode(self, sentences, **kwargs) -> np.ndarray:
+        """Same shape contract as SentenceTransformer.encode: str -> (d,), list -> (n, d)"""
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+
+        vectors = self._encode_remote(texts) if texts else None
+        if vectors is None:
+            from query_encoder import get_local_query_encoder
+            self.fallback_calls += 1
+            vectors = get_local_query_encoder().encode(texts, **kwargs)
+
+        return vectors[0] if single else vectors
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "socket": self.socket_path,
+            "remote_calls": self.remote_calls,
+            "fallback_calls": self.fallback_calls,
+            "server_up": time.monotonic() >= self._server_down_until,
+        }
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Shared embedding model server for co-located agents")
+    parser.add_argument("--socket", default=os.getenv("EMBED_SERVER_SOCKET") or DEFAULT_SOCKET_PATH, help="Unix socket path")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_MAX_BATCH_SIZE, help="Max texts per model call")
+    parser.add_argument("--wait-ms", type=float, default=DEFAULT_MAX_WAIT_MS, help="Max wait to fill a batch")
+    parser.add_argument("--check", action="store_true", help="Encode a sample through a running server and exit")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    if args.check:
+        client = EmbeddingClient(args.socket, retry_after=0)
+        start = time.perf_counter()
+        vectors = client._encode_remote(["What does this Echo know?", "Embedding server check"])
+        if vectors is None:
+            print(f"❌ No embedding server on {args.socket}")
+            sys.exit(1)
+        print(f"✅ {vectors.shape} vectors in {(time.perf_counter() - start) * 1000:.1f}ms")
+        return
+
+    from query_encoder import get_local_query_encoder
+    model = get_local_query_encoder()
+    server = EmbeddingServer(model.encode, args.socket, args.batch_size, args.wait_ms)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if os.path.exists(args.socket):
+            os.unlink(args.socket)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""
+EchoLink Entity Linker
+Links named entities in question text to knowledge graph symbols with an
+Aho-Corasick automaton over an ingestion-built entity dictionary
+"""
+
+import os
+import re
+import json
+import logging
+from collections import deque
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Surface forms shorter than this (after normalization) are too ambiguous to link
+ENTITY_MIN_SURFACE_CHARS = int(os.getenv("ENTITY_MIN_SURFACE_CHARS", "3"))
+
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+# Never linked on their own, even as the last word of a name ("The Who" still links in full)
+ALIAS_STOPWORDS = frozenset(
+    "the of and for von van der de la le jr sr inc ltd co company university group".split()
+)
+
+
+def normalize_surface(text: str) -> str:
+    """Lowercase words separated by single spaces: "Marie-Curie" and "marie curie" match"""
+    return _NON_WORD.sub(" ", str(text).lower()).strip()
+
+
+def entity_dict_path(token_id: str, base_dir: Path = Path("knowledge_bases")) -> Path:
+    return Path(base_dir) / f"entity_dict_{token_id}.json"
+
+
+class LinkedEntity:
+    """An entity mention found in a question"""
+
+    def __init__(self, term: str, surface: str, start: int, subject_relations: List[str], object_relations: List[str]):
+        self.term = term  # spelling in the triples; probes turn it into the MeTTa symbol
+        self.surface = surface
+        self.start = start  # offset in the normalized question
+        self.subject_relations = subject_relations
+        self.object_relations = object_relations
+
+    def __repr__(self) -> str:
+        return f"LinkedEntity({self.term!r} via {self.surface!r})"
+
+
+class EntityLinker:
+    """
+    Aho-Corasick automaton over the normalized surface forms of every
+    subject and object in an Echo's triples.
+
+    Each entity is reachable by its full name and, for multi-word names, by
+    its last word when no other entity claims it ("Curie" -> Marie Curie).
+    A question is normalized and scanned once, so linking is linear in the
+    question length however many entities the Echo has. Only whole-word
+    matches count and overlapping matches resolve leftmost-longest.
+    """
+
+    def __init__(self, entities: List[Dict[str, Any]]):
+        self.entities = entities
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[Tuple[int, int]]] = [[]]  # state -> [(entity index, surface length)]
+        self.surface_count = 0
+        for index, entity in enumerate(entities):
+            for surface in entity.get("surfaces", []):
+                self._add(surface, index)
+        self._link_failures()
+
+    def _add(self, surface: str, index: int) -> None:
+        state = 0
+        for char in surface:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        self._output[state].append((index, len(surface)))
+        self.surface_count += 1
+
+    def _link_failures(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    @classmethod
+    def build(cls, triples: List[Dict[str, Any]], min_chars: int = ENTITY_MIN_SURFACE_CHARS) -> "EntityLinker":
+        """Entity dictionary from triples: terms, their relations, and unambiguous aliases"""
+        by_term: Dict[str, Dict[str, Any]] = {}
+        for triple in triples:
+            relation = str(triple.get("relation", "")).strip()
+            for role, key in (("subject_relations", "subject"), ("object_relations", "object")):
+                term = str(triple.get(key, "")).strip()
+                if not term or not relation:
+                    continue
+                entry = by_term.setdefault(term, {"term": term, "subject_relations": [], "object_relations": []})
+                if relation not in entry[role]:
+                    entry[role].append(relation)
+
+        entities = sorted(by_term.values(), key=lambda e: e["term"])
+        claimed: Dict[str, List[int]] = {}
+        for index, entity in enumerate(entities):
+            surface = normalize_surface(entity["term"])
+            entity["surfaces"] = [surface] if len(surface) >= min_chars else []
+            if entity["surfaces"]:
+                claimed.setdefault(surface, []).append(index)
+
+        aliases: Dict[str, List[int]] = {}
+        for index, entity in enumerate(entities):
+            words = normalize_surface(entity["term"]).split()
+            # Last names of subjects: "Curie" for "Marie Curie", not "1867" for a date
+            if len(words) > 1 and entity["subject_relations"] and not words[-1].isdigit():
+                alias = words[-1]
+                if len(alias) >= min_chars and alias not in ALIAS_STOPWORDS and alias not in claimed:
+                    aliases.setdefault(alias, []).append(index)
+        for alias, owners in aliases.items():
+            if len(owners) == 1:
+                entities[owners[0]]["surfaces"].append(alias)
+
+        return cls([e for e in entities if e["surfaces"]])
+
+    def save(self, path: Path) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump({"entities": self.entities, "count": len(self.entities)}, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["EntityLinker"]:
+        """The linker for a saved dictionary, or None if there is none (Echo ingested before linking)"""
+        try:
+            with open(path, "r") as f:
+                return cls(json.load(f).get("entities", []))
+        except (OSError, ValueError) as e:
+            if Path(path).exists():
+                logger.warning(f"⚠️ Could not load entity dictionary {path}: {e}")
+            return None
+
+    def link(self, question: str) -> List[LinkedEntity]:
+        """Entities mentioned in the question, in order of appearance"""
+        text = normalize_surface(question)
+        matches: List[Tuple[int, int, int]] = []  # (start, -length, entity index)
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for index, length in self._output[state]:
+                start = position - length + 1
+                # Whole words only: "art" must not match inside "start"
+                if (start == 0 or text[start - 1] == " ") and (position + 1 == len(text) or text[position + 1] == " "):
+                    matches.append((start, -length, index))
+
+        linked: List[LinkedEntity] = []
+        seen = set()
+        covered_until = 0
+        for start, negative_length, index in sorted(matches):
+            if start < covered_until or index in seen:
+                continue
+            entity = self.entities[index]
+            linked.append(LinkedEntity(
+                entity["term"], text[start:start - negative_length], start,
+                entity.get("subject_relations", []), entity.get("object_relations", [])
+            ))
+            seen.add(index)
+            covered_until = start - negative_length
+        return linked
+
+    def stats(self) -> Dict[str, Any]:
+        return {"entities": len(self.entities), "surfaces": self.surface_count, "states": len(self._goto)}
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build an Echo's entity dictionary or link entities in questions")
+    parser.add_argument("token_id", help="Echo token ID")
+    parser.add_argument("questions", nargs="*", help="Questions to link")
+    parser.add_argument("--build", action="store_true", help="(Re)build entity_dict_{token}.json from the fact mapping")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    from kb_cache import knowledge_base_paths
+
+    faiss_file, mapping_file, _ = knowledge_base_paths(args.token_id)
+    path = entity_dict_path(args.token_id, faiss_file.parent)
+    if args.build:
+        with open(mapping_file, "r") as f:
+            triples = json.load(f).get("triples", [])
+        EntityLinker.build(triples).save(path)
+
+    linker = EntityLinker.load(path)
+    if linker is None:
+        print(f"❌ No entity dictionary for {args.token_id} (run with --build)")
+        return
+    print(f"🔗 {args.token_id}: {linker.stats()}")
+    for question in args.questions:
+        print(f"  {question!r} -> {[(e.term, e.surface) for e in linker.link(question)]}")
+
+
+if __name__ == "__main__":
+    main()
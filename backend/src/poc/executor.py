@@ -0,0 +1,137 @@
+"""
+EchoLink Stage Executor
+Runs blocking pipeline stages off the uAgents event loop with per-stage concurrency limits
+"""
+
+import os
+import time
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Optional
+
+from metrics import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+# Default in-flight limit per stage; unknown stages fall back to the pool size
+DEFAULT_STAGE_LIMITS = {
+    "embed": 4,    # SentenceTransformer.encode (torch releases the GIL)
+    "search": 4,   # FAISS search
+    "metta": 2,    # MeTTa probes (each KB's space is additionally locked)
+    "load": 2,     # knowledge base loads (file I/O + MeTTa space build)
+}
+
+
+def parse_stage_limits(spec: str) -> Dict[str, int]:
+    """Parse "embed=4,metta=2" into a dict"""
+    limits = {}
+    for part in spec.split(","):
+        if "=" in part:
+            stage, value = part.split("=", 1)
+            limits[stage.strip()] = int(value)
+    return limits
+
+
+class StageExecutor:
+    """
+    Thread pool shared by all CPU-bound query stages.
+
+    Threads rather than processes: the loaded models, FAISS indexes and MeTTa
+    spaces can't be pickled across processes, and the heavy native calls
+    (torch, faiss) release the GIL. Each stage gets its own semaphore so a
+    burst in one stage (e.g. cold KB loads) can't starve the others.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, stage_limits: Optional[Dict[str, int]] = None):
+        if max_workers is None:
+            max_workers = int(os.getenv("EXECUTOR_WORKERS", "0")) or min(8, (os.cpu_count() or 1) + 2)
+        self.max_workers = max_workers
+
+        limits = dict(DEFAULT_STAGE_LIMITS)
+        limits.update(parse_stage_limits(os.getenv("EXECUTOR_STAGE_LIMITS", "")))
+        if stage_limits:
+            limits.update(stage_limits)
+        self.stage_limits = limits
+
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="echolink-stage")
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self.queue_histograms: Dict[str, LatencyHistogram] = {}
+        self.in_flight: Dict[str, int] = {}
+
+    def _semaphore(self, stage: str) -> asyncio.Semaphore:
+        if stage not in self._semaphores:
+            self._semaphores[stage] = asyncio.Semaphore(self.stage_limits.get(stage, self.max_workers))
+            self.histograms[stage] = LatencyHistogram()
+            self.queue_histograms[stage] = LatencyHistogram()
+            self.in_flight[stage] = 0
+        return self._semaphores[stage]
+
+    async def run(self, stage: str, fn: Callable, *args, **kwargs) -> Any:
+        """Run fn(*args, **kwargs) in the pool under the stage's concurrency limit"""
+        semaphore = self._semaphore(stage)
+        queued = time.perf_counter()
+
+        async with semaphore:
+            started = time.perf_counter()
+            self.queue_histograms[stage].observe((started - queued) * 1000)
+            self.in_flight[stage] += 1
+            try:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(self._pool, partial(fn, *args, **kwargs))
+            finally:
+                self.in_flight[stage] -= 1
+                self.histograms[stage].observe((time.perf_counter() - started) * 1000)
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-stage run time, queue wait and in-flight counts"""
+        return {
+            "max_workers": self.max_workers,
+            "stages": {
+                stage: {
+                    "limit": self.stage_limits.get(stage, self.max_workers),
+                    "in_flight": self.in_flight[stage],
+                    "run": self.histograms[stage].snapshot(),
+                    "queue_wait": self.queue_histograms[stage].snapshot(),
+                }
+                for stage in self._semaphores
+            },
+        }
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False)
+
+
+class EventLoopLagMonitor:
+    """
+    Measures event loop responsiveness by sleeping for a fixed interval and
+    recording how late the wakeup was. Sustained lag means something is still
+    blocking the loop.
+    """
+
+    def __init__(self, interval: float = 0.5):
+        self.interval = interval
+        self.histogram = LatencyHistogram()
+        self.last_lag_ms = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Start sampling on the running loop (idempotent)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            scheduled = loop.time()
+            await asyncio.sleep(self.interval)
+            lag_ms = max(0.0, (loop.time() - scheduled - self.interval) * 1000)
+            self.last_lag_ms = lag_ms
+            self.histogram.observe(lag_ms)
+            if lag_ms > 250:
+                logger.warning(f"⚠️ Event loop lag {lag_ms:.0f}ms")
+
+    def stats(self) -> Dict[str, Any]:
+        return {"last_ms": round(self.last_lag_ms, 3), **self.histogram.snapshot()}
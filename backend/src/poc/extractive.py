@@ -0,0 +1,307 @@
+"""
+EchoLink Extractive Answers
+Templated answers straight from knowledge graph hits for simple lookup
+questions, so they skip the LLM round-trip
+"""
+
+import os
+import re
+import time
+import logging
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from metrics import Counters, LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+EXTRACTIVE_ENABLED = os.getenv("EXTRACTIVE_ENABLED", "1") == "1"
+# Below this the question goes to LLM synthesis
+EXTRACTIVE_MIN_CONFIDENCE = float(os.getenv("EXTRACTIVE_MIN_CONFIDENCE", "0.75"))
+# Longer questions are rarely single lookups
+EXTRACTIVE_MAX_QUESTION_WORDS = int(os.getenv("EXTRACTIVE_MAX_QUESTION_WORDS", "15"))
+# Two candidates this close with different values make the answer ambiguous
+AMBIGUITY_MARGIN = 0.05
+
+# ============================================================================
+# Question Classifier
+# ============================================================================
+
+# First match wins, so the specific forms come before the generic "what/which"
+LOOKUP_PATTERNS: List[Tuple[str, re.Pattern]] = [
+    ("when", re.compile(r"^(when|what (year|date|day|time)|in (what|which) year|which year)\b")),
+    ("where", re.compile(r"^(where|in (what|which) (city|country|place|town|state))\b")),
+    ("who", re.compile(r"^(who|whom|whose)\b")),
+    ("how_many", re.compile(r"^how (many|much|old|long|tall|big)\b")),
+    ("what", re.compile(r"^(what|which)\b")),
+]
+
+NON_LOOKUP = re.compile(
+    r"\b(why|explain|describe|compare|comparison|difference|differences|summar\w*|discuss|"
+    r"opinion|recommend\w*|should|advice|pros|cons|list|all|everything|"
+    r"how (do|does|did|can|could|would|should|to|is|are))\b"
+)
+
+# Relation words that answer each question type. "when" and "where" answers
+# must come from a relation that has one of these words.
+TYPE_HINTS: Dict[str, Set[str]] = {
+    "when": {"date", "year", "time", "inception", "publication", "start", "end", "period"},
+    "where": {"place", "location", "located", "headquarters", "country", "city", "residence", "educated", "territorial"},
+    "who": {"founded", "founder", "author", "creator", "developer", "spouse", "father", "mother", "child", "director", "employer", "by", "ceo", "member"},
+    "how_many": {"number", "count", "population", "age", "size", "amount", "total", "height", "length"},
+    "what": {"instance", "occupation", "subclass", "genre", "type", "part", "use", "field", "notable"},
+}
+STRICT_TYPES = {"when", "where"}
+
+# Question types whose answer must contain a digit
+NUMERIC_TYPES = {"when", "how_many"}
+
+# Question verbs mapped to the relation words that answer them
+QUESTION_SYNONYMS: Dict[str, Set[str]] = {
+    "born": {"birth"},
+    "died": {"death"},
+    "die": {"death"},
+    "founded": {"founder", "inception"},
+    "wrote": {"author"},
+    "written": {"author"},
+    "married": {"spouse"},
+    "wife": {"spouse"},
+    "husband": {"spouse"},
+    "headquartered": {"headquarters"},
+    "based": {"headquarters", "location"},
+    "studied": {"educated"},
+    "works": {"employer"},
+    "work": {"employer", "occupation"},
+    "job": {"occupation"},
+    "published": {"publication"},
+    "released": {"publication"},
+}
+
+STOPWORDS = {
+    "a", "an", "the", "of", "in", "on", "at", "to", "for", "by", "with", "is", "are", "was", "were",
+    "be", "been", "do", "does", "did", "what", "which", "who", "whom", "whose", "when", "where",
+    "how", "many", "much", "this", "that", "it", "its", "s", "and", "or", "from", "as", "about",
+    "has", "have", "had",
+}
+
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+# "[token:abc]" markers users put in chat questions
+TOKEN_MARKER = re.compile(r"[\[\(]token:\w+[\]\)]")
+
+
+def content_words(text: str) -> Set[str]:
+    return {w for w in _NON_WORD.sub(" ", str(text).lower()).split() if w not in STOPWORDS}
+
+
+def words_overlap(words: Set[str], others: Set[str]) -> bool:
+    """Word overlap allowing simple inflections (founded/founder, publication/published)"""
+    return any(w == o or (len(w) >= 5 and len(o) >= 5 and w[:5] == o[:5]) for w in words for o in others)
+
+
+def classify_question(question: str) -> Optional[str]:
+    """Lookup type ("when", "where", "who", "how_many", "what") or None if the question needs synthesis"""
+    text = " ".join(TOKEN_MARKER.sub(" ", question.lower()).split())
+    if not text or len(text.split()) > EXTRACTIVE_MAX_QUESTION_WORDS or text.count("?") > 1:
+        return None
+    if NON_LOOKUP.search(text):
+        return None
+    for question_type, pattern in LOOKUP_PATTERNS:
+        if pattern.search(text):
+            return question_type
+    return None
+
+# ============================================================================
+# Templates
+# ============================================================================
+
+# REBEL emits Wikidata relation labels; these read better than the generic form
+RELATION_TEMPLATES: Dict[str, str] = {
+    "date of birth": "{s} was born on {o}.",
+    "place of birth": "{s} was born in {o}.",
+    "date of death": "{s} died on {o}.",
+    "place of death": "{s} died in {o}.",
+    "inception": "{s} was founded in {o}.",
+    "founded by": "{s} was founded by {o}.",
+    "author": "{s} was written by {o}.",
+    "publication date": "{s} was published on {o}.",
+    "educated at": "{s} was educated at {o}.",
+    "employer": "{s} works for {o}.",
+    "occupation": "{s} is {a} {o}.",
+    "instance of": "{s} is {a} {o}.",
+    "spouse": "{s} is married to {o}.",
+    "headquarters location": "{s} is headquartered in {o}.",
+    "located in the administrative territorial entity": "{s} is located in {o}.",
+    "country": "{s} is in {o}.",
+    "part of": "{s} is part of {o}.",
+    "member of": "{s} is a member of {o}.",
+    "manufacturer": "{s} is made by {o}.",
+    "developer": "{s} was developed by {o}.",
+    "notable work": "{s} is known for {o}.",
+    "award received": "{s} received {o}.",
+    "full name": "{s}'s full name is {o}.",
+}
+
+
+def _humanize(value: Any) -> str:
+    """KG atoms use '_' for spaces; undo that and strip list brackets"""
+    return " ".join(str(value).replace("_", " ").replace("[", " ").replace("]", " ").split())
+
+
+def render_answer(subject: str, relation: str, value: str) -> str:
+    relation_key = _humanize(relation).lower()
+    template = RELATION_TEMPLATES.get(relation_key, "{s}'s {r} is {o}.")
+    answer = template.format(
+        s=subject,
+        r=relation_key,
+        o=value,
+        a="an" if value[:1].lower() in "aeiou" else "a"
+    )
+    return answer[:1].upper() + answer[1:]
+
+# ============================================================================
+# Extractive Answerer
+# ============================================================================
+
+class ExtractiveAnswer:
+    """A templated answer and the evidence behind it"""
+
+    def __init__(self, answer: str, confidence: float, question_type: str, source: str):
+        self.answer = answer
+        self.confidence = confidence
+        self.question_type = question_type
+        self.source = source  # "metta" or "fact"
+
+
+class ExtractiveAnswerer:
+    """
+    Answers lookup questions from (subject, relation, value) evidence.
+
+    Candidates are the MeTTa hits plus the triples behind the retrieved
+    facts. Each gets a confidence from how much of its subject or value the
+    question names (the other side is the answer), whether its relation matches the question (by name or by the question
+    type's hints) and its support (1.0 for an exact MeTTa hit, the vector
+    score for a fact). "when" and "where" answers must come from a date or
+    place relation, and "when" and "how many" answers must contain a digit.
+    The best candidate is used only if it clears EXTRACTIVE_MIN_CONFIDENCE
+    and no different value scores as well.
+    """
+
+    def __init__(self, min_confidence: float = EXTRACTIVE_MIN_CONFIDENCE, enabled: bool = EXTRACTIVE_ENABLED):
+        self.min_confidence = min_confidence
+        self.enabled = enabled
+        self.counters = Counters()
+        self.latency = LatencyHistogram()
+
+    @staticmethod
+    def _candidates(
+        facts_scores: List[float],
+        triples: List[Dict[str, Any]],
+        metta_results: List[Dict[str, Any]]
+    ) -> List[Tuple[str, str, str, float, str]]:
+        """(subject, relation, value, support, source) from MeTTa hits and fact triples"""
+        candidates = []
+        for r in metta_results:
+            if "value" in r:
+                candidates.append((r.get("entity", ""), r.get("relation", ""), r["value"], 1.0, "metta"))
+            else:
+                # Inverse probe: the answer is the subject of (relation, object)
+                candidates.append((r.get("subject", ""), r.get("relation", ""), r.get("object", ""), 1.0, "metta"))
+        for triple, score in zip(triples, facts_scores):
+            if triple.get("subject") and triple.get("relation") and triple.get("object"):
+                candidates.append((triple["subject"], triple["relation"], triple["object"], float(score), "fact"))
+        return candidates
+
+    @staticmethod
+    def _match(words: Set[str], question_words: Set[str]) -> float:
+        """Fraction of words the question names"""
+        if not words:
+            return 0.0
+        return len({w for w in words if words_overlap({w}, question_words)}) / len(words)
+
+    def _confidence(self, question_type: str, question_words: Set[str], subject: str, relation: str, value: str, support: float) -> float:
+        relation_words = content_words(relation)
+        hinted = words_overlap(relation_words, TYPE_HINTS.get(question_type, set()))
+        if question_type in STRICT_TYPES and not hinted:
+            return 0.0
+        if question_type in NUMERIC_TYPES and not any(c.isdigit() for c in value):
+            return 0.0
+
+        # The question names one side of the triple; the other side is the answer
+        subject_words, value_words = content_words(subject), content_words(value)
+        subject_match = self._match(subject_words, question_words)
+        value_match = self._match(value_words, question_words)
+        entity_match, answer_words = (subject_match, value_words) if subject_match >= value_match else (value_match, subject_words)
+        if not answer_words or answer_words <= question_words:
+            return 0.0  # the question already states the answer side
+
+        relation_match = min(1.0, self._match(relation_words, question_words) + (0.6 if hinted else 0.0))
+        return 0.45 * entity_match + 0.35 * relation_match + 0.2 * min(1.0, max(0.0, support))
+
+    def answer(
+        self,
+        question: str,
+        facts_scores: List[float],
+        triples: List[Dict[str, Any]],
+        metta_results: Optional[List[Dict[str, Any]]]
+    ) -> Optional[ExtractiveAnswer]:
+        """A templated answer if the question is a confident lookup, else None (use the LLM)"""
+        if not self.enabled:
+            return None
+
+        start = time.perf_counter()
+        self.counters.inc("attempts")
+        try:
+            question_type = classify_question(question)
+            if question_type is None:
+                self.counters.inc("not_lookup")
+                return None
+            self.counters.inc("lookups")
+
+            question_words = content_words(question)
+            for word in list(question_words):
+                question_words |= QUESTION_SYNONYMS.get(word, set())
+            ranked = []
+            for subject, relation, value, support, source in self._candidates(facts_scores, triples, metta_results or []):
+                subject, value = _humanize(subject), _humanize(value)
+                if not subject or not value:
+                    continue
+                confidence = self._confidence(question_type, question_words, subject, relation, value, support)
+                if confidence > 0:
+                    ranked.append((confidence, subject, relation, value, source))
+
+            if not ranked:
+                self.counters.inc("no_evidence")
+                return None
+
+            ranked.sort(key=lambda item: item[0], reverse=True)
+            confidence, subject, relation, value, source = ranked[0]
+            if confidence < self.min_confidence:
+                self.counters.inc("low_confidence")
+                return None
+            for other_confidence, _, _, other_value, _ in ranked[1:]:
+                if confidence - other_confidence > AMBIGUITY_MARGIN:
+                    break
+                if other_value.lower() != value.lower():
+                    self.counters.inc("ambiguous")
+                    return None
+
+            self.counters.inc("hits")
+            return ExtractiveAnswer(render_answer(subject, relation, value), confidence, question_type, source)
+        finally:
+            self.latency.observe((time.perf_counter() - start) * 1000)
+
+    def stats(self, llm_mean_ms: Optional[float] = None) -> Dict[str, Any]:
+        """Hit rate, and latency saved against the mean LLM synthesis time when given"""
+        counts = self.counters.snapshot()
+        attempts = counts.get("attempts", 0)
+        hits = counts.get("hits", 0)
+        latency = self.latency.snapshot()
+        saved_per_hit = max(0.0, llm_mean_ms - latency["mean_ms"]) if llm_mean_ms else None
+        return {
+            "enabled": self.enabled,
+            "min_confidence": self.min_confidence,
+            **counts,
+            "hit_rate": round(hits / attempts, 4) if attempts else 0.0,
+            "extractive_mean_ms": latency["mean_ms"],
+            "estimated_saved_ms_per_hit": None if saved_per_hit is None else round(saved_per_hit, 1),
+            "estimated_saved_ms_total": None if saved_per_hit is None else round(saved_per_hit * hits, 1),
+        }
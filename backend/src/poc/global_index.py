@@ -0,0 +1,290 @@
+"""
+EchoLink Global Fact Index
+Cross-Echo sharded FAISS index over every Echo's fact embeddings
+"""
+
+import os
+import json
+import logging
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from lazy_imports import lazy_import
+
+faiss = lazy_import("faiss")
+
+try:
+    import fcntl
+except ImportError:  # non-POSIX: single-writer assumption
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+GLOBAL_INDEX_DIR = Path(os.getenv("GLOBAL_INDEX_DIR", "knowledge_bases/global_index"))
+DEFAULT_NUM_SHARDS = int(os.getenv("GLOBAL_INDEX_SHARDS", "8"))
+
+# Vector ids are (numeric token id << 32) | fact index, so one token's facts
+# form a contiguous id range that IDSelectorRange can filter on
+FACT_BITS = 32
+FACT_MASK = (1 << FACT_BITS) - 1
+
+
+@contextmanager
+def file_lock(lock_path: Path):
+    """Cross-process exclusive lock so concurrent ingests don't clobber each other's updates"""
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(lock_path, "w") as lock_file:
+        if fcntl:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _atomic_write_json(path: Path, data: Any) -> None:
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+class GlobalFactIndex:
+    """
+    Sharded inner-product index over all Echos' normalized fact embeddings.
+
+    Each token is assigned a numeric id and lives entirely in shard
+    (tid % num_shards), so a token-filtered search touches one shard with an
+    id-range selector while an unfiltered search merges top-k across shards.
+    Fact texts are stored per shard, so results never require opening the
+    per-token fact_index/fact_mapping files.
+    """
+
+    def __init__(self, base_dir: Path = GLOBAL_INDEX_DIR, num_shards: int = DEFAULT_NUM_SHARDS):
+        self.base_dir = Path(base_dir)
+        self.manifest: Dict[str, Any] = {"num_shards": num_shards, "next_tid": 1, "tokens": {}}
+        self.shards: Dict[int, Any] = {}
+        self.shard_facts: Dict[int, Dict[str, str]] = {}
+        self._shard_mtimes: Dict[int, int] = {}
+        self._lock = threading.RLock()
+
+    @property
+    def num_shards(self) -> int:
+        return self.manifest["num_shards"]
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def _manifest_path(self) -> Path:
+        return self.base_dir / "manifest.json"
+
+    def _shard_path(self, shard: int) -> Path:
+        return self.base_dir / f"shard_{shard}.faiss"
+
+    def _facts_path(self, shard: int) -> Path:
+        return self.base_dir / f"shard_{shard}_facts.json"
+
+    def _load_manifest(self) -> None:
+        try:
+            with open(self._manifest_path(), "r") as f:
+                self.manifest = json.load(f)
+        except (OSError, ValueError):
+            pass
+
+    def _load_shard(self, shard: int, dimension: Optional[int] = None):
+        """Return the shard index, reading it from disk if needed"""
+        if shard in self.shards:
+            return self.shards[shard]
+
+        path = self._shard_path(shard)
+        if path.exists():
+            # Writers publish facts before the shard, so facts read after the
+            # index are at least as new; stat first so a shard replaced mid-read
+            # is reloaded by the next refresh
+            mtime = path.stat().st_mtime_ns
+            self.shards[shard] = faiss.read_index(str(path))
+            self._shard_mtimes[shard] = mtime
+            with open(self._facts_path(shard), "r") as f:
+                self.shard_facts[shard] = json.load(f)
+        elif dimension is not None:
+            self.shards[shard] = faiss.IndexIDMap2(faiss.IndexFlatIP(dimension))
+            self.shard_facts[shard] = {}
+        else:
+            return None
+        return self.shards[shard]
+
+    def load(self) -> "GlobalFactIndex":
+        """Load the manifest and every existing shard"""
+        with self._lock:
+            self._load_manifest()
+            self.shards.clear()
+            self.shard_facts.clear()
+            for shard in range(self.num_shards):
+                self._load_shard(shard)
+        logger.info(
+            f"🌐 Global fact index loaded: {len(self.manifest['tokens'])} Echos, "
+            f"{sum(s.ntotal for s in self.shards.values())} facts in {len(self.shards)} shards"
+        )
+        return self
+
+    def refresh(self) -> List[int]:
+        """Reload shards rewritten by another process (e.g. ingest.py); returns reloaded shards"""
+        reloaded = []
+        with self._lock:
+            self._load_manifest()
+            for shard in range(self.num_shards):
+                path = self._shard_path(shard)
+                try:
+                    mtime = path.stat().st_mtime_ns
+                except OSError:
+                    continue
+                if self._shard_mtimes.get(shard) != mtime:
+                    self.shards.pop(shard, None)
+                    self._load_shard(shard)
+                    reloaded.append(shard)
+        if reloaded:
+            logger.info(f"🌐 Reloaded global index shards {reloaded}")
+        return reloaded
+
+    # ------------------------------------------------------------------
+    # Updates
+    # ------------------------------------------------------------------
+
+    def add_echo(self, token_id: str, embeddings, fact_texts: List[str]) -> None:
+        """
+        Insert or replace one Echo's facts.
+
+        Args:
+            token_id: Echo token ID
+            embeddings: (n, d) float32 L2-normalized fact embeddings
+            fact_texts: n fact strings aligned with embeddings
+        """
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        with file_lock(self.base_dir / ".lock"), self._lock:
+            self._load_manifest()
+
+            entry = self.manifest["tokens"].get(token_id)
+            if entry is None:
+                entry = {"tid": self.manifest["next_tid"], "count": 0}
+                self.manifest["next_tid"] += 1
+            tid = entry["tid"]
+            shard = tid % self.num_shards
+
+            # Always start from the on-disk shard so other writers' updates are kept
+            self.shards.pop(shard, None)
+            index = self._load_shard(shard, dimension=embeddings.shape[1])
+            facts = self.shard_facts[shard]
+
+            # Replace any previous version of this Echo
+            lo, hi = tid << FACT_BITS, (tid + 1) << FACT_BITS
+            index.remove_ids(faiss.IDSelectorRange(lo, hi))
+            for fact_id in [k for k in facts if lo <= int(k) < hi]:
+                del facts[fact_id]
+
+            ids = np.arange(len(fact_texts), dtype=np.int64) + lo
+            if len(fact_texts):
+                index.add_with_ids(embeddings, ids)
+            for fact_id, text in zip(ids.tolist(), fact_texts):
+                facts[str(fact_id)] = text
+
+            entry["count"] = len(fact_texts)
+            self.manifest["tokens"][token_id] = entry
+
+            # The shard goes last: refresh() reloads on its mtime alone, so the
+            # facts and manifest it needs must already be on disk by then
+            _atomic_write_json(self._facts_path(shard), facts)
+            _atomic_write_json(self._manifest_path(), self.manifest)
+            shard_path = self._shard_path(shard)
+            faiss.write_index(index, str(shard_path) + ".tmp")
+            os.replace(str(shard_path) + ".tmp", shard_path)
+            self._shard_mtimes[shard] = shard_path.stat().st_mtime_ns
+
+        logger.info(f"🌐 Global fact index updated: token {token_id} -> shard {shard} ({len(fact_texts)} facts)")
+
+    # ------------------------------------------------------------------
+    # Search
+    # ------------------------------------------------------------------
+
+    def _tokens_by_tid(self) -> Dict[int, str]:
+        return {entry["tid"]: token_id for token_id, entry in self.manifest["tokens"].items()}
+
+    def search(self, query_vector, top_k: int = 10, token_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Search facts across the marketplace, or within one Echo.
+
+        Returns:
+            Up to top_k dicts with token_id, fact_index, score and fact, best first
+        """
+        query = np.ascontiguousarray(np.asarray(query_vector, dtype=np.float32).reshape(1, -1))
+
+        with self._lock:
+            tokens_by_tid = self._tokens_by_tid()
+
+            if token_id is not None:
+                entry = self.manifest["tokens"].get(token_id)
+                if entry is None:
+                    return []
+                tid = entry["tid"]
+                selector = faiss.IDSelectorRange(tid << FACT_BITS, (tid + 1) << FACT_BITS)
+                targets = [(tid % self.num_shards, faiss.SearchParameters(sel=selector))]
+            else:
+                targets = [(shard, None) for shard in self.shards]
+
+            hits = []
+            for shard, params in targets:
+                index = self.shards.get(shard)
+                if index is None or index.ntotal == 0:
+                    continue
+                scores, ids = index.search(query, min(top_k, index.ntotal), params=params)
+                facts = self.shard_facts.get(shard, {})
+                for score, fact_id in zip(scores[0], ids[0]):
+                    if fact_id < 0:
+                        continue
+                    hits.append({
+                        "token_id": tokens_by_tid.get(int(fact_id) >> FACT_BITS),
+                        "fact_index": int(fact_id) & FACT_MASK,
+                        "score": float(score),
+                        "fact": facts.get(str(int(fact_id)), ""),
+                    })
+
+        hits.sort(key=lambda hit: hit["score"], reverse=True)
+        return hits[:top_k]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "echos": len(self.manifest["tokens"]),
+                "shards": {shard: index.ntotal for shard, index in self.shards.items()},
+            }
+
+# ============================================================================
+# Backfill CLI
+# ============================================================================
+
+def rebuild_from_knowledge_bases(knowledge_dir: str = "knowledge_bases") -> None:
+    """Backfill the global index from existing per-token fact_index/fact_mapping files"""
+    index = GlobalFactIndex()
+    for faiss_path in sorted(Path(knowledge_dir).glob("fact_index_*.faiss")):
+        token_id = faiss_path.stem[len("fact_index_"):]
+        mapping_path = Path(knowledge_dir) / f"fact_mapping_{token_id}.json"
+        if not mapping_path.exists():
+            logger.warning(f"⚠️ Skipping token {token_id}: no fact mapping")
+            continue
+
+        token_index = faiss.read_index(str(faiss_path))
+        with open(mapping_path, "r") as f:
+            fact_texts = json.load(f).get("facts", [])
+
+        embeddings = token_index.reconstruct_n(0, token_index.ntotal)
+        index.add_echo(token_id, embeddings, fact_texts[:token_index.ntotal])
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    rebuild_from_knowledge_bases()
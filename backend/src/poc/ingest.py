@@ -14,12 +14,18 @@ from pathlib import Path
 from typing import List, Dict, Any
 
 # Core dependencies
-from hyperon import MeTTa
-from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
-from sentence_transformers import SentenceTransformer
-import faiss
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
+
+from model_registry import get_rebel, get_sentence_transformer
+from global_index import GlobalFactIndex
+from echo_router import EchoRouter
+from bm25_index import BM25Index, bm25_path
+from entity_linker import EntityLinker, entity_dict_path
+from lazy_imports import lazy_import
+
+# Heavy runtimes load on first use, so `ingest.py --help` and argument errors are instant
+hyperon = lazy_import("hyperon")
+faiss = lazy_import("faiss")
 
 # Configure logging
 logging.basicConfig(
@@ -28,6 +34,13 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+def atomic_write_json(path: str, data: Dict[str, Any]) -> None:
+    """Write JSON via a temp file + rename so a running Knowledge Agent never reads a partial file"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
 # ============================================================================
 # Dynamic Semantic Search (No Predefined Templates)
 # ============================================================================
@@ -42,8 +55,7 @@ class REBELTripleExtractor:
     
     def __init__(self):
         logger.info("Loading REBEL model...")
-        self.tokenizer = AutoTokenizer.from_pretrained("Babelscape/rebel-large")
-        self.model = AutoModelForSeq2SeqLM.from_pretrained("Babelscape/rebel-large")
+        self.tokenizer, self.model = get_rebel()
         logger.info("✅ REBEL model loaded")
     
     def extract_triplets_from_text(self, text: str) -> List[Dict[str, str]]:
@@ -286,7 +298,7 @@ class MeTTaKnowledgeGraphBuilder:
     """Build and save MeTTa knowledge graphs"""
     
     def __init__(self):
-        self.metta = MeTTa()
+        self.metta = hyperon.MeTTa()
         self.atoms = []
     
     def triple_to_metta_atom(self, triple: Dict[str, str]) -> str:
@@ -343,8 +355,7 @@ class MeTTaKnowledgeGraphBuilder:
             'count': len(self.atoms)
         }
         
-        with open(output_path, 'w') as f:
-            json.dump(knowledge_data, f, indent=2)
+        atomic_write_json(output_path, knowledge_data)
         
         logger.info(f"✅ Knowledge graph saved to {output_path}")
 
@@ -357,7 +368,7 @@ class TemplateIndexBuilder:
     
     def __init__(self):
         logger.info("Loading SentenceTransformer model...")
-        self.model = SentenceTransformer('all-MiniLM-L6-v2')
+        self.model = get_sentence_transformer()
         logger.info("✅ SentenceTransformer model loaded")
     
     def build_fact_embeddings(self, triples: List[Dict[str, str]], token_id: str) -> str:
@@ -394,7 +405,21 @@ class TemplateIndexBuilder:
         
         # Save index
         output_path = os.path.join(knowledge_dir, f"fact_index_{token_id}.faiss")
-        faiss.write_index(index, output_path)
+        faiss.write_index(index, output_path + ".tmp")
+        os.replace(output_path + ".tmp", output_path)
+        
+        # BM25 postings and entity dictionary, written before the mapping so a
+        # reload triggered by the new mapping sees the matching indexes
+        try:
+            BM25Index.build(fact_texts).save(bm25_path(token_id, Path(knowledge_dir)))
+        except Exception as e:
+            logger.warning(f"⚠️ Could not build BM25 index: {e}")
+        
+        # Surface forms of every subject/object for linking entities named in questions
+        try:
+            EntityLinker.build(triples).save(entity_dict_path(token_id, Path(knowledge_dir)))
+        except Exception as e:
+            logger.warning(f"⚠️ Could not build entity dictionary: {e}")
         
         # Save fact mapping
         fact_mapping = {
@@ -404,12 +429,23 @@ class TemplateIndexBuilder:
         }
         
         mapping_path = os.path.join(knowledge_dir, f"fact_mapping_{token_id}.json")
-        with open(mapping_path, 'w') as f:
-            json.dump(fact_mapping, f, indent=2)
+        atomic_write_json(mapping_path, fact_mapping)
         
         logger.info(f"✅ Fact embeddings index saved to {output_path}")
         logger.info(f"✅ Fact mapping saved to {mapping_path}")
         
+        # Add/replace this Echo in the cross-Echo discovery index
+        try:
+            GlobalFactIndex(Path(knowledge_dir) / "global_index").add_echo(token_id, embeddings, fact_texts)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not update global fact index: {e}")
+        
+        # Profile centroids used to route token-less questions to this Echo
+        try:
+            EchoRouter(Path(knowledge_dir) / "echo_router.npz").add_echo(token_id, embeddings)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not update Echo router: {e}")
+        
         return output_path
 
 # ============================================================================
@@ -13,6 +13,10 @@ from typing import Optional, Dict, Any, List
 from datetime import datetime
 from uuid import uuid4
 
+# Record what each import costs so startup time can be attributed (logged on startup)
+from lazy_imports import install_import_timer, uninstall_import_timer, log_import_report
+install_import_timer()
+
 # uAgents framework
 from uagents import Agent, Context, Model, Protocol
 
@@ -26,14 +30,21 @@ from uagents_core.contrib.protocols.chat import (
     chat_protocol_spec,
 )
 
-# Core dependencies
-from hyperon import MeTTa
-from sentence_transformers import SentenceTransformer
-import faiss
+# Core dependencies (hyperon/faiss load on first use so the agent starts fast)
 import numpy as np
+from lazy_imports import lazy_import
+
+hyperon = lazy_import("hyperon")
+faiss = lazy_import("faiss")
 
 # Import utilities
 from utils import ASIOneLLM
+from model_registry import get_query_encoder
+from echo_router import EchoRouter
+from context_packer import ContextPacker
+from kg_existence import EXISTENCE_PRUNING_ENABLED, ExistenceIndex, metta_symbol
+from probe_memo import MISSING, ProbeMemo
+from query_planner import run_probe
 try:
     from blockchain import PaymentValidator
 except:
@@ -102,6 +113,11 @@ class IntelligentQueryEngine:
         self.fact_index = {}  # Store multiple indices by token_id
         self.fact_mapping = {}  # Store multiple mappings by token_id
         self.knowledge_graphs = {}  # Cache loaded knowledge graphs
+        self.existence = {}  # Per-token (entity, relation) pairs present in each graph
+        self.kb_versions = {}  # Per-token version of the loaded graph (scopes memoized probes)
+        self.probe_memo = ProbeMemo()
+        self.echo_router = EchoRouter()  # Routes token-less questions
+        self.context_packer = ContextPacker()  # Shares the synthesis prompt prefix with the Knowledge Agent
         self.llm = None
         self.initialized = False
         
@@ -117,9 +133,11 @@ class IntelligentQueryEngine:
         
         try:
             # Load sentence transformer
-            logger.info("Loading SentenceTransformer model...")
-            self.sentence_model = SentenceTransformer('all-MiniLM-L6-v2')
-            logger.info("✅ SentenceTransformer loaded")
+            logger.info("Loading query encoder...")
+            self.sentence_model = get_query_encoder()
+            logger.info("✅ Query encoder ready")
+            
+            self.echo_router.load()
             
             # Initialize ASI:One LLM
             logger.info("Initializing ASI:One LLM...")
@@ -154,6 +172,16 @@ class IntelligentQueryEngine:
         
         return None
     
+    def route_question(self, question: str) -> Optional[str]:
+        """Pick the best-matching Echo for a question without a token ID"""
+        self.echo_router.refresh()
+        routes = self.echo_router.route(self.sentence_model.encode([question])[0])
+        if not routes:
+            return None
+        
+        logger.info(f"🧭 Routed to {routes[0][0]} (candidates: {', '.join(f'{t}={s:.2f}' for t, s in routes)})")
+        return routes[0][0]
+    
     def load_knowledge_base(self, token_id: str) -> bool:
         """Load knowledge base for a specific token ID"""
         if token_id in self.knowledge_graphs:
@@ -173,7 +201,7 @@ class IntelligentQueryEngine:
                 knowledge_data = json.load(f)
             
             # Create MeTTa interpreter and load atoms
-            metta = MeTTa()
+            metta = hyperon.MeTTa()
             for atom in knowledge_data['atoms']:
                 try:
                     metta.run(atom)
@@ -181,6 +209,10 @@ class IntelligentQueryEngine:
                     logger.warning(f"Failed to load atom '{atom}': {e}")
             
             self.knowledge_graphs[token_id] = metta
+            self.existence[token_id] = ExistenceIndex.from_atoms(knowledge_data['atoms'])
+            stat = os.stat(knowledge_path)
+            self.kb_versions[token_id] = f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+            self.probe_memo.invalidate_token(token_id, self.kb_versions[token_id])
             logger.info(f"✅ Knowledge base loaded: {len(knowledge_data['atoms'])} atoms")
             return True
             
@@ -248,11 +280,11 @@ class IntelligentQueryEngine:
         logger.info(f"✅ Found {len(relevant_facts)} relevant facts")
         return relevant_facts
     
-    def generate_metta_queries(self, relevant_facts: List[Dict], question: str) -> List[str]:
-        """Generate MeTTa queries dynamically from relevant facts"""
+    def generate_metta_queries(self, relevant_facts: List[Dict], question: str, token_id: Optional[str] = None) -> List[str]:
+        """Generate MeTTa queries dynamically from relevant facts, skipping pairs absent from the graph"""
         logger.info(f"🎯 Generating dynamic MeTTa queries...")
         
-        metta_queries = []
+        probes = []
         
         # Extract entities and relations from relevant facts
         entities = set()
@@ -269,17 +301,22 @@ class IntelligentQueryEngine:
         # Generate queries for top entities and relations
         for entity in list(entities)[:5]:
             for relation in list(relations)[:3]:
-                query = f"!(query {relation} {entity})"
-                metta_queries.append(query)
+                probes.append(("query", relation, entity))
         
         # Add inverse queries for "who/what" questions
         if 'who' in question.lower() or 'which' in question.lower():
             for relation in list(relations)[:3]:
                 for entity in list(entities)[:2]:
-                    inverse_query = f"!(query-inverse {relation} {entity})"
-                    metta_queries.append(inverse_query)
+                    probes.append(("query-inverse", relation, entity))
+        
+        # Most entity x relation pairs don't exist; don't spend an interpreter run on them
+        existence = self.existence.get(token_id)
+        pruned = 0
+        if existence is not None and EXISTENCE_PRUNING_ENABLED:
+            probes, pruned = existence.prune(probes)
         
-        logger.info(f"✅ Generated {len(metta_queries)} dynamic queries")
+        metta_queries = [f"!({kind} {metta_symbol(relation)} {metta_symbol(entity)})" for kind, relation, entity in probes]
+        logger.info(f"✅ Generated {len(metta_queries)} dynamic queries ({pruned} pruned)")
         return metta_queries
     
     def execute_metta_queries(self, token_id: str, queries: List[str]) -> List[Dict]:
@@ -292,47 +329,55 @@ class IntelligentQueryEngine:
         
         results = []
         metta = self.knowledge_graphs[token_id]
+        version = self.kb_versions.get(token_id, "")
+        memoized = 0
         
         for query in queries:
-            try:
-                result = metta.run(query)
-                
-                if result and len(result) > 0:
-                    if isinstance(result[0], list) and len(result[0]) > 0:
-                        answer = str(result[0][0])
-                    else:
-                        answer = str(result[0])
-                    
-                    if answer and answer != '[]' and 'Empty' not in answer:
-                        parts = query.replace('!(query ', '').replace('!(query-inverse ', '').replace(')', '').split(' ')
-                        if len(parts) >= 2:
-                            relation = parts[0]
-                            entity = parts[1]
-                            results.append({
-                                'entity': entity,
-                                'relation': relation,
-                                'value': answer.replace('[', '').replace(']', '').strip()
-                            })
-                
-            except Exception as e:
-                logger.warning(f"Query failed: {e}")
-                continue
-        
-        logger.info(f"✅ Collected {len(results)} results from MeTTa queries")
+            value = self.probe_memo.get(token_id, version, query)
+            if value is MISSING:
+                try:
+                    value = run_probe(metta, query)
+                except Exception as e:
+                    logger.warning(f"Query failed: {e}")
+                    continue
+                self.probe_memo.put(token_id, version, query, value)
+            else:
+                memoized += 1
+            
+            if value is not None:
+                parts = query.replace('!(query ', '').replace('!(query-inverse ', '').replace(')', '').split(' ')
+                if len(parts) >= 2:
+                    relation = parts[0]
+                    entity = parts[1]
+                    results.append({
+                        'entity': entity,
+                        'relation': relation,
+                        'value': value
+                    })
+        
+        logger.info(f"✅ Collected {len(results)} results from MeTTa queries ({len(queries)} issued, {memoized} memoized, memo hit rate {self.probe_memo.stats()['hit_rate']:.1%})")
         return results
     
-    async def synthesize_answer(self, precise_result: str, original_question: str) -> str:
+    async def synthesize_answer(
+        self,
+        precise_result: str,
+        original_question: str,
+        relevant_facts: Optional[List[Dict]] = None,
+        metta_results: Optional[List[Dict]] = None
+    ) -> str:
         """Synthesize natural answer using ASI:One LLM"""
         logger.info("🤖 Synthesizing natural answer...")
         
-        synthesis_prompt = f"""You are an intelligent assistant providing natural answers based on facts.
-
-Question: {original_question}
-Facts: {precise_result}
-
-Provide a natural, conversational answer incorporating these facts.
-
-Answer:"""
+        relevant_facts = relevant_facts or []
+        packed = self.context_packer.pack(
+            original_question,
+            [f['fact_text'] for f in relevant_facts],
+            [f['score'] for f in relevant_facts],
+            [f['triple'] for f in relevant_facts],
+            metta_results
+        )
+        synthesis_prompt = packed.prompt
+        logger.info(f"🧾 Prompt: {packed.summary()}")
         
         try:
             answer = await self.llm.generate(synthesis_prompt)
@@ -352,14 +397,16 @@ Answer:"""
         logger.info("=" * 60)
         logger.info(f"❓ Query: {question}")
         
-        # Extract token ID
+        # Extract token ID, falling back to the Echo router for token-less questions
         token_id = explicit_token_id or self.extract_token_id(question)
+        if not token_id:
+            token_id = self.route_question(question)
         if not token_id:
             return {
                 "success": False,
                 "answer": "",
                 "token_id": None,
-                "error": "Please specify a token ID. Format: [token:YOUR_TOKEN_ID] or pass token_id parameter."
+                "error": "No Echo matched your question. Please specify a token ID. Format: [token:YOUR_TOKEN_ID] or pass token_id parameter."
             }
         
         logger.info(f"🆔 Token ID: {token_id}")
@@ -398,7 +445,7 @@ Answer:"""
             }
         
         # Generate and execute MeTTa queries
-        metta_queries = self.generate_metta_queries(relevant_facts, clean_question)
+        metta_queries = self.generate_metta_queries(relevant_facts, clean_question, token_id)
         metta_results = self.execute_metta_queries(token_id, metta_queries)
         
         # Format results
@@ -421,7 +468,7 @@ Answer:"""
             precise_result = "No specific information found in the knowledge graph."
         
         # Synthesize answer
-        natural_answer = await self.synthesize_answer(precise_result, clean_question)
+        natural_answer = await self.synthesize_answer(precise_result, clean_question, relevant_facts, metta_results)
         
         processing_time = (time.time() - start_time) * 1000  # Convert to ms
         
@@ -649,10 +696,12 @@ async def handle_message(ctx: Context, sender: str, msg: ChatMessage):
 
 I use semantic routing and MeTTa reasoning to answer your questions.
 
-To ask a question, include a token ID:
+To ask a specific Echo, include a token ID:
 - Format: [token:YOUR_TOKEN_ID] Your question
 - Example: [token:test_007] What is the capital of France?
 
+Without a token ID, your question is routed to the Echo that knows most about it.
+
 How can I help you?"""
             await ctx.send(sender, create_text_chat(welcome_msg))
             continue
@@ -711,6 +760,8 @@ async def startup(ctx: Context):
     logger.info("=" * 60)
     logger.info("🚀 EchoLink Intelligent Agent Starting...")
     logger.info("=" * 60)
+    log_import_report("Intelligent Agent")
+    uninstall_import_timer()  # report startup only; later imports skip the wrapper
     
     try:
         # Initialize query engine
@@ -0,0 +1,498 @@
+"""
+EchoLink Knowledge Base Cache
+Per-token cache of loaded Echo knowledge bases (FAISS index, fact mapping, MeTTa space)
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import logging
+import asyncio
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Dict, Any, Tuple, List, Callable
+
+from lazy_imports import lazy_import
+from bm25_index import BM25Index, bm25_path
+from entity_linker import EntityLinker, entity_dict_path
+from kg_existence import ExistenceIndex
+
+# Imported on the first KB load, not at agent startup
+hyperon = lazy_import("hyperon")
+faiss = lazy_import("faiss")
+
+logger = logging.getLogger(__name__)
+
+KNOWLEDGE_BASES_DIR = Path("knowledge_bases")
+
+# Fallback MeTTa footprint per atom when RSS can't be sampled (non-Linux)
+METTA_BYTES_PER_ATOM = int(os.getenv("KB_CACHE_METTA_BYTES_PER_ATOM", "4096"))
+
+# Query predicates added to every Echo's space (same as ingest.py)
+QUERY_PREDICATES = [
+    """
+    !(add-atom &self
+        (= (query $relation $subject)
+            (match &self
+            ($relation $subject $object)
+            $object)))
+    """,
+    """
+    !(add-atom &self
+        (= (query-inverse $relation $object)
+            (match &self
+            ($relation $subject $object)
+            $subject)))
+    """,
+]
+
+# ============================================================================
+# Size Measurement
+# ============================================================================
+
+def _rss_bytes() -> Optional[int]:
+    """Current resident set size, Linux only"""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def deep_sizeof(obj: Any, _seen: Optional[set] = None) -> int:
+    """Recursive sys.getsizeof over JSON-like containers"""
+    if _seen is None:
+        _seen = set()
+    if id(obj) in _seen:
+        return 0
+    _seen.add(id(obj))
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, _seen) + deep_sizeof(v, _seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set)):
+        size += sum(deep_sizeof(item, _seen) for item in obj)
+    return size
+
+
+def faiss_index_bytes(index) -> int:
+    """Vector storage of a FAISS index (flat indexes store ntotal * d float32)"""
+    if index is None:
+        return 0
+    code_size = getattr(index, "code_size", None) or index.d * 4
+    return int(index.ntotal * code_size)
+
+# ============================================================================
+# Loaded Knowledge Base
+# ============================================================================
+
+def knowledge_base_paths(token_id: str, base_dir: Optional[Path] = None) -> Tuple[Path, Path, Path]:
+    """Resolve (faiss, mapping, knowledge) artifact paths for a token"""
+    base_dir = KNOWLEDGE_BASES_DIR if base_dir is None else base_dir
+    faiss_file = base_dir / f"fact_index_{token_id}.faiss"
+    mapping_file = base_dir / f"fact_mapping_{token_id}.json"
+    knowledge_file = base_dir / f"knowledge_base_{token_id}.db"
+
+    # If not in knowledge_bases, try root directory
+    if not faiss_file.exists():
+        faiss_file = Path(f"fact_index_{token_id}.faiss")
+        mapping_file = Path(f"fact_mapping_{token_id}.json")
+        knowledge_file = Path(f"knowledge_base_{token_id}.db")
+
+    return faiss_file, mapping_file, knowledge_file
+
+
+def artifact_paths(token_id: str, base_dir: Optional[Path] = None) -> Tuple[Path, ...]:
+    """Every artifact loaded into a token's KB, hence every file its version covers"""
+    faiss_file, mapping_file, knowledge_file = knowledge_base_paths(token_id, base_dir)
+    return (
+        faiss_file, mapping_file, knowledge_file,
+        bm25_path(token_id, faiss_file.parent), entity_dict_path(token_id, faiss_file.parent),
+    )
+
+
+def artifact_version(paths) -> str:
+    """Version string derived from artifact mtimes and sizes ("" if none exist)"""
+    parts = []
+    for path in paths:
+        try:
+            stat = path.stat()
+            parts.append(f"{stat.st_mtime_ns:x}-{stat.st_size:x}")
+        except OSError:
+            parts.append("0")
+    return ".".join(parts) if any(p != "0" for p in parts) else ""
+
+
+class LoadedKnowledgeBase:
+    """Everything needed to answer queries for one Echo, loaded together"""
+
+    def __init__(self, token_id: str, faiss_index, fact_mapping: Dict[str, Any], metta,
+                 atom_count: int, version: str, size_bytes: int, bm25: Optional[BM25Index] = None,
+                 entity_linker: Optional[EntityLinker] = None, existence: Optional[ExistenceIndex] = None):
+        self.token_id = token_id
+        self.faiss_index = faiss_index
+        self.fact_mapping = fact_mapping
+        self.metta = metta
+        self.atom_count = atom_count
+        self.version = version
+        self.size_bytes = size_bytes
+        self.bm25 = bm25  # None for Echoes ingested before BM25 indexes existed
+        self.entity_linker = entity_linker  # likewise for entity dictionaries
+        self.existence = existence  # (subject, relation) / (relation, object) pairs in the MeTTa space
+        self.loaded_at = time.time()
+        self.metta_lock = threading.Lock()  # MeTTa spaces are not safe for concurrent runs
+
+
+def load_knowledge_base(token_id: str) -> LoadedKnowledgeBase:
+    """Load the FAISS index, fact mapping and MeTTa space for a token"""
+    faiss_file, mapping_file, knowledge_file, bm25_file, entity_dict_file = artifact_paths(token_id)
+    version = artifact_version((faiss_file, mapping_file, knowledge_file, bm25_file, entity_dict_file))
+
+    # Load FAISS index
+    faiss_index = None
+    if faiss_file.exists():
+        faiss_index = faiss.read_index(str(faiss_file))
+        logger.info(f"📚 Loaded FAISS index for token {token_id}: {faiss_file.name}")
+    else:
+        logger.warning(f"⚠️ No FAISS index found for token {token_id}")
+
+    # Load fact mapping
+    fact_mapping = {}
+    if mapping_file.exists():
+        with open(mapping_file, 'r') as f:
+            fact_mapping = json.load(f)
+        logger.info(f"🗂️ Loaded fact mapping for token {token_id}: {mapping_file.name}")
+    else:
+        logger.warning(f"⚠️ No fact mapping found for token {token_id}")
+
+    # Load BM25 index (optional, built at ingestion next to the FAISS index)
+    bm25 = BM25Index.load(bm25_file)
+    if bm25 is not None:
+        logger.info(f"🔤 Loaded BM25 index for token {token_id}: {len(bm25.vocab)} terms")
+
+    # Load entity dictionary (optional, built at ingestion)
+    entity_linker = EntityLinker.load(entity_dict_file)
+    if entity_linker is not None:
+        logger.info(f"🔗 Loaded entity dictionary for token {token_id}: {len(entity_linker.entities)} entities")
+
+    # Load MeTTa knowledge graph and add query predicates
+    metta = None
+    existence = None
+    atom_count = 0
+    metta_bytes = 0
+    if knowledge_file.exists():
+        with open(knowledge_file, 'r') as f:
+            atoms = json.load(f).get('atoms', [])
+
+        rss_before = _rss_bytes()
+
+        # Fresh MeTTa interpreter for this token
+        metta = hyperon.MeTTa()
+        for atom in atoms:
+            try:
+                metta.run(f'!(add-atom &self {atom})')
+            except Exception as e:
+                logger.warning(f"Failed to add atom '{atom}': {e}")
+        for predicate in QUERY_PREDICATES:
+            metta.run(predicate)
+
+        atom_count = len(atoms)
+        rss_after = _rss_bytes()
+
+        # Built from the same atoms, so probes the space can't match are never issued
+        existence = ExistenceIndex.from_atoms(atoms)
+
+        # The space lives on the Rust side, so sample RSS around the build
+        if rss_before is not None and rss_after is not None and rss_after > rss_before:
+            metta_bytes = rss_after - rss_before
+        else:
+            metta_bytes = atom_count * METTA_BYTES_PER_ATOM
+
+        logger.info(f"🧠 Loaded {atom_count} MeTTa atoms with query predicates")
+    else:
+        logger.warning(f"⚠️ No MeTTa knowledge graph found for token {token_id}")
+
+    size_bytes = faiss_index_bytes(faiss_index) + deep_sizeof(fact_mapping) + metta_bytes
+    if bm25 is not None:
+        size_bytes += bm25.nbytes
+    if entity_linker is not None:
+        size_bytes += deep_sizeof(entity_linker.entities)
+    if existence is not None:
+        size_bytes += existence.nbytes
+
+    return LoadedKnowledgeBase(
+        token_id=token_id,
+        faiss_index=faiss_index,
+        fact_mapping=fact_mapping,
+        metta=metta,
+        atom_count=atom_count,
+        version=version,
+        size_bytes=size_bytes,
+        bm25=bm25,
+        entity_linker=entity_linker,
+        existence=existence
+    )
+
+# ============================================================================
+# Knowledge Base Cache
+# ============================================================================
+
+class KnowledgeBaseCache:
+    """
+    LRU cache of LoadedKnowledgeBase objects bounded by measured memory.
+
+    Entries are evicted least-recently-used first once the summed size
+    exceeds the budget; the most recently inserted KB is always kept even
+    if it alone is over budget.
+    """
+
+    def __init__(self, memory_budget_mb: Optional[float] = None):
+        if memory_budget_mb is None:
+            memory_budget_mb = float(os.getenv("KB_CACHE_MEMORY_MB", "1024"))
+        self.memory_budget_bytes = int(memory_budget_mb * 1024 * 1024)
+
+        self._entries: "OrderedDict[str, LoadedKnowledgeBase]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_locks: Dict[str, threading.Lock] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.reloads = 0
+
+    def get(self, token_id: str) -> Optional[LoadedKnowledgeBase]:
+        """Return the cached KB for token_id, or None (counts as hit/miss)"""
+        with self._lock:
+            kb = self._entries.get(token_id)
+            if kb is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(token_id)
+            return kb
+
+    def put(self, kb: LoadedKnowledgeBase) -> None:
+        """Insert or replace a KB and evict down to the memory budget"""
+        with self._lock:
+            self._entries[kb.token_id] = kb
+            self._entries.move_to_end(kb.token_id)
+            self._enforce_budget(keep=kb.token_id)
+
+    def get_or_load(self, token_id: str) -> LoadedKnowledgeBase:
+        """Return the cached KB, loading it once if absent"""
+        kb = self.get(token_id)
+        if kb is not None:
+            return kb
+        return self.load(token_id)
+
+    def load(self, token_id: str) -> LoadedKnowledgeBase:
+        """Load a KB into the cache unless a concurrent caller already did (blocking)"""
+        with self._lock:
+            load_lock = self._load_locks.setdefault(token_id, threading.Lock())
+
+        with load_lock:
+            # Another caller may have loaded it while we waited
+            with self._lock:
+                kb = self._entries.get(token_id)
+            if kb is not None:
+                return kb
+
+            start = time.perf_counter()
+            kb = load_knowledge_base(token_id)
+            logger.info(
+                f"📦 Cached KB for token {token_id} in {(time.perf_counter() - start) * 1000:.0f}ms "
+                f"({kb.size_bytes / 1024 / 1024:.1f} MB)"
+            )
+            self.put(kb)
+            return kb
+
+    def cached_versions(self) -> Dict[str, str]:
+        """Version of every cached KB, without touching LRU order or counters"""
+        with self._lock:
+            return {token_id: kb.version for token_id, kb in self._entries.items()}
+
+    def replace(self, kb: LoadedKnowledgeBase) -> bool:
+        """
+        Atomically swap in a reloaded KB if its token is still cached.
+
+        Queries that already hold the old LoadedKnowledgeBase keep using it
+        until they finish; new queries see the new one.
+        """
+        with self._lock:
+            if kb.token_id not in self._entries:
+                return False
+            self._entries[kb.token_id] = kb
+            self.reloads += 1
+            self._enforce_budget(keep=kb.token_id)
+            return True
+
+    def invalidate(self, token_id: str) -> bool:
+        """Drop a token's KB so the next query reloads it"""
+        with self._lock:
+            return self._entries.pop(token_id, None) is not None
+
+    def _enforce_budget(self, keep: str) -> None:
+        """Evict LRU entries until under budget (caller holds self._lock)"""
+        total = sum(kb.size_bytes for kb in self._entries.values())
+        for token_id in list(self._entries.keys()):
+            if total <= self.memory_budget_bytes:
+                break
+            if token_id == keep:
+                continue
+            kb = self._entries.pop(token_id)
+            total -= kb.size_bytes
+            self.evictions += 1
+            logger.info(f"🧹 Evicted KB for token {token_id} ({kb.size_bytes / 1024 / 1024:.1f} MB)")
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss/eviction counters and per-token sizes"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "reloads": self.reloads,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": {
+                    token_id: {"size_mb": round(kb.size_bytes / 1024 / 1024, 2), "version": kb.version}
+                    for token_id, kb in self._entries.items()
+                },
+                "total_mb": round(sum(kb.size_bytes for kb in self._entries.values()) / 1024 / 1024, 2),
+                "budget_mb": round(self.memory_budget_bytes / 1024 / 1024, 1),
+            }
+
+# ============================================================================
+# Knowledge Base Watcher
+# ============================================================================
+
+ARTIFACT_PATTERN = re.compile(r'^(fact_index|fact_mapping|knowledge_base)_(.+)\.(faiss|json|db)$')
+
+
+def _artifact_tokens(directory: Path) -> set:
+    tokens = set()
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                match = ARTIFACT_PATTERN.match(entry.name)
+                if match:
+                    tokens.add(match.group(2))
+    except FileNotFoundError:
+        pass
+    return tokens
+
+
+def scan_manifest(base_dir: Optional[Path] = None) -> Dict[str, str]:
+    """
+    Map every token with artifacts to its current artifact version.
+
+    Scans base_dir and the root-directory fallback, and versions each token
+    from the paths artifact_paths resolves, so the manifest agrees
+    with the version load_knowledge_base records.
+    """
+    base_dir = KNOWLEDGE_BASES_DIR if base_dir is None else base_dir
+    manifest = {}
+    for token_id in _artifact_tokens(base_dir) | _artifact_tokens(Path(".")):
+        version = artifact_version(artifact_paths(token_id, base_dir))
+        if version:
+            manifest[token_id] = version
+    return manifest
+
+
+class KnowledgeBaseWatcher:
+    """
+    Periodic manifest poller that hot-reloads re-ingested Echos.
+
+    Each poll scans knowledge_bases/ and the root-directory fallback once
+    (off the event loop) instead of stat-ing files per query. A changed or
+    new version is only acted on once it has been seen unchanged on two
+    consecutive polls, so a half-finished
+    ingest that has rewritten some but not all artifacts isn't loaded. Every
+    cached KB whose version differs from the settled manifest is then
+    rebuilt in a worker thread and swapped into the cache atomically; that
+    includes KBs cached before their Echo's first ingest finished.
+    """
+
+    def __init__(self, cache: KnowledgeBaseCache, base_dir: Optional[Path] = None):
+        self.cache = cache
+        self.base_dir = base_dir
+        self.manifest: Dict[str, str] = {}
+        self._pending: Dict[str, str] = {}
+        self._scanned = False
+        self._polling = False
+        self.listeners: List[Callable[[str, str], None]] = []  # called with (token_id, new_version)
+
+    def add_listener(self, callback: Callable[[str, str], None]) -> None:
+        """Register a callback fired after a token's KB changes"""
+        self.listeners.append(callback)
+
+    async def poll(self) -> List[str]:
+        """Scan for changed artifacts and reload affected cached KBs; returns reloaded tokens"""
+        if self._polling:
+            return []  # previous poll still reloading
+        self._polling = True
+
+        loop = asyncio.get_running_loop()
+        reloaded = []
+        try:
+            manifest = await loop.run_in_executor(None, scan_manifest, self.base_dir)
+            previous = self.manifest
+            initial = not self._scanned  # the first scan is the baseline, nothing to settle
+            self._scanned = True
+            settled: Dict[str, str] = {}
+
+            for token_id, version in manifest.items():
+                if initial or previous.get(token_id) == version:
+                    settled[token_id] = version
+                    self._pending.pop(token_id, None)
+                    continue
+
+                if self._pending.get(token_id) != version:
+                    # First sighting of this version: wait one poll for the ingest to settle
+                    self._pending[token_id] = version
+                    if token_id in previous:
+                        settled[token_id] = previous[token_id]
+                    continue
+                self._pending.pop(token_id, None)
+                settled[token_id] = version
+
+                if token_id in previous:
+                    logger.info(f"🔄 Knowledge base for token {token_id} changed")
+                else:
+                    logger.info(f"🆕 Detected knowledge base artifacts for token {token_id}")
+                self._notify(token_id, version)
+
+            self.manifest = settled
+            self._pending = {t: v for t, v in self._pending.items() if t in manifest}
+
+            # Reconcile the cache with the settled manifest, new tokens included: a query
+            # that arrived mid-ingest may have cached an empty or partial KB
+            for token_id, cached_version in self.cache.cached_versions().items():
+                version = settled.get(token_id)
+                if version is None or cached_version == version or token_id in self._pending:
+                    continue  # no settled artifacts yet, already current, or an ingest in progress
+
+                logger.info(f"🔄 Cached knowledge base for token {token_id} is stale, reloading...")
+                try:
+                    kb = await loop.run_in_executor(None, load_knowledge_base, token_id)
+                except Exception as e:
+                    logger.error(f"❌ Hot reload failed for token {token_id}, keeping previous version: {e}")
+                    continue
+
+                if self.cache.replace(kb):
+                    reloaded.append(token_id)
+                    logger.info(f"✅ Hot-swapped knowledge base for token {token_id} (version {kb.version})")
+        finally:
+            self._polling = False
+
+        return reloaded
+
+    def _notify(self, token_id: str, version: str) -> None:
+        for callback in self.listeners:
+            try:
+                callback(token_id, version)
+            except Exception as e:
+                logger.warning(f"KB change listener failed for token {token_id}: {e}")
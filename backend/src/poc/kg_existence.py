@@ -0,0 +1,150 @@
+"""
+EchoLink Knowledge Graph Existence Index
+Per-Echo (subject, relation) and (relation, object) membership, built when a
+knowledge base loads, so MeTTa probes that cannot match are never issued
+"""
+
+import os
+import re
+import math
+import hashlib
+import logging
+from typing import Any, Dict, Iterable, List, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+EXISTENCE_PRUNING_ENABLED = os.getenv("EXISTENCE_PRUNING_ENABLED", "1") == "1"
+# Knowledge graphs with at least this many distinct pairs per side use a bloom filter
+EXISTENCE_BLOOM_MIN_PAIRS = int(os.getenv("EXISTENCE_BLOOM_MIN_PAIRS", "200000"))
+EXISTENCE_BLOOM_FPR = float(os.getenv("EXISTENCE_BLOOM_FPR", "0.01"))
+
+# Atoms as ingest.py writes them: (= (relation subject object))
+ATOM_PATTERN = re.compile(r"^\(=\s*\((\S+)\s+(\S+)\s+(\S+)\)\)$")
+
+# (kind, relation, entity) where kind is the MeTTa predicate: "query" or "query-inverse"
+Probe = Tuple[str, str, str]
+
+
+def metta_symbol(text: str) -> str:
+    """Spell a triple term the way ingest.py wrote it into the atoms"""
+    return str(text).strip().replace(' ', '_').replace('-', '_')
+
+
+def _pair_key(first: str, second: str) -> str:
+    return f"{first}\x1f{second}"
+
+
+class BloomFilter:
+    """
+    Fixed-size bloom filter over strings: no false negatives, false positives
+    at about the configured rate. Positions use double hashing of one
+    128-bit blake2b digest per key.
+    """
+
+    def __init__(self, capacity: int, fpr: float = EXISTENCE_BLOOM_FPR):
+        capacity = max(1, capacity)
+        self.num_bits = max(8, int(math.ceil(-capacity * math.log(fpr) / (math.log(2) ** 2))))
+        self.num_hashes = max(1, int(round(self.num_bits / capacity * math.log(2))))
+        self.bits = np.zeros((self.num_bits + 7) // 8, dtype=np.uint8)
+
+    def _positions(self, keys: List[str]) -> np.ndarray:
+        digests = b"".join(hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest() for key in keys)
+        halves = np.frombuffer(digests, dtype=np.uint64).reshape(-1, 2)
+        steps = np.arange(self.num_hashes, dtype=np.uint64)
+        # uint64 arithmetic wraps, identically for add and lookup
+        return (halves[:, :1] + steps * halves[:, 1:]) % np.uint64(self.num_bits)
+
+    def update(self, keys: List[str]) -> None:
+        if not keys:
+            return
+        positions = self._positions(keys).ravel()
+        np.bitwise_or.at(self.bits, (positions >> np.uint64(3)).astype(np.int64), (1 << (positions & np.uint64(7))).astype(np.uint8))
+
+    def __contains__(self, key: str) -> bool:
+        positions = self._positions([key])[0]
+        return bool(np.all(self.bits[(positions >> np.uint64(3)).astype(np.int64)] & (1 << (positions & np.uint64(7))).astype(np.uint8)))
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.bits.nbytes)
+
+
+class ExistenceIndex:
+    """
+    Which (subject, relation) and (relation, object) pairs occur in an
+    Echo's knowledge graph, keyed by MeTTa symbol.
+
+    A forward probe (query relation subject) can only match if (subject,
+    relation) exists, an inverse probe (query-inverse relation object) only
+    if (relation, object) does. Small graphs keep exact sets; graphs with
+    EXISTENCE_BLOOM_MIN_PAIRS pairs or more keep bloom filters, which may
+    let a doomed probe through but never block one that would match. If any
+    atom can't be parsed the index is incomplete and admits every probe.
+    """
+
+    def __init__(self, subject_pairs, object_pairs, complete: bool = True):
+        self.subject_pairs = subject_pairs
+        self.object_pairs = object_pairs
+        self.complete = complete
+
+    @classmethod
+    def from_atoms(cls, atoms: Iterable[str], bloom_min_pairs: int = EXISTENCE_BLOOM_MIN_PAIRS) -> "ExistenceIndex":
+        subject_keys, object_keys = set(), set()
+        complete = True
+        for atom in atoms:
+            match = ATOM_PATTERN.match(str(atom).strip())
+            if match is None:
+                complete = False
+                continue
+            relation, subject, object_ = match.groups()
+            subject_keys.add(_pair_key(subject, relation))
+            object_keys.add(_pair_key(relation, object_))
+
+        if not complete:
+            logger.warning("⚠️ Some atoms are not (= (relation subject object)); probe pruning disabled for this Echo")
+        if max(len(subject_keys), len(object_keys)) < bloom_min_pairs:
+            return cls(subject_keys, object_keys, complete)
+
+        blooms = []
+        for keys in (subject_keys, object_keys):
+            bloom = BloomFilter(len(keys))
+            bloom.update(list(keys))
+            blooms.append(bloom)
+        return cls(blooms[0], blooms[1], complete)
+
+    @property
+    def exact(self) -> bool:
+        return isinstance(self.subject_pairs, set)
+
+    def admits(self, kind: str, relation: str, entity: str) -> bool:
+        """Whether the probe could return anything"""
+        if not self.complete:
+            return True
+        relation, entity = metta_symbol(relation), metta_symbol(entity)
+        if kind == "query":
+            return _pair_key(entity, relation) in self.subject_pairs
+        if kind == "query-inverse":
+            return _pair_key(relation, entity) in self.object_pairs
+        return True
+
+    def prune(self, probes: List[Probe]) -> Tuple[List[Probe], int]:
+        """(probes that can match, number pruned)"""
+        kept = [probe for probe in probes if self.admits(*probe)]
+        return kept, len(probes) - len(kept)
+
+    @property
+    def nbytes(self) -> int:
+        if self.exact:
+            return sum(len(key) + 64 for key in self.subject_pairs) + sum(len(key) + 64 for key in self.object_pairs)
+        return self.subject_pairs.nbytes + self.object_pairs.nbytes
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "exact": self.exact,
+            "complete": self.complete,
+            "subject_pairs": len(self.subject_pairs) if self.exact else None,
+            "object_pairs": len(self.object_pairs) if self.exact else None,
+            "bytes": self.nbytes,
+        }
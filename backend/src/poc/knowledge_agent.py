@@ -7,11 +7,16 @@ import os
 import json
 import logging
 import time
+import asyncio
 from pathlib import Path
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple, Callable, Awaitable
 from datetime import datetime
 from uuid import uuid4
 
+# Record what each import costs so startup time can be attributed (logged on startup)
+from lazy_imports import install_import_timer, uninstall_import_timer, log_import_report, import_report
+install_import_timer()
+
 # uAgents framework
 from uagents import Agent, Context, Protocol
 
@@ -29,24 +34,39 @@ from uagents_core.contrib.protocols.chat import (
 from models import (
     KnowledgeQueryRequest, 
     KnowledgeQueryResponse,
-    HealthResponse
+    KnowledgeQueryPartial,
+    HealthResponse,
+    MetricsResponse,
+    FactDiscoveryRequest,
+    FactDiscoveryResponse,
+    ReadinessResponse
 )
 
-# Core dependencies
+# Core dependencies (hyperon/faiss are imported lazily by kb_cache on first KB load)
 try:
-    from hyperon import MeTTa
-    from sentence_transformers import SentenceTransformer
-    import faiss
     import numpy as np
     from utils import ASIOneLLM
 except ImportError as e:
     print(f"Warning: Some dependencies not available: {e}")
-    MeTTa = None
-    SentenceTransformer = None
-    faiss = None
     np = None
     ASIOneLLM = None
 
+from model_registry import get_query_encoder, registry as model_registry
+from kb_cache import KnowledgeBaseCache, KnowledgeBaseWatcher, LoadedKnowledgeBase
+from executor import StageExecutor, EventLoopLagMonitor
+from metrics import LatencyHistogram
+from embedding_batcher import EmbeddingBatcher
+from answer_cache import AnswerCache, normalize_question
+from global_index import GlobalFactIndex
+from echo_router import EchoRouter
+from warmup import Warmup, QueryFrequency, preload_candidates
+from context_packer import ContextPacker
+from extractive import ExtractiveAnswerer
+from singleflight import SingleFlight
+from query_planner import QueryPlanner, Probe, execute_probes
+from bm25_index import search_facts
+from probe_memo import ProbeMemo
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -54,6 +74,9 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Minimum gap between streamed partial answers sent to the orchestrator
+STREAM_PARTIAL_INTERVAL_MS = float(os.getenv("STREAM_PARTIAL_INTERVAL_MS", "250"))
+
 # ============================================================================
 # Chat Protocol Helper Functions
 # ============================================================================
@@ -79,17 +102,34 @@ class IntelligentQueryEngine:
     def __init__(self):
         self.initialized = False
         self.llm = None
-        self.metta = None
         self.vectorizer = None
-        self.faiss_index = None
-        self.fact_mapping = {}
-        self.knowledge_base_path = None
+        self.embedder = None
+        self.global_index = GlobalFactIndex()
+        self.echo_router = EchoRouter()
+        self.kb_cache = KnowledgeBaseCache()
+        self.kb_watcher = KnowledgeBaseWatcher(self.kb_cache)
+        self.answer_cache = AnswerCache()
+        self.kb_watcher.add_listener(lambda token_id, version: self.answer_cache.invalidate_token(token_id, version))
+        self.probe_memo = ProbeMemo()
+        self.kb_watcher.add_listener(lambda token_id, version: self.probe_memo.invalidate_token(token_id, version))
+        self.executor = StageExecutor()
+        self.query_frequency = QueryFrequency().load()
+        self.llm_first_token = LatencyHistogram()
+        self.context_packer = ContextPacker()
+        self.extractive = ExtractiveAnswerer()
+        self.llm_synthesis_latency = LatencyHistogram()
+        self.singleflight = SingleFlight()
+        self.planner = QueryPlanner()
+        self._init_lock = asyncio.Lock()
         
     async def initialize(self):
-        """Initialize the query engine components"""
-        if self.initialized:
-            return
-            
+        """Initialize the query engine components (safe to call concurrently)"""
+        async with self._init_lock:
+            if self.initialized:
+                return
+            await self._initialize()
+    
+    async def _initialize(self):
         try:
             logger.info("🧠 Initializing Knowledge Agent components...")
             
@@ -97,21 +137,17 @@ class IntelligentQueryEngine:
             self.llm = ASIOneLLM(api_key="")
             logger.info("✅ LLM initialized")
             
-            # Initialize MeTTa
-            self.metta = MeTTa()
-            logger.info("✅ MeTTa initialized")
-            
-            # Initialize sentence transformer
-            self.vectorizer = SentenceTransformer('all-MiniLM-L6-v2')
+            # Initialize query encoder (off the loop so /health stays responsive)
+            self.vectorizer = await self.executor.run("load", get_query_encoder)
+            self.embedder = EmbeddingBatcher(self.vectorizer.encode, executor=self.executor)
             logger.info("✅ Vectorizer initialized")
             
-            # Find the most recent knowledge base
-            self.knowledge_base_path = self._find_latest_knowledge_base()
-            if self.knowledge_base_path:
-                await self._load_knowledge_base()
-                logger.info("✅ Knowledge base loaded")
-            else:
-                logger.warning("⚠️ No knowledge base found")
+            # Cross-Echo fact index for discovery; per-token KBs load on demand
+            await self.executor.run("load", self.global_index.load)
+            logger.info("✅ Global fact index loaded")
+            
+            self.echo_router.load()
+            logger.info("✅ Echo router loaded")
             
             self.initialized = True
             logger.info("🎉 Knowledge Agent fully initialized")
@@ -120,18 +156,6 @@ class IntelligentQueryEngine:
             logger.error(f"❌ Failed to initialize Knowledge Agent: {e}")
             raise
     
-    def _find_latest_knowledge_base(self) -> Optional[Path]:
-        """Find the most recent knowledge base directory"""
-        base_path = Path("knowledge_bases")  # Check in knowledge_bases directory
-        knowledge_dirs = list(base_path.glob("knowledge_base_*.db"))
-        
-        if not knowledge_dirs:
-            return None
-            
-        # Sort by modification time and return the most recent
-        latest = max(knowledge_dirs, key=lambda p: p.stat().st_mtime)
-        return latest.parent
-    
     def extract_token_id(self, text: str) -> Optional[str]:
         """Extract token ID from text using various patterns"""
         import re
@@ -153,149 +177,90 @@ class IntelligentQueryEngine:
         
         return None
     
-    async def _load_knowledge_base(self):
-        """Load the FAISS index and fact mapping"""
-        try:
-            # Load FAISS index from knowledge_bases directory
-            knowledge_bases_path = Path("knowledge_bases")
-            faiss_files = list(knowledge_bases_path.glob("fact_index_*.faiss"))
-            if faiss_files:
-                latest_faiss = max(faiss_files, key=lambda p: p.stat().st_mtime)
-                self.faiss_index = faiss.read_index(str(latest_faiss))
-                logger.info(f"📚 Loaded FAISS index: {latest_faiss.name}")
-            
-            # Load fact mapping from knowledge_bases directory
-            mapping_files = list(knowledge_bases_path.glob("fact_mapping_*.json"))
-            if mapping_files:
-                latest_mapping = max(mapping_files, key=lambda p: p.stat().st_mtime)
-                with open(latest_mapping, 'r') as f:
-                    self.fact_mapping = json.load(f)
-                logger.info(f"🗂️ Loaded fact mapping: {latest_mapping.name}")
-                
-        except Exception as e:
-            logger.error(f"❌ Failed to load knowledge base: {e}")
-            self.faiss_index = None
-            self.fact_mapping = {}
+    async def _load_specific_knowledge_base(self, token_id: str) -> LoadedKnowledgeBase:
+        """Return the knowledge base for a given token_id, loading it into the cache on first use"""
+        kb = self.kb_cache.get(token_id)
+        if kb is not None:
+            return kb
+        
+        # Cold load reads files and rebuilds the MeTTa space; keep it off the event loop
+        return await self.executor.run("load", self.kb_cache.load, token_id)
     
-    async def _load_specific_knowledge_base(self, token_id: str):
-        """Load the specific knowledge base for a given token_id"""
-        try:
-            knowledge_bases_path = Path("knowledge_bases")
-            
-            # Try to load from knowledge_bases first
-            faiss_file = knowledge_bases_path / f"fact_index_{token_id}.faiss"
-            mapping_file = knowledge_bases_path / f"fact_mapping_{token_id}.json"
-            knowledge_file = knowledge_bases_path / f"knowledge_base_{token_id}.db"
-            
-            # If not in knowledge_bases, try root directory
-            if not faiss_file.exists():
-                faiss_file = Path(f"fact_index_{token_id}.faiss")
-                mapping_file = Path(f"fact_mapping_{token_id}.json")
-                knowledge_file = Path(f"knowledge_base_{token_id}.db")
-            
-            # Load FAISS index
-            if faiss_file.exists():
-                self.faiss_index = faiss.read_index(str(faiss_file))
-                logger.info(f"📚 Loaded FAISS index for token {token_id}: {faiss_file.name}")
-            else:
-                logger.warning(f"⚠️ No FAISS index found for token {token_id}")
-                self.faiss_index = None
-            
-            # Load fact mapping
-            if mapping_file.exists():
-                with open(mapping_file, 'r') as f:
-                    self.fact_mapping = json.load(f)
-                logger.info(f"🗂️ Loaded fact mapping for token {token_id}: {mapping_file.name}")
-            else:
-                logger.warning(f"⚠️ No fact mapping found for token {token_id}")
-                self.fact_mapping = {}
-            
-            # Load MeTTa knowledge graph and add query predicates
-            if knowledge_file.exists():
-                with open(knowledge_file, 'r') as f:
-                    knowledge_data = json.load(f)
-                    atoms = knowledge_data.get('atoms', [])
-                    
-                    # Create fresh MeTTa interpreter for this token
-                    self.metta = MeTTa()
-                    
-                    # Add all atoms
-                    for atom in atoms:
-                        try:
-                            self.metta.run(f'!(add-atom &self {atom})')
-                        except Exception as e:
-                            logger.warning(f"Failed to add atom '{atom}': {e}")
-                    
-                    # Add query predicates (same as ingest.py)
-                    self.metta.run("""
-                    !(add-atom &self
-                        (= (query $relation $subject)
-                            (match &self
-                            ($relation $subject $object)
-                            $object)))
-                    """)
-                    
-                    self.metta.run("""
-                    !(add-atom &self
-                        (= (query-inverse $relation $object)
-                            (match &self
-                            ($relation $subject $object)
-                            $subject)))
-                    """)
-                    
-                    logger.info(f"🧠 Loaded {len(atoms)} MeTTa atoms with query predicates")
-            else:
-                logger.warning(f"⚠️ No MeTTa knowledge graph found for token {token_id}")
-                
-        except Exception as e:
-            logger.error(f"❌ Failed to load knowledge base for token {token_id}: {e}")
-            self.faiss_index = None
-            self.fact_mapping = {}
+    async def preload_knowledge_base(self, token_id: str) -> LoadedKnowledgeBase:
+        """Load a knowledge base ahead of its first query (used by warmup)"""
+        return await self._load_specific_knowledge_base(token_id)
+    
+    async def discover_facts(self, query: str, top_k: int = 10, token_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Top-k facts across every Echo (or one token) from the global fact index"""
+        query_vector = await self.embedder.encode(query)
+        return await self.executor.run("search", self.global_index.search, query_vector, top_k, token_id)
     
-    async def process_query(self, query: str, token_id: str) -> Dict[str, Any]:
-        """Process a knowledge query using MeTTa reasoning and vector search"""
+    async def process_query(
+        self,
+        query: str,
+        token_id: Optional[str],
+        on_partial: Optional[Callable[[str], Awaitable[None]]] = None
+    ) -> Dict[str, Any]:
+        """
+        Process a knowledge query using MeTTa reasoning and vector search.
+        
+        Queries without a token (None or the orchestrator's "default") are routed
+        to the best-matching Echo via the centroid router. If on_partial is given,
+        the LLM answer is streamed and on_partial receives the text so far.
+        """
         start_time = time.time()
         
         try:
             if not self.initialized:
                 await self.initialize()
             
-            # Load the specific knowledge base for this token_id
-            await self._load_specific_knowledge_base(token_id)
+            query_vector = None
+            if not token_id or token_id == "default":
+                query_vector = (await self.embedder.encode(query))[np.newaxis, :]
+                routes = self.echo_router.route(query_vector)
+                if not routes:
+                    return {
+                        "success": False,
+                        "answer": "I couldn't find an Echo that covers this question. Please include a token ID: [token:YOUR_TOKEN_ID]",
+                        "token_id": token_id,
+                        "error": "No matching Echo",
+                        "processing_time_ms": (time.time() - start_time) * 1000
+                    }
+                token_id = routes[0][0]
+                logger.info(f"🧭 Routed token-less query to {token_id} (candidates: {', '.join(f'{t}={s:.2f}' for t, s in routes)})")
+            
+            # Load the specific knowledge base for this token_id (cached across queries)
+            kb = await self._load_specific_knowledge_base(token_id)
+            self.query_frequency.record(token_id)
+            cache_stats = self.kb_cache.stats()
+            logger.info(f"📦 KB cache: hits={cache_stats['hits']} misses={cache_stats['misses']} evictions={cache_stats['evictions']} ({cache_stats['total_mb']}/{cache_stats['budget_mb']} MB)")
             
             logger.info(f"🔍 Processing query for token {token_id}: {query}")
             
-            # Step 1: Vector similarity search
-            search_results = await self._vector_search(query)
-            relevant_facts = search_results["facts"]
-            relevant_triples = search_results["triples"]
-            logger.info(f"📊 Found {len(relevant_facts)} relevant facts and {len(relevant_triples)} triples")
-            
-            # Early return if no relevant facts found
-            if not relevant_facts:
+            # Answer cache, exact tier
+            cached_answer = self.answer_cache.get_exact(token_id, kb.version, query)
+            if cached_answer is not None:
+                logger.info("💡 Exact answer cache hit")
                 return {
                     "success": True,
-                    "answer": "I couldn't find relevant information for your query in the knowledge base.",
+                    "answer": cached_answer,
                     "token_id": token_id,
                     "processing_time_ms": (time.time() - start_time) * 1000
                 }
             
-            # Step 2: MeTTa reasoning with triples
-            reasoning_result = await self._metta_reasoning(query, relevant_facts, relevant_triples)
-            logger.info(f"🧠 MeTTa reasoning completed")
-            
-            # Step 3: LLM synthesis
-            final_answer = await self._llm_synthesis(query, relevant_facts, reasoning_result)
-            logger.info(f"✨ LLM synthesis completed")
-            
-            processing_time = (time.time() - start_time) * 1000
+            # Identical concurrent queries (same Echo, KB version and normalized
+            # question) share one pipeline run. Only KnowledgeQueryRequest callers
+            # listen for partials (chat callers don't), so synthesis streams if any
+            # listener is attached when the LLM call starts: a KnowledgeQueryRequest
+            # that joins a flight a chat message started still gets partials
+            flight_key = (token_id, kb.version, normalize_question(query))
+            result = await self.singleflight.do(
+                flight_key,
+                lambda publish: self._answer_query(query, token_id, kb, query_vector, publish),
+                listener=on_partial
+            )
             
-            return {
-                "success": True,
-                "answer": final_answer,
-                "token_id": token_id,
-                "processing_time_ms": processing_time
-            }
+            return {**result, "processing_time_ms": (time.time() - start_time) * 1000}
             
         except Exception as e:
             logger.error(f"❌ Query processing failed: {e}")
@@ -307,183 +272,216 @@ class IntelligentQueryEngine:
                 "processing_time_ms": (time.time() - start_time) * 1000
             }
     
-    async def _vector_search(self, query: str, top_k: int = 5):
-        """Perform vector similarity search, return facts and triples"""
-        if not self.faiss_index or not self.fact_mapping:
-            return {"facts": [], "triples": []}
+    async def _answer_query(
+        self,
+        query: str,
+        token_id: str,
+        kb: LoadedKnowledgeBase,
+        query_vector: Optional[np.ndarray],
+        on_partial: Optional[Callable[[str], Awaitable[None]]]
+    ) -> Dict[str, Any]:
+        """Semantic cache, retrieval, reasoning and answer synthesis for one (coalesced) query"""
+        # Encode query (micro-batched with concurrent queries)
+        if query_vector is None:
+            query_vector = (await self.embedder.encode(query))[np.newaxis, :]
+
+        # Answer cache, semantic tier
+        cached_answer = self.answer_cache.get_semantic(token_id, kb.version, query_vector)
+        if cached_answer is not None:
+            return {
+                "success": True,
+                "answer": cached_answer,
+                "token_id": token_id
+            }
+
+        # Plan the pipeline for this question (fixed pipeline if the planner is off)
+        plan = self.planner.plan(query)
         
+        # Step 1: Vector similarity search, keeping an adaptive top-k
+        search_start = time.perf_counter()
+        search_results = await self._vector_search(query, query_vector, kb, top_k=plan.search_k)
+        self.planner.record_stage("search", (time.perf_counter() - search_start) * 1000)
+        search_results = self.planner.select_facts(plan, search_results)
+        relevant_facts = search_results["facts"]
+        relevant_triples = search_results["triples"]
+        logger.info(f"📊 Found {len(relevant_facts)} relevant facts and {len(relevant_triples)} triples")
+
+        # Entities the question names exactly go to reasoning even if retrieval missed them
+        linked = kb.entity_linker.link(query) if kb.entity_linker is not None else []
+        if linked:
+            logger.info(f"🔗 Linked entities: {', '.join(e.term for e in linked)}")
+
+        # Early return if nothing relevant was found
+        if not relevant_facts and not linked:
+            return {
+                "success": True,
+                "answer": "I couldn't find relevant information for your query in the knowledge base.",
+                "token_id": token_id
+            }
+
+        # Step 2: MeTTa reasoning with the planned probes
+        self.planner.plan_probes(plan, query, relevant_triples, linked, kb.existence)
+        logger.info(f"🗺️ Plan: {plan.describe()}")
+        metta_start = time.perf_counter()
+        reasoning_result, probe_outcomes = await self._metta_reasoning(plan.probes, kb)
+        self.planner.record_stage("metta_probe", (time.perf_counter() - metta_start) * 1000, len(plan.probes))
+        self.planner.record_probes(plan, probe_outcomes)
+        probe_hits = sum(hits for _, hits in probe_outcomes.values())
+        logger.info(f"🧠 MeTTa reasoning completed: {len(plan.probes)} probes issued, {probe_hits} hits, {plan.pruned_probes} pruned")
+
+        # Linked entities alone, with no MeTTa hits either, leave nothing to answer from
+        if not relevant_facts and not self._parse_metta_results(reasoning_result):
+            return {
+                "success": True,
+                "answer": "I couldn't find relevant information for your query in the knowledge base.",
+                "token_id": token_id
+            }
+
+        # Step 3: Extractive answer for confident lookups, otherwise LLM synthesis
+        extractive = None
+        if plan.try_extractive:
+            extractive_start = time.perf_counter()
+            extractive = self.extractive.answer(
+                query,
+                search_results["scores"],
+                relevant_triples,
+                self._parse_metta_results(reasoning_result)
+            )
+            self.planner.record_stage("extractive", (time.perf_counter() - extractive_start) * 1000)
+        if extractive is not None:
+            final_answer, synthesized = extractive.answer, True
+            logger.info(f"⚡ Extractive {extractive.question_type} answer from {extractive.source} (confidence {extractive.confidence:.2f}); LLM skipped")
+        else:
+            synthesis_start = time.perf_counter()
+            final_answer, synthesized = await self._llm_synthesis(query, search_results, reasoning_result, on_partial)
+            if synthesized:
+                synthesis_ms = (time.perf_counter() - synthesis_start) * 1000
+                self.llm_synthesis_latency.observe(synthesis_ms)
+                self.planner.record_stage("llm", synthesis_ms)
+            logger.info(f"✨ LLM synthesis completed")
+
+        if synthesized:
+            self.answer_cache.put(token_id, kb.version, query, final_answer, query_vector)
+
+        return {
+            "success": True,
+            "answer": final_answer,
+            "token_id": token_id
+        }
+    
+    async def _vector_search(self, query: str, query_vector, kb: LoadedKnowledgeBase, top_k: int = 5):
+        """Hybrid (vector + BM25) search for an encoded query, return facts, triples and scores"""
         try:
-            # Encode query
-            query_vector = self.vectorizer.encode([query])
-            
-            # Search FAISS index
-            scores, indices = self.faiss_index.search(query_vector, top_k)
-            logger.info(f"🔍 Vector search results: {len(scores[0])} candidates")
-            
-            # Retrieve relevant facts and triples
-            relevant_facts = []
-            relevant_triples = []
-            
-            for i, (score, idx) in enumerate(zip(scores[0], indices[0])):
-                logger.info(f"  {i+1}. Score: {score:.3f}, Index: {idx}")
-                if score > 0.2:  # Threshold for relevance
-                    if 'facts' in self.fact_mapping and idx < len(self.fact_mapping['facts']):
-                        fact = self.fact_mapping['facts'][idx]
-                        relevant_facts.append(fact)
-                        
-                        # Also get the corresponding triple
-                        if 'triples' in self.fact_mapping and idx < len(self.fact_mapping['triples']):
-                            triple = self.fact_mapping['triples'][idx]
-                            relevant_triples.append(triple)
-                        
-                        logger.info(f"    ✅ Added fact: {fact[:100]}...")
-                    else:
-                        logger.warning(f"    ❌ Index {idx} out of bounds or no facts array")
-                else:
-                    logger.info(f"    ⚠️ Score {score:.3f} below threshold 0.3")
-            
-            return {"facts": relevant_facts, "triples": relevant_triples}
-            
+            return await self.executor.run("search", search_facts, kb, query, query_vector, top_k)
         except Exception as e:
             logger.error(f"❌ Vector search failed: {e}")
-            return {"facts": [], "triples": []}
+            return {"facts": [], "triples": [], "scores": []}
+    
+    async def _metta_reasoning(self, probes: List[Probe], kb: LoadedKnowledgeBase) -> Tuple[str, Dict[str, List[int]]]:
+        """Perform MeTTa reasoning in the stage pool"""
+        return await self.executor.run("metta", self._metta_reasoning_locked, probes, kb)
     
-    async def _metta_reasoning(self, query: str, facts: List[str], triples: List[Dict]) -> str:
-        """Perform MeTTa reasoning using query predicates on loaded atoms"""
+    def _metta_reasoning_locked(self, probes: List[Probe], kb: LoadedKnowledgeBase) -> Tuple[str, Dict[str, List[int]]]:
+        """A MeTTa space isn't safe for concurrent runs, so probes are serialized per KB"""
+        with kb.metta_lock:
+            return self._metta_reasoning_sync(probes, kb)
+    
+    def _metta_reasoning_sync(self, probes: List[Probe], kb: LoadedKnowledgeBase) -> Tuple[str, Dict[str, List[int]]]:
+        """
+        Run the planned query/query-inverse probes on the loaded atoms.
+        
+        Returns:
+            (reasoning, outcomes): reasoning is the JSON results (or a message),
+            outcomes maps probe kind -> [issued, hits] for the planner
+        """
         try:
-            if not self.metta:
-                return "MeTTa reasoning not available"
-            
-            # Extract entities and relations from triples
-            entities = set()
-            relations = set()
-            
-            for triple in triples:
-                entities.add(triple.get('subject', ''))
-                relations.add(triple.get('relation', ''))
-            
-            logger.info(f"📊 Found {len(entities)} entities and {len(relations)} relations for MeTTa queries")
+            if not kb.metta:
+                return "MeTTa reasoning not available", {}
             
-            # Generate dynamic MeTTa queries
-            metta_results = []
-            
-            # Query top entities with their relations
-            for entity in list(entities)[:5]:  # Top 5 entities
-                for relation in list(relations)[:3]:  # Top 3 relations per entity
-                    query_str = f"!(query {relation} {entity})"
-                    try:
-                        result = self.metta.run(query_str)
-                        if result and len(result) > 0:
-                            if isinstance(result[0], list) and len(result[0]) > 0:
-                                answer = str(result[0][0])
-                            else:
-                                answer = str(result[0])
-                            
-                            if answer and answer != '[]' and 'Empty' not in answer:
-                                metta_results.append({
-                                    'entity': entity,
-                                    'relation': relation,
-                                    'value': answer.replace('[', '').replace(']', '').strip()
-                                })
-                                logger.info(f"✅ MeTTa query found: {relation}({entity}) = {answer}")
-                    except Exception as e:
-                        logger.warning(f"MeTTa query '{query_str}' failed: {e}")
-                        continue
-            
-            # Add inverse queries for "who/what" questions
-            if 'who' in query.lower() or 'what' in query.lower() or 'which' in query.lower():
-                for relation in list(relations)[:3]:
-                    for entity in list(entities)[:2]:
-                        inverse_query = f"!(query-inverse {relation} {entity})"
-                        try:
-                            result = self.metta.run(inverse_query)
-                            if result and len(result) > 0:
-                                if isinstance(result[0], list) and len(result[0]) > 0:
-                                    answer = str(result[0][0])
-                                else:
-                                    answer = str(result[0])
-                                
-                                if answer and answer != '[]' and 'Empty' not in answer:
-                                    metta_results.append({
-                                        'relation': relation,
-                                        'object': entity,
-                                        'subject': answer.replace('[', '').replace(']', '').strip()
-                                    })
-                                    logger.info(f"✅ MeTTa inverse query found: {relation}^-1({entity}) = {answer}")
-                        except Exception as e:
-                            logger.warning(f"MeTTa inverse query '{inverse_query}' failed: {e}")
-                            continue
+            metta_results, outcomes = execute_probes(kb.metta, probes, self.probe_memo, (kb.token_id, kb.version))
             
             if metta_results:
-                logger.info(f"🎯 MeTTa reasoning found {len(metta_results)} structured answers")
+                logger.info(f"🎯 MeTTa reasoning found {len(metta_results)} structured answers from {len(probes)} probes")
                 return json.dumps({
                     'reasoning_type': 'MeTTa query results',
                     'results': metta_results,
                     'count': len(metta_results)
-                })
+                }), outcomes
             else:
-                logger.info("⚠️ No MeTTa reasoning matches found")
-                return "No MeTTa reasoning matches found"
+                logger.info(f"⚠️ No MeTTa reasoning matches found ({len(probes)} probes)")
+                return "No MeTTa reasoning matches found", outcomes
                 
         except Exception as e:
             logger.error(f"❌ MeTTa reasoning failed: {e}")
-            return f"MeTTa reasoning error: {str(e)}"
+            return f"MeTTa reasoning error: {str(e)}", {}
     
-    async def _llm_synthesis(self, query: str, facts: List[str], reasoning: str) -> str:
-        """Synthesize final answer using LLM with advanced prompt engineering"""
+    @staticmethod
+    def _parse_metta_results(reasoning: str) -> Optional[List[Dict]]:
+        """Structured MeTTa hits from _metta_reasoning's JSON, None if it returned a message"""
+        try:
+            metta_data = json.loads(reasoning) if reasoning and reasoning.startswith('{') else None
+            return metta_data.get('results', []) if metta_data and 'results' in metta_data else None
+        except:
+            return None
+    
+    async def _stream_completion(self, prompt: str, on_partial: Callable[[str], Awaitable[None]]) -> str:
+        """Consume the LLM stream, forwarding the text so far at most every STREAM_PARTIAL_INTERVAL_MS"""
+        started = time.perf_counter()
+        parts: List[str] = []
+        last_sent = 0.0
+        
+        async for delta in self.llm.generate_stream(prompt):
+            if not parts:
+                self.llm_first_token.observe((time.perf_counter() - started) * 1000)
+            parts.append(delta)
+            
+            now = time.perf_counter()
+            if now - last_sent >= STREAM_PARTIAL_INTERVAL_MS / 1000:
+                last_sent = now
+                try:
+                    await on_partial(''.join(parts).lstrip())
+                except Exception as e:
+                    # A lost partial only delays what the user sees; keep generating
+                    logger.warning(f"⚠️ Failed to forward partial answer: {e}")
+        
+        return ''.join(parts)
+    
+    async def _llm_synthesis(
+        self,
+        query: str,
+        search_results: Dict[str, List],
+        reasoning: str,
+        on_partial: Optional[Callable[[str], Awaitable[None]]] = None
+    ) -> Tuple[str, bool]:
+        """
+        Synthesize final answer using LLM with advanced prompt engineering.
+        
+        Returns:
+            (answer, synthesized) where synthesized is False for fallback/error text
+        """
         try:
             if not self.llm:
-                return "LLM not available for synthesis"
-            
-            # Parse MeTTa reasoning results if available
-            try:
-                metta_data = json.loads(reasoning) if reasoning and reasoning.startswith('{') else None
-                metta_results = metta_data.get('results', []) if metta_data and 'results' in metta_data else None
-            except:
-                metta_results = None
-            
-            # Create optimized prompt
-            prompt = f"""You are an intelligent knowledge assistant for EchoLink, a decentralized knowledge marketplace powered by AI.
-
-## USER QUERY
-{query}
-
-## CONTEXT ANALYSIS
-
-### Semantic Search Results (Top 5 Most Relevant Facts):
-{chr(10).join([f"{i+1}. {fact}" for i, fact in enumerate(facts[:5])])}
-
-### MeTTa Knowledge Graph Query Results:
-{chr(10).join([f"- {result.get('relation', 'Unknown')}: {result.get('entity', 'Unknown')} → {result.get('value', result.get('subject', 'Unknown'))}" for result in metta_results[:10]]) if metta_results else "No structured knowledge graph results available"}
-
-## CRITICAL INSTRUCTIONS
-**YOU MUST ONLY USE INFORMATION FROM THE CONTEXT ABOVE. DO NOT ADD ANY GENERAL KNOWLEDGE OR ASSUMPTIONS.**
-
-## TASK
-Synthesize a comprehensive, accurate, and conversational answer by:
-
-1. **Direct Answer First**: Lead with the most direct answer EXTRACTED from the facts above
-2. **Strict Evidence-Based**: 
-   - **ONLY** use information that appears in the semantic search results or MeTTa knowledge graph results
-   - **NEVER** add general domain knowledge or common sense reasoning
-   - **NEVER** say "based on the context" or "from the search results" - just state facts directly
-   - **NEVER** make assumptions about what typical optoelectronic devices are - only use what's explicitly in the facts
-3. **Citation Format**: 
-   - When referring to specific information, reference it naturally (e.g., "The material has X property")
-   - DO NOT say "According to research" or "Studies suggest" - just state the facts
-4. **Natural Conversation**: 
-   - Use clear, engaging language
-   - Structure your answer logically (main answer → supporting details)
-   - Be concise but thorough
-5. **Uncertainty Handling**: 
-   - If information is incomplete in the provided facts, simply say "Based on the available information: [state only what's in the facts]"
-   - DO NOT fill gaps with general knowledge
-
-## ANSWER:
-"""
+                return "LLM not available for synthesis", False
+            
+            metta_results = self._parse_metta_results(reasoning)
+            
+            # Dedup, rank and fit the context behind the static instruction prefix.
+            # Hybrid results rank by fused score: cosine would undo RRF and drop lexical hits first
+            packed = self.context_packer.pack(
+                query,
+                search_results["facts"],
+                search_results.get("fused_scores", search_results.get("scores")),
+                search_results.get("triples"),
+                metta_results
+            )
+            prompt = packed.prompt
+            logger.info(f"🧾 Prompt: {packed.summary()}")
             
-            # Get LLM response
-            response = await self.llm.generate(prompt)
+            # Get LLM response (streamed when someone wants partial answers)
+            if on_partial is not None and getattr(on_partial, "has_listeners", True):
+                response = await self._stream_completion(prompt, on_partial)
+            else:
+                response = await self.llm.generate(prompt)
             
             # Post-process the response
             if response:
@@ -494,19 +492,36 @@ Synthesize a comprehensive, accurate, and conversational answer by:
                     if clean_response.startswith(prefix):
                         clean_response = clean_response[len(prefix):].strip()
                 
-                return clean_response if clean_response else "I couldn't find sufficient information to answer that question."
+                if clean_response:
+                    return clean_response, True
+                return "I couldn't find sufficient information to answer that question.", False
             
-            return "I couldn't generate a response based on the available information."
+            return "I couldn't generate a response based on the available information.", False
             
             
         except Exception as e:
             logger.error(f"❌ LLM synthesis failed: {e}")
-            return f"Error generating response: {str(e)}"
+            return f"Error generating response: {str(e)}", False
 
 # ============================================================================
 # Knowledge Agent Protocol
 # ============================================================================
 
+# Process-wide query engine (handler contexts are per-message, so state can't live on ctx)
+query_engine = IntelligentQueryEngine()
+
+# Samples event loop lag so blocking work on the loop shows up in /metrics
+loop_lag_monitor = EventLoopLagMonitor()
+
+# Background model load + popular-Echo preload; /ready reports its state
+warmup = Warmup()
+
+# Track startup time for uptime calculation
+startup_time = time.time()
+
+# Seconds between knowledge_bases/ manifest polls for re-ingested Echos
+KB_WATCH_INTERVAL = float(os.getenv("KB_WATCH_INTERVAL", "5"))
+
 knowledge_protocol = Protocol("KnowledgeProcessing")
 
 @knowledge_protocol.on_message(model=KnowledgeQueryRequest)
@@ -518,12 +533,27 @@ async def handle_knowledge_query(ctx: Context, sender: str, msg: KnowledgeQueryR
     
     try:
         # Initialize query engine if not already done
-        if not hasattr(ctx, 'query_engine'):
-            ctx.query_engine = IntelligentQueryEngine()
-            await ctx.query_engine.initialize()
+        if not query_engine.initialized:
+            await query_engine.initialize()
+        
+        # Stream partial answer text back so the orchestrator can show it while generating
+        sequence = 0
+        
+        async def send_partial(text: str):
+            nonlocal sequence
+            sequence += 1
+            await ctx.send(
+                sender,
+                KnowledgeQueryPartial(
+                    query_id=msg.query_id,
+                    token_id=msg.token_id,
+                    partial_answer=text,
+                    sequence=sequence
+                )
+            )
         
         # Process the query
-        result = await ctx.query_engine.process_query(msg.query, msg.token_id)
+        result = await query_engine.process_query(msg.query, msg.token_id, on_partial=send_partial)
         
         # Send response back to sender
         await ctx.send(
@@ -532,7 +562,7 @@ async def handle_knowledge_query(ctx: Context, sender: str, msg: KnowledgeQueryR
                 success=result["success"],
                 answer=result["answer"],
                 query_id=msg.query_id,
-                token_id=msg.token_id,
+                token_id=result.get("token_id") or msg.token_id,
                 processing_time_ms=result.get("processing_time_ms"),
                 error=result.get("error")
             )
@@ -562,11 +592,11 @@ async def handle_health_check(ctx: Context, sender: str, msg: HealthResponse):
     await ctx.send(
         sender,
         HealthResponse(
-            status="healthy",
+            status="healthy" if warmup.ready else warmup.state,
             agent_name="EchoLink Knowledge Agent",
             agent_address=knowledge_agent.address,
             timestamp=int(time.time()),
-            uptime_seconds=time.time() - ctx.start_time
+            uptime_seconds=time.time() - startup_time
         )
     )
 
@@ -616,10 +646,12 @@ async def handle_chat_message(ctx: Context, sender: str, msg: ChatMessage):
 
 I specialize in MeTTa reasoning and vector database lookup for knowledge queries.
 
-To ask a question, include a token ID:
+To ask a specific Echo, include a token ID:
 - Format: [token:YOUR_TOKEN_ID] Your question
 - Example: [token:test_007] What is the capital of France?
 
+Without a token ID, I'll route your question to the Echo that knows most about it.
+
 How can I help you with your knowledge query?"""
             await ctx.send(sender, create_text_chat(welcome_msg))
             continue
@@ -629,23 +661,20 @@ How can I help you with your knowledge query?"""
             
             try:
                 # Initialize query engine if not already done
-                if not hasattr(ctx, 'query_engine'):
-                    ctx.query_engine = IntelligentQueryEngine()
-                    await ctx.query_engine.initialize()
-                
-                # Extract token ID from message
-                token_id = ctx.query_engine.extract_token_id(item.text)
+                if not query_engine.initialized:
+                    await query_engine.initialize()
                 
-                if not token_id:
-                    response = "Please include a token ID in your message.\n\nFormat: [token:YOUR_TOKEN_ID] Your question"
-                    await ctx.send(sender, create_text_chat(response))
-                    continue
+                # Extract token ID from message (None routes to the best-matching Echo)
+                token_id = query_engine.extract_token_id(item.text)
                 
                 # Process the query using existing functionality
-                result = await ctx.query_engine.process_query(item.text, token_id)
+                result = await query_engine.process_query(item.text, token_id)
                 
                 if result["success"]:
-                    response_text = f"Token: {token_id}\n\n{result['answer']}"
+                    routed = "" if token_id else " (auto-routed)"
+                    response_text = f"Token: {result['token_id']}{routed}\n\n{result['answer']}"
+                elif not token_id:
+                    response_text = result["answer"]
                 else:
                     response_text = f"Error processing query: {result.get('error', 'Unknown error')}"
                 
@@ -671,8 +700,6 @@ knowledge_agent.include(chat_proto, publish_manifest=True)
 @knowledge_agent.on_event("startup")
 async def startup(ctx: Context):
     """Initialize the knowledge agent"""
-    ctx.start_time = time.time()
-    
     ctx.logger.info("=" * 60)
     ctx.logger.info("🧠 EchoLink Knowledge Agent Starting Up")
     ctx.logger.info("=" * 60)
@@ -683,6 +710,92 @@ async def startup(ctx: Context):
     ctx.logger.info("  ✅ LLM synthesis")
     ctx.logger.info("  ✅ Knowledge base management")
     ctx.logger.info("=" * 60)
+    
+    loop_lag_monitor.start()
+    log_import_report("Knowledge Agent")
+    uninstall_import_timer()  # report startup only; later imports skip the wrapper
+    
+    # Warm up in the background so the agent is reachable (and /ready polls work) meanwhile
+    warmup.start(query_engine, preload_candidates(query_engine.query_frequency))
+
+@knowledge_agent.on_rest_get("/health", HealthResponse)
+async def handle_rest_health(ctx: Context) -> HealthResponse:
+    """Liveness endpoint; status is "healthy" once warmup has finished"""
+    return HealthResponse(
+        status="healthy" if warmup.ready else warmup.state,
+        agent_name="EchoLink Knowledge Agent",
+        agent_address=knowledge_agent.address,
+        timestamp=int(time.time()),
+        uptime_seconds=time.time() - startup_time
+    )
+
+@knowledge_agent.on_rest_get("/ready", ReadinessResponse)
+async def handle_ready(ctx: Context) -> ReadinessResponse:
+    """Readiness endpoint: ready only after models are loaded and popular Echos preloaded"""
+    return ReadinessResponse(
+        ready=warmup.ready,
+        status=warmup.state,
+        timestamp=int(time.time()),
+        details={**warmup.stats(), "loaded_echos": list(query_engine.kb_cache.stats()["entries"])}
+    )
+
+@knowledge_agent.on_rest_get("/metrics", MetricsResponse)
+async def handle_metrics(ctx: Context) -> MetricsResponse:
+    """REST endpoint exposing stage timings, event loop lag and cache counters"""
+    return MetricsResponse(
+        agent_name="EchoLink Knowledge Agent",
+        timestamp=int(time.time()),
+        metrics={
+            "event_loop_lag": loop_lag_monitor.stats(),
+            "executor": query_engine.executor.stats(),
+            "embedding_batcher": query_engine.embedder.stats() if query_engine.embedder else None,
+            "kb_cache": query_engine.kb_cache.stats(),
+            "answer_cache": query_engine.answer_cache.stats(),
+            "probe_memo": query_engine.probe_memo.stats(),
+            "global_index": query_engine.global_index.stats(),
+            "echo_router": query_engine.echo_router.stats(),
+            "warmup": warmup.stats(),
+            "imports": import_report(),
+            "models": model_registry.stats(),
+            "llm_time_to_first_token": query_engine.llm_first_token.snapshot(),
+            "llm": query_engine.llm.stats() if query_engine.llm else None,
+            "context_packer": query_engine.context_packer.stats(),
+            "extractive": query_engine.extractive.stats(query_engine.llm_synthesis_latency.mean_ms or None),
+            "llm_synthesis": query_engine.llm_synthesis_latency.snapshot(),
+            "singleflight": query_engine.singleflight.stats(),
+            "query_planner": query_engine.planner.stats(),
+            "query_encoder": query_engine.vectorizer.stats() if hasattr(query_engine.vectorizer, "stats") else None,
+        }
+    )
+
+@knowledge_agent.on_interval(period=KB_WATCH_INTERVAL)
+async def watch_knowledge_bases(ctx: Context):
+    """Hot-reload cached knowledge bases whose artifacts were rewritten by ingest.py"""
+    await query_engine.kb_watcher.poll()
+    if query_engine.initialized:
+        await query_engine.executor.run("load", query_engine.global_index.refresh)
+        await query_engine.executor.run("load", query_engine.echo_router.refresh)
+    await query_engine.executor.run("load", query_engine.query_frequency.save)
+    await query_engine.executor.run("load", query_engine.planner.cost_model.save)
+
+@knowledge_agent.on_rest_post("/discover", FactDiscoveryRequest, FactDiscoveryResponse)
+async def handle_discover(ctx: Context, req: FactDiscoveryRequest) -> FactDiscoveryResponse:
+    """REST endpoint: search facts across the whole marketplace, optionally filtered to one token"""
+    start_time = time.time()
+    try:
+        if not query_engine.initialized:
+            await query_engine.initialize()
+        
+        results = await query_engine.discover_facts(req.query, req.top_k, req.token_id)
+        return FactDiscoveryResponse(
+            success=True,
+            query=req.query,
+            results=results,
+            processing_time_ms=(time.time() - start_time) * 1000
+        )
+    except Exception as e:
+        ctx.logger.error(f"❌ Fact discovery failed: {e}")
+        return FactDiscoveryResponse(success=False, query=req.query, results=[], error=str(e))
 
 if __name__ == "__main__":
     knowledge_agent.run()
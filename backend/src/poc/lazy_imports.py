@@ -0,0 +1,134 @@
+"""
+EchoLink Lazy Imports
+Import-on-first-use proxies for heavy dependencies, plus an import-time report
+so agent startup cost can be attributed to the packages that cause it
+"""
+
+import sys
+import time
+import types
+import logging
+import builtins
+import threading
+import importlib
+import importlib.util
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Inclusive first-import cost per module name, in milliseconds
+_import_times: Dict[str, float] = {}
+_lazy_load_times: Dict[str, float] = {}
+_timer_state = threading.local()
+_original_import = builtins.__import__
+_timer_installed_at: Optional[float] = None
+_timer_uninstalled_at: Optional[float] = None
+
+
+def is_available(name: str) -> bool:
+    """True if a module can be imported, without importing it"""
+    if name in sys.modules:
+        return True
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+class LazyModule(types.ModuleType):
+    """
+    Stand-in for a module that is imported on first attribute access.
+
+    `faiss = lazy_import("faiss")` costs a find_spec at module load; the real
+    import (and its time, recorded in the report) happens the first time
+    anything does `faiss.something`.
+    """
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__["_lazy_module"] = None
+        self.__dict__["_lazy_lock"] = threading.Lock()
+
+    def _load(self) -> types.ModuleType:
+        module = self.__dict__["_lazy_module"]
+        if module is not None:
+            return module
+        with self.__dict__["_lazy_lock"]:
+            if self.__dict__["_lazy_module"] is None:
+                start = time.perf_counter()
+                module = importlib.import_module(self.__name__)
+                _lazy_load_times[self.__name__] = (time.perf_counter() - start) * 1000
+                logger.info(f"📦 Imported {self.__name__} on first use ({_lazy_load_times[self.__name__]:.0f}ms)")
+                self.__dict__["_lazy_module"] = module
+        return self.__dict__["_lazy_module"]
+
+    def __getattr__(self, attr: str):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self) -> str:
+        state = "loaded" if self.__dict__["_lazy_module"] is not None else "not loaded"
+        return f"<lazy module '{self.__name__}' ({state})>"
+
+
+def lazy_import(name: str) -> Optional[LazyModule]:
+    """Lazy proxy for `name`, or None if it isn't installed (so `if faiss is None` checks still work)"""
+    if not is_available(name):
+        return None
+    return LazyModule(name)
+
+# ============================================================================
+# Startup Import Timing
+# ============================================================================
+
+def _timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+    # Only time the outermost import of a not-yet-loaded module, so each cost
+    # is attributed to the package our code asked for (dependencies included)
+    if level != 0 or name in sys.modules or getattr(_timer_state, "active", False):
+        return _original_import(name, globals, locals, fromlist, level)
+
+    _timer_state.active = True
+    start = time.perf_counter()
+    try:
+        return _original_import(name, globals, locals, fromlist, level)
+    finally:
+        _timer_state.active = False
+        _import_times[name] = _import_times.get(name, 0.0) + (time.perf_counter() - start) * 1000
+
+
+def install_import_timer() -> None:
+    """Start recording module import times (call before the imports to measure)"""
+    global _timer_installed_at
+    if builtins.__import__ is not _timed_import:
+        builtins.__import__ = _timed_import
+        _timer_installed_at = time.perf_counter()
+
+
+def uninstall_import_timer() -> None:
+    """Stop recording (call once startup is done, so later imports skip the wrapper and stay out of the report)"""
+    global _timer_uninstalled_at
+    if builtins.__import__ is _timed_import:
+        builtins.__import__ = _original_import
+        _timer_uninstalled_at = time.perf_counter()
+
+
+def import_report(top: int = 10) -> Dict[str, object]:
+    """Most expensive startup imports and the lazy imports paid so far"""
+    timer_end = _timer_uninstalled_at or time.perf_counter()
+    ranked: List[Tuple[str, float]] = sorted(_import_times.items(), key=lambda item: item[1], reverse=True)
+    return {
+        "startup_imports_ms": round(sum(_import_times.values()), 1),
+        "since_timer_ms": round((timer_end - _timer_installed_at) * 1000, 1) if _timer_installed_at else None,
+        "top": {name: round(ms, 1) for name, ms in ranked[:top]},
+        "lazy": {name: round(ms, 1) for name, ms in _lazy_load_times.items()},
+    }
+
+
+def log_import_report(agent_name: str, top: int = 5) -> None:
+    """Log where an agent's startup import time went"""
+    report = import_report(top)
+    logger.info(f"⏱️ {agent_name} imports: {report['startup_imports_ms']:.0f}ms")
+    for name, ms in report["top"].items():
+        logger.info(f"    {name:<32} {ms:>8.1f}ms")
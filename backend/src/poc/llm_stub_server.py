@@ -0,0 +1,203 @@
+"""
+EchoLink LLM Stub Server
+Local stand-in for the OpenAI-compatible ASI:One chat API, with injectable
+latency, slow requests and errors (test_llm_client.py runs ASIOneLLM against it)
+"""
+
+import json
+import time
+import random
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List
+
+logger = logging.getLogger(__name__)
+
+
+class StubBehavior:
+    """Fault injection knobs, changeable while the server runs"""
+
+    def __init__(
+        self,
+        latency_ms: float = 20.0,
+        jitter_ms: float = 5.0,
+        slow_rate: float = 0.0,
+        slow_ms: float = 1000.0,
+        error_rate: float = 0.0,
+        error_status: int = 503
+    ):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.slow_rate = slow_rate
+        self.slow_ms = slow_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+
+    def delay_seconds(self) -> float:
+        if random.random() < self.slow_rate:
+            return self.slow_ms / 1000
+        return max(0.0, self.latency_ms + random.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, behavior: StubBehavior):
+        super().__init__(address, StubHandler)
+        self.behavior = behavior
+        self.connections = 0
+        self.requests = 0
+        self.errors_sent = 0
+        self._lock = threading.Lock()
+
+    def count(self, field: str) -> None:
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+
+def stub_answer(messages: List[Dict[str, Any]]) -> str:
+    question = next((m["content"] for m in reversed(messages) if m.get("role") == "user"), "")
+    return f"Stub answer to: {question[:200]}"
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 so clients can keep connections alive between requests
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; don't let Nagle add ~40ms to each
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        self.server.count("connections")
+
+    def handle(self):
+        try:
+            super().handle()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # client gave up: deadline hit or the losing side of a hedge
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+    def _send_json(self, status: int, payload: Dict[str, Any]) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/stats":
+            self._send_json(200, {
+                "connections": self.server.connections,
+                "requests": self.server.requests,
+                "errors_sent": self.server.errors_sent,
+            })
+        else:
+            self._send_json(404, {"error": {"message": "not found"}})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        self.server.count("requests")
+
+        if self.path.rstrip("/") != "/v1/chat/completions":
+            self._send_json(404, {"error": {"message": "not found"}})
+            return
+
+        behavior = self.server.behavior
+        time.sleep(behavior.delay_seconds())
+
+        if random.random() < behavior.error_rate:
+            self.server.count("errors_sent")
+            self._send_json(behavior.error_status, {"error": {"message": "injected stub failure", "type": "server_error"}})
+            return
+
+        answer = stub_answer(request.get("messages", []))
+        completion_id = f"chatcmpl-stub-{self.server.requests}"
+        created = int(time.time())
+        model = request.get("model", "stub")
+
+        if request.get("stream"):
+            self._stream(completion_id, created, model, answer)
+            return
+
+        self._send_json(200, {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": answer},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": len(answer.split()), "total_tokens": len(answer.split())},
+        })
+
+    def _stream(self, completion_id: str, created: int, model: str, answer: str) -> None:
+        # Server-sent events without a length, so this connection closes afterwards
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        words = answer.split(" ")
+        for i, word in enumerate(words):
+            delta = {"content": word if i == 0 else " " + word}
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": None}],
+            }
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            self.wfile.flush()
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+
+def start_stub_server(behavior: StubBehavior, host: str = "127.0.0.1", port: int = 0) -> StubServer:
+    """Serve in a daemon thread; port 0 picks a free port"""
+    server = StubServer((host, port), behavior)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="OpenAI-compatible chat stub for exercising the ASI:One client locally")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Typical response latency")
+    parser.add_argument("--jitter-ms", type=float, default=5.0, help="Uniform +/- jitter on the latency")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="Fraction of requests that stall")
+    parser.add_argument("--slow-ms", type=float, default=1000.0, help="Latency of a stalled request")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests that fail")
+    parser.add_argument("--error-status", type=int, default=503, help="HTTP status of injected failures")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    behavior = StubBehavior(args.latency_ms, args.jitter_ms, args.slow_rate, args.slow_ms, args.error_rate, args.error_status)
+
+    server = StubServer((args.host, args.port), behavior)
+    logger.info(f"🧪 LLM stub listening on {server.base_url} (set ASI_ONE_BASE_URL to use it)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+EchoLink Metrics
+Lightweight in-process latency histograms and counters for agent /metrics endpoints
+"""
+
+import threading
+from bisect import bisect_left
+from collections import deque
+from typing import Dict, Any, Optional
+
+# Bucket upper bounds in milliseconds (last bucket is +Inf)
+DEFAULT_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+
+
+class LatencyHistogram:
+    """
+    Cumulative bucketed latency histogram plus a sliding window of recent
+    samples for percentile estimates (p50/p95/p99).
+    """
+
+    def __init__(self, buckets_ms=DEFAULT_BUCKETS_MS, window: int = 1024):
+        self.buckets_ms = tuple(buckets_ms)
+        self.bucket_counts = [0] * (len(self.buckets_ms) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self._recent = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe(self, value_ms: float) -> None:
+        """Record one latency sample in milliseconds"""
+        with self._lock:
+            self.bucket_counts[bisect_left(self.buckets_ms, value_ms)] += 1
+            self.count += 1
+            self.total_ms += value_ms
+            self.max_ms = max(self.max_ms, value_ms)
+            self._recent.append(value_ms)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """q-th percentile (0-100) over the recent window, None if empty"""
+        with self._lock:
+            if not self._recent:
+                return None
+            ordered = sorted(self._recent)
+        index = min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+    @property
+    def mean_ms(self) -> float:
+        return self.total_ms / self.count if self.count else 0.0
+
+    def snapshot(self) -> Dict[str, Any]:
+        """JSON-friendly summary"""
+        p50, p95, p99 = self.percentile(50), self.percentile(95), self.percentile(99)
+        with self._lock:
+            buckets = {
+                f"le_{bound}": count
+                for bound, count in zip(list(self.buckets_ms) + ["inf"], self.bucket_counts)
+            }
+            return {
+                "count": self.count,
+                "mean_ms": round(self.mean_ms, 3),
+                "max_ms": round(self.max_ms, 3),
+                "p50_ms": None if p50 is None else round(p50, 3),
+                "p95_ms": None if p95 is None else round(p95, 3),
+                "p99_ms": None if p99 is None else round(p99, 3),
+                "buckets": buckets,
+            }
+
+
+class Counters:
+    """Thread-safe named counters"""
+
+    def __init__(self):
+        self._values: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self._values[name] = self._values.get(name, 0) + amount
+
+    def get(self, name: str) -> int:
+        with self._lock:
+            return self._values.get(name, 0)
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._values)
@@ -8,74 +8,141 @@ import re
 import logging
 from typing import List, Dict, Optional
 
+from lazy_imports import is_available, lazy_import
+
+# hyperon is only needed once a knowledge base is built
+hyperon = lazy_import("hyperon")
+
 logger = logging.getLogger(__name__)
 
-# Try to import transformers (REBEL model), fallback if unavailable
-try:
-    from transformers import pipeline
-    REBEL_AVAILABLE = True
-except ImportError:
-    REBEL_AVAILABLE = False
+# REBEL needs transformers, fallback if unavailable. Checked without importing
+# it: the import alone takes seconds and only extraction calls need it.
+REBEL_AVAILABLE = is_available("transformers")
+if REBEL_AVAILABLE:
+    from model_registry import get_rebel_pipeline
+else:
     logger.warning("transformers not available, using fallback extraction")
 
 
-def extract_triples_with_rebel(text: str, max_length: int = 2000) -> List[Dict[str, str]]:
+def chunk_text(text: str, chunk_size: int = 400, overlap: int = 1) -> List[str]:
+    """
+    Split text on sentence boundaries into chunks of about chunk_size characters.
+    
+    Args:
+        text: Input text
+        chunk_size: Target chunk length in characters
+        overlap: Number of trailing sentences repeated at the start of the next
+            chunk, when they fit alongside the next sentence
+        
+    Returns:
+        List of chunks covering the whole text
+    """
+    sentences = [s.strip() for s in re.split(r'(?<=[.!?])\s+', text) if s.strip()]
+    
+    chunks = []
+    current: List[str] = []
+    current_len = 0
+    for sentence in sentences:
+        if current and current_len + len(sentence) > chunk_size:
+            chunks.append(' '.join(current))
+            current = current[-overlap:] if overlap else []
+            current_len = sum(len(s) + 1 for s in current)
+            # Long sentences would otherwise go through REBEL twice in ~2x chunks
+            if current_len + len(sentence) > chunk_size:
+                current, current_len = [], 0
+        current.append(sentence)
+        current_len += len(sentence) + 1
+    
+    if current:
+        chunks.append(' '.join(current))
+    
+    return chunks
+
+
+def parse_rebel_output(extracted_text: str) -> List[Dict[str, str]]:
+    """Parse REBEL output: <triplet> subj <subj> obj <obj> relation"""
+    triples = []
+    cleaned = extracted_text.replace('<s>', '').replace('</s>', '').replace('<pad>', '')
+    triplet_pattern = r'<triplet>\s*([^<]+?)\s*<subj>\s*([^<]+?)\s*<obj>\s*([^<]+?)(?=\s*<triplet>|$)'
+    
+    for subject, object_, relation in re.findall(triplet_pattern, cleaned.strip()):
+        subject, relation, object_ = subject.strip(), relation.strip(), object_.strip()
+        if subject and relation and object_:
+            triples.append({
+                'subject': subject,
+                'relation': relation,
+                'object': object_
+            })
+    
+    return triples
+
+
+def extract_triples_with_rebel(
+    text: str,
+    chunk_size: int = 400,
+    batch_size: int = 8,
+    num_return_sequences: int = 2
+) -> List[Dict[str, str]]:
     """
     Extract Subject-Predicate-Object triples using REBEL model.
     
+    The full text is chunked and all chunks go through the model in batches,
+    so nothing past the first few thousand characters is dropped.
+    
     Args:
         text: Input text
-        max_length: Maximum text length to process
+        chunk_size: Characters per REBEL input chunk
+        batch_size: Chunks per generate() call
+        num_return_sequences: Beam outputs kept per chunk
         
     Returns:
-        List of dicts with 'subject', 'relation', 'object' keys
+        Deduplicated list of dicts with 'subject', 'relation', 'object' keys
     """
     if not REBEL_AVAILABLE:
         return extract_triples_fallback(text)
     
+    chunks = chunk_text(text, chunk_size=chunk_size)
+    if not chunks:
+        return []
+    
     triples = []
     
     try:
-        # Initialize REBEL pipeline
-        extractor = pipeline(
-            "text2text-generation",
-            model="Babelscape/rebel-large",
-            device=-1  # CPU mode
-        )
-        
-        # Truncate if too long
-        text_chunk = text[:max_length]
+        # Shared REBEL pipeline (loaded once per process)
+        extractor = get_rebel_pipeline()
         
-        # Generate triples
+        # Token ids are decoded manually: the pipeline's own text output skips
+        # special tokens, which strips the <triplet>/<subj>/<obj> markers
         outputs = extractor(
-            text_chunk,
+            chunks,
+            batch_size=batch_size,
             max_length=256,
-            num_beams=3,
-            num_return_sequences=1
+            num_beams=max(3, num_return_sequences),
+            num_return_sequences=num_return_sequences,
+            return_tensors=True,
+            return_text=False
         )
         
         if not outputs:
             return extract_triples_fallback(text)
         
-        extracted_text = outputs[0]['generated_text']
+        token_ids = []
+        for chunk_outputs in outputs:
+            if isinstance(chunk_outputs, dict):
+                chunk_outputs = [chunk_outputs]
+            token_ids.extend(output['generated_token_ids'] for output in chunk_outputs)
         
-        # Parse REBEL output: <triplet> subj <subj> pred <obj> obj
-        triplet_pattern = r'<triplet>\s*([^<]+?)\s*<subj>\s*([^<]+?)\s*<obj>\s*([^<]+?)(?=\s*<triplet>|$)'
-        matches = re.findall(triplet_pattern, extracted_text)
+        decoded = extractor.tokenizer.batch_decode(token_ids, skip_special_tokens=False)
         
-        for match in matches:
-            subject = match[0].strip()
-            predicate = match[1].strip()
-            object_ = match[2].strip()
-            
-            if subject and predicate and object_:
-                triples.append({
-                    'subject': subject,
-                    'relation': predicate,
-                    'object': object_
-                })
+        seen = set()
+        for extracted_text in decoded:
+            for triple in parse_rebel_output(extracted_text):
+                key = (triple['subject'].lower(), triple['relation'].lower(), triple['object'].lower())
+                if key not in seen:
+                    seen.add(key)
+                    triples.append(triple)
         
-        logger.info(f"REBEL extracted {len(triples)} triples")
+        logger.info(f"REBEL extracted {len(triples)} unique triples from {len(chunks)} chunks")
         
     except Exception as e:
         logger.warning(f"REBEL extraction failed: {e}, using fallback")
@@ -126,6 +193,11 @@ def extract_triples_fallback(text: str) -> List[Dict[str, str]]:
     return triples
 
 
+def metta_term(text: str) -> str:
+    """Entity text as a MeTTa symbol (spaces hyphenated, separators dropped)"""
+    return text.replace(' ', '-').replace(',', '').replace('(', '').replace(')', '')
+
+
 def triples_to_metta_facts(triples: List[Dict[str, str]]) -> List[str]:
     """
     Convert structured triples to MeTTa fact strings.
@@ -133,9 +205,9 @@ def triples_to_metta_facts(triples: List[Dict[str, str]]) -> List[str]:
     facts = []
     
     for triple in triples:
-        subject = triple['subject'].replace(' ', '-').replace(',', '').replace('(', '').replace(')', '')
+        subject = metta_term(triple['subject'])
         relation = triple['relation'].replace(' ', '-').lower()
-        object_ = triple['object'].replace(' ', '-').replace(',', '').replace('(', '').replace(')', '')
+        object_ = metta_term(triple['object'])
         
         # Map relations
         relation_map = {
@@ -161,6 +233,65 @@ def triples_to_metta_facts(triples: List[Dict[str, str]]) -> List[str]:
     return facts
 
 
+class MeTTaKnowledgeBase:
+    """
+    MeTTa space of facts extracted from retrieved context.
+    
+    Deductions for a subject are the facts it heads: "(uses Bitcoin
+    Proof-of-Work)" yields "uses Proof-of-Work", "(is-eco-friendly Solar)"
+    yields "is-eco-friendly". reason_batch() answers many subjects with one
+    interpreter call: the subjects are added as (reason-subject X) markers
+    and a conjunctive match joins them against the facts, instead of one
+    match per subject.
+    """
+    
+    def __init__(self):
+        self.metta = hyperon.MeTTa()
+    
+    def add_facts(self, facts: List[str]) -> None:
+        for fact in facts:
+            try:
+                self.metta.run(f'!(add-atom &self {fact})')
+            except Exception as e:
+                logger.warning(f"Failed to add fact '{fact}': {e}")
+    
+    def reason(self, subject: str) -> List[str]:
+        return self.reason_batch([subject])[subject]
+    
+    def reason_batch(self, subjects: List[str]) -> Dict[str, List[str]]:
+        """
+        Deductions for every subject from a single MeTTa evaluation.
+        
+        Returns:
+            Mapping of each given subject to its deductions, in space order
+        """
+        deductions: Dict[str, List[str]] = {subject: [] for subject in subjects}
+        by_term: Dict[str, List[str]] = {}
+        for subject in subjects:
+            by_term.setdefault(metta_term(subject), []).append(subject)
+        if not by_term:
+            return deductions
+        
+        self.metta.run(' '.join(f'!(add-atom &self (reason-subject {term}))' for term in by_term))
+        try:
+            binary, unary = self.metta.run(
+                '!(match &self (, (reason-subject $s) ($r $s $o)) ($s $r $o)) '
+                '!(match &self (, (reason-subject $s) ($r $s)) ($s $r))'
+            )
+        finally:
+            self.metta.run(' '.join(f'!(remove-atom &self (reason-subject {term}))' for term in by_term))
+        
+        for atom in list(binary) + list(unary):
+            term, *deduction = [str(child) for child in atom.get_children()]
+            # The markers themselves match ($r $s) as (reason-subject X)
+            if deduction == ['reason-subject'] or term not in by_term:
+                continue
+            for subject in by_term[term]:
+                deductions[subject].append(' '.join(deduction))
+        
+        return deductions
+
+
 def extract_relations_and_reason(
     context: str,
     question: str,
@@ -180,8 +311,8 @@ def extract_relations_and_reason(
     """
     logger.info(f"Extracting relations from {len(context)} chars...")
     
-    # Extract triples
-    triples = extract_triples_with_rebel(context, max_length=5000)
+    # Extract triples over the full context
+    triples = extract_triples_with_rebel(context)
     
     if not triples:
         logger.warning("No triples extracted")
@@ -190,18 +321,21 @@ def extract_relations_and_reason(
     logger.info(f"Extracted {len(triples)} triples: {triples[:3]}...")
     
     # Convert to MeTTa facts
-    facts = triples_to_metta_facts(triples)
+    facts = list(dict.fromkeys(triples_to_metta_facts(triples)))
     logger.info(f"Generated {len(facts)} MeTTa facts")
     
     # Add facts to knowledge base
     metta_kb.add_facts(facts)
     
-    # Perform reasoning on extracted entities
+    # Reason over the distinct subjects in one batched call, in extraction order
+    subjects = list(dict.fromkeys(triple['subject'] for triple in triples))
+    logger.info(f"Reasoning over {len(subjects)} distinct subjects ({len(triples)} triples)")
+    
+    deductions_by_subject = metta_kb.reason_batch(subjects)
+    
     results = []
-    for triple in triples:
-        subject = triple['subject']
-        deductions = metta_kb.reason(subject)
-        results.extend(deductions)
+    for subject in subjects:
+        results.extend(deductions_by_subject.get(subject, []))
     
     if results:
         # Clean and return first deduction
@@ -213,4 +347,3 @@ def extract_relations_and_reason(
         if triples:
             return triples[0]['object']
         return None
-
@@ -0,0 +1,213 @@
+"""
+EchoLink Model Registry
+Process-wide lazy model loading shared by ingestion, transcription and agents
+"""
+
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+SENTENCE_MODEL_NAME = "all-MiniLM-L6-v2"
+REBEL_MODEL_NAME = "Babelscape/rebel-large"
+# ONNX exports are cached here per model (query encoder and Whisper onnx backends)
+ONNX_CACHE_DIR = Path(os.getenv("ONNX_CACHE_DIR", "models/onnx"))
+
+
+def estimate_size_bytes(obj: Any) -> int:
+    """Best-effort resident size of a loaded model (parameters + buffers)"""
+    if isinstance(obj, (tuple, list)):
+        return sum(estimate_size_bytes(item) for item in obj)
+
+    module = getattr(obj, "model", None) if not hasattr(obj, "parameters") else obj
+    if module is None or not hasattr(module, "parameters"):
+        return 0
+
+    try:
+        size = sum(p.numel() * p.element_size() for p in module.parameters())
+        size += sum(b.numel() * b.element_size() for b in module.buffers())
+        return size
+    except Exception:
+        return 0
+
+
+class _Entry:
+    """A loaded model plus its bookkeeping"""
+
+    def __init__(self, value: Any, size_bytes: int, load_seconds: float):
+        self.value = value
+        self.size_bytes = size_bytes
+        self.load_seconds = load_seconds
+        self.hits = 0
+
+
+class ModelRegistry:
+    """
+    Lazily loads models on first use and keeps one instance per key.
+
+    Loads of different keys run concurrently; concurrent requests for the same
+    key wait for a single load. When the summed model size exceeds the memory
+    budget, the least recently used models are dropped from the registry
+    (callers still holding a reference keep theirs alive until they let go).
+    """
+
+    def __init__(self, memory_budget_mb: Optional[float] = None):
+        if memory_budget_mb is None:
+            memory_budget_mb = float(os.getenv("MODEL_MEMORY_BUDGET_MB", "0"))
+        self.memory_budget_bytes = int(memory_budget_mb * 1024 * 1024)  # 0 = unlimited
+
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_locks: Dict[Hashable, threading.Lock] = {}
+
+        self.loads = 0
+        self.evictions = 0
+        self.load_history: Dict[str, float] = {}  # key -> last load time in seconds
+
+    def get(self, key: Hashable, loader: Callable[[], Any], size_bytes: Optional[int] = None) -> Any:
+        """
+        Return the model for key, loading it with loader() on first use.
+
+        Args:
+            key: Unique identifier, e.g. ("sentence-transformer", "all-MiniLM-L6-v2")
+            loader: Zero-argument callable that builds the model
+            size_bytes: Override for the measured size (e.g. 0 for wrappers sharing weights)
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.hits += 1
+                self._entries.move_to_end(key)
+                return entry.value
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        with load_lock:
+            # Another thread may have finished the load while we waited
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    entry.hits += 1
+                    self._entries.move_to_end(key)
+                    return entry.value
+
+            logger.info(f"📥 Loading model {key}...")
+            start = time.perf_counter()
+            value = loader()
+            load_seconds = time.perf_counter() - start
+            measured = estimate_size_bytes(value) if size_bytes is None else size_bytes
+            logger.info(f"✅ Loaded model {key} in {load_seconds:.2f}s ({measured / 1024 / 1024:.0f} MB)")
+
+            with self._lock:
+                self._entries[key] = _Entry(value, measured, load_seconds)
+                self.loads += 1
+                self.load_history[str(key)] = load_seconds
+                self._enforce_budget(keep=key)
+
+            return value
+
+    def _enforce_budget(self, keep: Hashable) -> None:
+        """Unload LRU models until under budget (caller holds self._lock)"""
+        if not self.memory_budget_bytes:
+            return
+
+        total = sum(entry.size_bytes for entry in self._entries.values())
+        for key in list(self._entries.keys()):
+            if total <= self.memory_budget_bytes:
+                break
+            if key == keep:
+                continue
+            entry = self._entries.pop(key)
+            total -= entry.size_bytes
+            self.evictions += 1
+            logger.info(f"🧹 Unloaded model {key} ({entry.size_bytes / 1024 / 1024:.0f} MB) to stay within budget")
+
+    def unload(self, key: Hashable) -> bool:
+        """Drop a model from the registry"""
+        with self._lock:
+            return self._entries.pop(key, None) is not None
+
+    def is_loaded(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def stats(self) -> Dict[str, Any]:
+        """Loaded models with sizes, load times and hit counts"""
+        with self._lock:
+            return {
+                "loaded": {
+                    str(key): {
+                        "size_mb": round(entry.size_bytes / 1024 / 1024, 1),
+                        "load_seconds": round(entry.load_seconds, 3),
+                        "hits": entry.hits,
+                    }
+                    for key, entry in self._entries.items()
+                },
+                "total_mb": round(sum(e.size_bytes for e in self._entries.values()) / 1024 / 1024, 1),
+                "budget_mb": round(self.memory_budget_bytes / 1024 / 1024, 1),
+                "loads": self.loads,
+                "evictions": self.evictions,
+                "load_history_seconds": dict(self.load_history),
+            }
+
+
+# Process-wide registry
+registry = ModelRegistry()
+
+# ============================================================================
+# Shared Model Accessors
+# ============================================================================
+
+def get_sentence_transformer(model_name: str = SENTENCE_MODEL_NAME):
+    """Shared SentenceTransformer used for fact and query embeddings"""
+    def load():
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer(model_name)
+
+    return registry.get(("sentence-transformer", model_name), load)
+
+
+def get_query_encoder():
+    """
+    Encoder for query-time embeddings.
+
+    With EMBED_SERVER_SOCKET set, returns a client of the node's shared
+    embedding server (see embedding_server.py), so agent processes don't each
+    hold a model copy; otherwise the in-process encoder for
+    QUERY_ENCODER_BACKEND (see query_encoder.py).
+    """
+    socket_path = os.getenv("EMBED_SERVER_SOCKET", "")
+    if socket_path:
+        from embedding_server import EmbeddingClient
+        return EmbeddingClient(socket_path)
+
+    from query_encoder import get_local_query_encoder
+    return get_local_query_encoder()
+
+
+def get_rebel_pipeline(model_name: str = REBEL_MODEL_NAME):
+    """
+    Shared REBEL text2text-generation pipeline.
+
+    The pipeline is the registry entry for the REBEL weights: it is sized by
+    them, and evicting it releases the model rather than leaving the weights
+    alive behind a zero-sized wrapper.
+    """
+    def load():
+        from transformers import AutoModelForSeq2SeqLM, AutoTokenizer, pipeline
+        tokenizer = AutoTokenizer.from_pretrained(model_name)
+        model = AutoModelForSeq2SeqLM.from_pretrained(model_name)
+        model.eval()
+        return pipeline("text2text-generation", model=model, tokenizer=tokenizer, device=-1)
+
+    return registry.get(("rebel", model_name), load)
+
+
+def get_rebel(model_name: str = REBEL_MODEL_NAME):
+    """Shared REBEL (tokenizer, model) pair for triple extraction, taken from the pipeline entry"""
+    extractor = get_rebel_pipeline(model_name)
+    return extractor.tokenizer, extractor.model
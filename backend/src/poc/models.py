@@ -4,7 +4,7 @@ All Model classes used across the agent system
 """
 
 import time
-from typing import Optional
+from typing import Optional, Dict, Any, List
 from uagents import Model
 
 # ============================================================================
@@ -56,6 +56,27 @@ class KnowledgeQueryResponse(Model):
     processing_time_ms: Optional[float] = None
     error: Optional[str] = None
 
+class KnowledgeQueryPartial(Model):
+    """Answer text generated so far for an in-flight knowledge query"""
+    query_id: str
+    token_id: str
+    partial_answer: str  # full text so far, not a delta
+    sequence: int  # increases with each partial; stale (reordered) partials are ignored
+
+class FactDiscoveryRequest(Model):
+    """Search facts across all Echos, or within one token"""
+    query: str
+    token_id: Optional[str] = None
+    top_k: int = 10
+
+class FactDiscoveryResponse(Model):
+    """Matching facts with their owning token, best first"""
+    success: bool
+    query: str
+    results: List[Dict[str, Any]]
+    processing_time_ms: Optional[float] = None
+    error: Optional[str] = None
+
 # ============================================================================
 # Orchestrator Agent Models
 # ============================================================================
@@ -86,6 +107,19 @@ class HealthResponse(Model):
     timestamp: int
     uptime_seconds: float
 
+class ReadinessResponse(Model):
+    """Readiness check response (ready once warmup has finished)"""
+    ready: bool
+    status: str  # "cold", "warming", "ready", "failed"
+    timestamp: int
+    details: Dict[str, Any]
+
+class MetricsResponse(Model):
+    """Runtime metrics snapshot (latency histograms, cache counters)"""
+    agent_name: str
+    timestamp: int
+    metrics: Dict[str, Any]
+
 # ============================================================================
 # Query Status Models
 # ============================================================================
@@ -139,3 +173,4 @@ class QueryStatusResponse(Model):
     timestamp: int
     result: Optional[QueryResponse] = None
     error: Optional[str] = None
+    partial_answer: Optional[str] = None  # streamed answer text while status is "processing"
@@ -12,6 +12,10 @@ from typing import Optional, Dict, Any
 from datetime import datetime
 from uuid import uuid4
 
+# Record what each import costs so startup time can be attributed (logged on startup)
+from lazy_imports import install_import_timer, uninstall_import_timer, log_import_report
+install_import_timer()
+
 # uAgents framework
 from uagents import Agent, Context, Protocol
 
@@ -32,6 +36,7 @@ from models import (
     PaymentConfirmed,
     KnowledgeQueryRequest, 
     KnowledgeQueryResponse,
+    KnowledgeQueryPartial,
     QueryRequest,
     QueryResponse,
     HealthResponse,
@@ -202,6 +207,25 @@ async def handle_payment_validation_response(ctx: Context, sender: str, msg: Pay
             processing_time_ms=(time.time() - query_state["start_time"]) * 1000
         )
 
+@orchestrator_protocol.on_message(model=KnowledgeQueryPartial)
+async def handle_knowledge_query_partial(ctx: Context, sender: str, msg: KnowledgeQueryPartial):
+    """Record streamed answer text so status polls can show it before the query completes"""
+    query_state = pending_queries.get(msg.query_id)
+    if query_state is None or query_state["result"] is not None:
+        return
+    
+    # Partials carry the full text so far; ignore ones overtaken by a later partial
+    if msg.sequence <= query_state.get("partial_sequence", 0):
+        return
+    
+    if "partial_sequence" not in query_state:
+        ctx.logger.info(f"✍️ First answer text for query {msg.query_id} after {(time.time() - query_state['start_time']) * 1000:.0f}ms")
+    
+    query_state["partial_sequence"] = msg.sequence
+    query_state["partial_answer"] = msg.partial_answer
+    query_state["status"] = "processing"
+    query_state["progress"] = "Generating answer..."
+
 @orchestrator_protocol.on_message(model=KnowledgeQueryResponse)
 async def handle_knowledge_query_response(ctx: Context, sender: str, msg: KnowledgeQueryResponse):
     """Handle knowledge query responses"""
@@ -555,7 +579,8 @@ async def handle_query_status(ctx: Context, query_id: str) -> QueryStatusRespons
         progress=query_state["progress"],
         timestamp=int(time.time()),
         result=query_state["result"],
-        error=query_state["error"]
+        error=query_state["error"],
+        partial_answer=None if query_state["result"] else query_state.get("partial_answer")
     )
 
 @orchestrator_agent.on_rest_get("/health", HealthResponse)
@@ -596,6 +621,9 @@ async def startup(ctx: Context):
     ctx.logger.info(f"  💳 Payment Agent: {PAYMENT_AGENT_ADDRESS}")
     ctx.logger.info(f"  🧠 Knowledge Agent: {KNOWLEDGE_AGENT_ADDRESS}")
     ctx.logger.info("=" * 60)
+    
+    log_import_report("Orchestrator Agent")
+    uninstall_import_timer()  # report startup only; later imports skip the wrapper
 
 if __name__ == "__main__":
     orchestrator_agent.run()
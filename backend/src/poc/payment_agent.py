@@ -11,6 +11,10 @@ from typing import Optional, Dict, Any
 from datetime import datetime
 from uuid import uuid4
 
+# Record what each import costs so startup time can be attributed (logged on startup)
+from lazy_imports import install_import_timer, uninstall_import_timer, log_import_report
+install_import_timer()
+
 # uAgents framework
 from uagents import Agent, Context, Protocol
 
@@ -300,6 +304,9 @@ async def startup(ctx: Context):
     ctx.logger.info("  ✅ Direct PYUSD payment validation")
     ctx.logger.info("  ✅ Payment confirmation messaging")
     ctx.logger.info("=" * 60)
+    
+    log_import_report("Payment Agent")
+    uninstall_import_timer()  # report startup only; later imports skip the wrapper
 
 if __name__ == "__main__":
     payment_agent.run()
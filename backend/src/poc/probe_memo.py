@@ -0,0 +1,91 @@
+"""
+EchoLink Probe Memo
+Bounded LRU of MeTTa probe results, scoped to a KB version
+"""
+
+import os
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PROBE_MEMO_ENABLED = os.getenv("PROBE_MEMO_ENABLED", "1") == "1"
+PROBE_MEMO_MAX_ENTRIES = int(os.getenv("PROBE_MEMO_MAX_ENTRIES", "8192"))
+
+# Distinguishes "not memoized" from a memoized empty result (None)
+MISSING = object()
+
+
+class ProbeMemo:
+    """
+    Probe results keyed by (token_id, KB version, probe text).
+
+    The same probes recur across questions about one Echo ("query
+    occupation Taylor_Swift"), and a probe's result only changes when the
+    Echo is re-ingested, so entries need no TTL. Empty results are memoized
+    too: they cost a full interpreter evaluation like any other. Failed
+    probes are not. The version in every key keeps a re-ingested Echo from
+    reading old results; invalidate_token() frees them eagerly.
+    """
+
+    def __init__(self, max_entries: int = PROBE_MEMO_MAX_ENTRIES, enabled: bool = PROBE_MEMO_ENABLED):
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self._entries: "OrderedDict[Tuple[str, str, str], Optional[str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, token_id: str, version: str, probe: str) -> Any:
+        """The memoized result (None for an empty one), or MISSING"""
+        if not self.enabled:
+            return MISSING
+        key = (token_id, version, probe)
+        with self._lock:
+            value = self._entries.get(key, MISSING)
+            if value is MISSING:
+                self.misses += 1
+                return MISSING
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, token_id: str, version: str, probe: str, value: Optional[str]) -> None:
+        if not self.enabled:
+            return
+        key = (token_id, version, probe)
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate_token(self, token_id: str, version: Optional[str] = None) -> int:
+        """Drop a token's entries (all versions other than `version` if given)"""
+        with self._lock:
+            stale = [k for k in self._entries if k[0] == token_id and k[1] != version]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+        if stale:
+            logger.info(f"🧹 Invalidated {len(stale)} memoized probes for token {token_id}")
+        return len(stale)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
@@ -0,0 +1,256 @@
+"""
+EchoLink Query Encoder Backends
+Optimized CPU encoders for all-MiniLM-L6-v2 query embeddings, with a parity
+check against the fp32 model used to build the stored fact indexes
+"""
+
+import os
+import time
+import logging
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from model_registry import ONNX_CACHE_DIR, SENTENCE_MODEL_NAME, get_sentence_transformer, registry
+
+logger = logging.getLogger(__name__)
+
+# torch:      fp32 SentenceTransformer (the model the fact indexes were built with)
+# int8:       same model with dynamic int8 quantization of Linear layers
+# onnx:       ONNX Runtime export of the transformer (fp32)
+# onnx-int8:  ONNX Runtime export with dynamically quantized int8 weights
+QUERY_ENCODER_BACKENDS = ("torch", "int8", "onnx", "onnx-int8")
+
+DEFAULT_BACKEND = os.getenv("QUERY_ENCODER_BACKEND", "torch")
+PARITY_THRESHOLD = float(os.getenv("QUERY_ENCODER_PARITY_THRESHOLD", "0.99"))
+# Run the parity check when a non-fp32 backend loads and fall back to fp32 if it fails
+VERIFY_ON_LOAD = os.getenv("QUERY_ENCODER_VERIFY", "0") == "1"
+
+# Parity outcome per registry key, so the check runs once per process
+_parity_passed: Dict[tuple, bool] = {}
+
+# all-MiniLM-L6-v2's max_seq_length; longer queries are truncated the same way
+MAX_SEQ_LENGTH = 256
+
+PARITY_SAMPLES = [
+    "What is the capital of France?",
+    "Who founded the company and when?",
+    "Explain the main findings of the lecture on perovskite solar cells.",
+    "Which materials were used in the optoelectronic device?",
+    "How does the creator recommend structuring a startup pitch?",
+    "List the side effects mentioned for the treatment.",
+    "what year did it happen",
+    "Summarize everything this Echo knows about machine learning, neural networks and training data quality.",
+]
+
+
+class OnnxQueryEncoder:
+    """
+    ONNX Runtime encoder with SentenceTransformer.encode's output contract:
+    mean pooling over the attention mask followed by L2 normalization (the
+    Pooling + Normalize modules of all-MiniLM-L6-v2), float32, str -> (d,),
+    list -> (n, d).
+    """
+
+    def __init__(self, model_name: str = SENTENCE_MODEL_NAME, quantize: bool = False, num_threads: Optional[int] = None):
+        try:
+            import onnxruntime
+            from transformers import AutoTokenizer
+        except ImportError:
+            raise ImportError("onnx backends require: pip install onnxruntime optimum[onnxruntime]")
+
+        self.model_name = model_name
+        self.quantize = quantize
+        model_path = self._export(model_name, quantize)
+
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+
+        self.session = onnxruntime.InferenceSession(str(model_path), options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.tokenizer = AutoTokenizer.from_pretrained(self._hub_id(model_name))
+
+    @staticmethod
+    def _hub_id(model_name: str) -> str:
+        return model_name if "/" in model_name else f"sentence-transformers/{model_name}"
+
+    @classmethod
+    def _export(cls, model_name: str, quantize: bool) -> Path:
+        """Export (and optionally quantize) once; later loads reuse the files"""
+        export_dir = ONNX_CACHE_DIR / model_name.replace("/", "__")
+        fp32_path = export_dir / "model.onnx"
+        int8_path = export_dir / "model_quantized.onnx"
+
+        if not fp32_path.exists():
+            from optimum.onnxruntime import ORTModelForFeatureExtraction
+            logger.info(f"📦 Exporting {model_name} to ONNX in {export_dir}")
+            ORTModelForFeatureExtraction.from_pretrained(cls._hub_id(model_name), export=True).save_pretrained(export_dir)
+
+        if quantize and not int8_path.exists():
+            from optimum.onnxruntime import ORTQuantizer
+            from optimum.onnxruntime.configuration import AutoQuantizationConfig
+            logger.info(f"📦 Quantizing {model_name} ONNX export to int8")
+            quantizer = ORTQuantizer.from_pretrained(export_dir, file_name="model.onnx")
+            quantizer.quantize(
+                save_dir=export_dir,
+                quantization_config=AutoQuantizationConfig.avx2(is_static=False, per_channel=False)
+            )
+
+        return int8_path if quantize else fp32_path
+
+    def encode(self, sentences, batch_size: int = 32, **kwargs) -> np.ndarray:
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+
+        batches = []
+        for start in range(0, len(texts), batch_size):
+            inputs = self.tokenizer(
+                texts[start:start + batch_size],
+                padding=True,
+                truncation=True,
+                max_length=MAX_SEQ_LENGTH,
+                return_tensors="np"
+            )
+            feed = {name: value.astype(np.int64) for name, value in inputs.items() if name in self.input_names}
+            token_embeddings = self.session.run(None, feed)[0]
+
+            mask = inputs["attention_mask"][..., np.newaxis].astype(np.float32)
+            pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+            batches.append(pooled.astype(np.float32))
+
+        if not batches:
+            return np.zeros((0, self.session.get_outputs()[0].shape[-1]), dtype=np.float32)
+        vectors = np.vstack(batches)
+        return vectors[0] if single else vectors
+
+
+def _load_int8_sentence_transformer(model_name: str):
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    model = SentenceTransformer(model_name, device="cpu")
+    model[0].auto_model = torch.quantization.quantize_dynamic(
+        model[0].auto_model, {torch.nn.Linear}, dtype=torch.qint8
+    )
+    return model
+
+
+def get_local_query_encoder(backend: str = DEFAULT_BACKEND, model_name: str = SENTENCE_MODEL_NAME):
+    """In-process query encoder for the given backend, shared through the model registry"""
+    if backend not in QUERY_ENCODER_BACKENDS:
+        raise ValueError(f"Unknown query encoder backend '{backend}', expected one of {QUERY_ENCODER_BACKENDS}")
+
+    if backend == "torch":
+        return get_sentence_transformer(model_name)
+
+    loaders = {
+        "int8": lambda: _load_int8_sentence_transformer(model_name),
+        "onnx": lambda: OnnxQueryEncoder(model_name, quantize=False),
+        "onnx-int8": lambda: OnnxQueryEncoder(model_name, quantize=True),
+    }
+    # ONNX sessions have no torch parameters to measure; use the export size on disk
+    size_bytes = None
+    if backend.startswith("onnx"):
+        path = ONNX_CACHE_DIR / model_name.replace("/", "__") / ("model_quantized.onnx" if backend == "onnx-int8" else "model.onnx")
+        size_bytes = path.stat().st_size if path.exists() else None
+
+    key = ("query-encoder", backend, model_name)
+    encoder = registry.get(key, loaders[backend], size_bytes=size_bytes)
+
+    if VERIFY_ON_LOAD:
+        if key not in _parity_passed:
+            parity = parity_check(encoder)
+            _parity_passed[key] = parity["min_cosine"] >= PARITY_THRESHOLD
+            if _parity_passed[key]:
+                logger.info(f"✅ {backend} query encoder parity {parity['min_cosine']:.4f}")
+            else:
+                logger.error(f"❌ {backend} query encoder failed parity ({parity['min_cosine']:.4f} < {PARITY_THRESHOLD}); using fp32")
+                registry.unload(key)
+        if not _parity_passed[key]:
+            return get_sentence_transformer(model_name)
+
+    return encoder
+
+# ============================================================================
+# Parity Check and Latency Benchmark
+# ============================================================================
+
+def parity_check(encoder, reference=None, texts: List[str] = PARITY_SAMPLES) -> Dict[str, float]:
+    """
+    Cosine similarity between an encoder's vectors and the fp32 reference.
+
+    Query vectors are searched against fact vectors built by the fp32 model,
+    so a backend is only safe if it stays pointed the same way.
+    """
+    reference = reference or get_sentence_transformer()
+    expected = np.asarray(reference.encode(texts), dtype=np.float32)
+    actual = np.asarray(encoder.encode(texts), dtype=np.float32)
+
+    expected /= np.linalg.norm(expected, axis=1, keepdims=True)
+    actual /= np.linalg.norm(actual, axis=1, keepdims=True)
+    cosines = (expected * actual).sum(axis=1)
+    return {"min_cosine": float(cosines.min()), "mean_cosine": float(cosines.mean())}
+
+
+def benchmark_encoders(backends: List[str], runs: int = 50) -> List[Dict[str, Any]]:
+    """Single-query latency (the per-request cost) and parity for each backend"""
+    reference = get_sentence_transformer()
+    results = []
+    for backend in backends:
+        load_start = time.perf_counter()
+        encoder = get_local_query_encoder(backend)
+        load_seconds = time.perf_counter() - load_start
+
+        encoder.encode(PARITY_SAMPLES[0])  # warm up
+        latencies = []
+        for i in range(runs):
+            start = time.perf_counter()
+            encoder.encode(PARITY_SAMPLES[i % len(PARITY_SAMPLES)])
+            latencies.append((time.perf_counter() - start) * 1000)
+
+        latencies.sort()
+        parity = parity_check(encoder, reference)
+        results.append({
+            "backend": backend,
+            "load_seconds": load_seconds,
+            "p50_ms": latencies[len(latencies) // 2],
+            "p95_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+            **parity,
+            "passes": parity["min_cosine"] >= PARITY_THRESHOLD,
+        })
+    return results
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark query encoder backends against fp32")
+    parser.add_argument("--backends", nargs="+", default=list(QUERY_ENCODER_BACKENDS), choices=QUERY_ENCODER_BACKENDS)
+    parser.add_argument("--runs", type=int, default=50, help="Single-query encodes per backend")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    results = []
+    for backend in args.backends:
+        try:
+            results.extend(benchmark_encoders([backend], args.runs))
+        except ImportError as e:
+            logger.warning(f"⚠️ Skipping {backend}: {e}")
+
+    print("=" * 78)
+    print(f"📊 QUERY ENCODER BENCHMARK (parity threshold {PARITY_THRESHOLD})")
+    print("=" * 78)
+    print(f"{'backend':<12}{'load s':>8}{'p50 ms':>9}{'p95 ms':>9}{'min cos':>10}{'mean cos':>10}  parity")
+    for r in results:
+        print(f"{r['backend']:<12}{r['load_seconds']:>8.2f}{r['p50_ms']:>9.2f}{r['p95_ms']:>9.2f}"
+              f"{r['min_cosine']:>10.4f}{r['mean_cosine']:>10.4f}  {'✅' if r['passes'] else '❌'}")
+    print("=" * 78)
+
+
+if __name__ == "__main__":
+    main()
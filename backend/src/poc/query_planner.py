@@ -0,0 +1,554 @@
+"""
+EchoLink Query Planner
+Chooses the Knowledge Agent pipeline per question: how many facts to keep,
+which MeTTa probes to issue and whether to try an extractive answer, using
+per-stage costs and probe hit rates learned from recorded timings
+"""
+
+import os
+import json
+import time
+import random
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from entity_linker import LinkedEntity
+from kg_existence import EXISTENCE_PRUNING_ENABLED, ExistenceIndex, Probe, metta_symbol
+from probe_memo import MISSING, ProbeMemo
+from extractive import QUESTION_SYNONYMS, TYPE_HINTS, classify_question, content_words, words_overlap
+
+logger = logging.getLogger(__name__)
+
+QUERY_PLANNER_ENABLED = os.getenv("QUERY_PLANNER_ENABLED", "1") == "1"
+PLANNER_STATS_PATH = Path(os.getenv("PLANNER_STATS_PATH", "knowledge_bases/planner_stats.json"))
+# Candidates fetched from FAISS; the plan keeps an adaptive prefix of them
+PLANNER_SEARCH_K = int(os.getenv("PLANNER_SEARCH_K", "10"))
+PLANNER_SCORE_FLOOR = float(os.getenv("PLANNER_SCORE_FLOOR", "0.2"))
+# A drop this large between consecutive scores ends the kept facts
+PLANNER_SCORE_GAP = float(os.getenv("PLANNER_SCORE_GAP", "0.12"))
+# The same cut for hybrid results, on fused scores relative to the best hit
+PLANNER_FUSED_GAP = float(os.getenv("PLANNER_FUSED_GAP", "0.3"))
+# Time the MeTTa stage may spend, converted to a probe count with the learned per-probe cost
+PLANNER_METTA_BUDGET_MS = float(os.getenv("PLANNER_METTA_BUDGET_MS", "50"))
+# Probe kinds below this hit rate (after PLANNER_MIN_SAMPLES probes) are skipped, bar exploration
+PLANNER_MIN_HIT_RATE = float(os.getenv("PLANNER_MIN_HIT_RATE", "0.02"))
+PLANNER_MIN_SAMPLES = int(os.getenv("PLANNER_MIN_SAMPLES", "50"))
+PLANNER_EXPLORE_RATE = float(os.getenv("PLANNER_EXPLORE_RATE", "0.05"))
+
+# Facts kept per question type: lookups need the best few, open questions more context
+MAX_FACTS = {"lookup": 3, "open": 8}
+MAX_PROBES = {"lookup": 6, "open": 9}
+
+# Seed costs (ms) until real timings arrive
+DEFAULT_STAGE_COSTS_MS = {"encode": 10.0, "search": 2.0, "metta_probe": 5.0, "extractive": 0.2, "llm": 2000.0}
+EWMA_ALPHA = 0.2
+
+# Legacy fixed pipeline (QUERY_PLANNER_ENABLED=0): top-5 facts, 5x3 forward probes,
+# inverse probes whenever the question contains who/what/which
+FIXED_TOP_K = 5
+FIXED_ENTITIES, FIXED_RELATIONS = 5, 3
+FIXED_INVERSE_RELATIONS, FIXED_INVERSE_ENTITIES = 3, 2
+
+def fixed_probes(query: str, triples: List[Dict[str, Any]]) -> List[Probe]:
+    """Probes of the original fixed pipeline, kept as the planner's baseline"""
+    entities = list(dict.fromkeys(t.get('subject', '') for t in triples if t.get('subject')))
+    relations = list(dict.fromkeys(t.get('relation', '') for t in triples if t.get('relation')))
+
+    probes = [("query", relation, entity) for entity in entities[:FIXED_ENTITIES] for relation in relations[:FIXED_RELATIONS]]
+    lowered = query.lower()
+    if 'who' in lowered or 'what' in lowered or 'which' in lowered:
+        probes += [
+            ("query-inverse", relation, entity)
+            for relation in relations[:FIXED_INVERSE_RELATIONS]
+            for entity in entities[:FIXED_INVERSE_ENTITIES]
+        ]
+    return probes
+
+
+def run_probe(metta, probe: str) -> Optional[str]:
+    """Evaluate one probe: its value, or None if the space has no match (raises on MeTTa errors)"""
+    result = metta.run(probe)
+    if not result or len(result) == 0:
+        return None
+    answer = str(result[0][0]) if isinstance(result[0], list) and len(result[0]) > 0 else str(result[0])
+    if not answer or answer == '[]' or 'Empty' in answer:
+        return None
+    return answer.replace('[', '').replace(']', '').strip()
+
+
+def execute_probes(
+    metta,
+    probes: List[Probe],
+    memo: Optional[ProbeMemo] = None,
+    scope: Optional[Tuple[str, str]] = None
+) -> Tuple[List[Dict[str, str]], Dict[str, List[int]]]:
+    """
+    Run probes against a MeTTa space, through the memo when given one.
+
+    Args:
+        memo: Probe memo consulted before, and filled after, each evaluation
+        scope: (token_id, KB version) the memo entries belong to
+
+    Returns:
+        (results, outcomes) where results are the Knowledge Agent's MeTTa
+        result dicts and outcomes maps probe kind -> [issued, hits]
+    """
+    results = []
+    outcomes: Dict[str, List[int]] = {}
+    for kind, relation, entity in probes:
+        counts = outcomes.setdefault(kind, [0, 0])
+        counts[0] += 1
+        probe = f"!({kind} {metta_symbol(relation)} {metta_symbol(entity)})"
+        value = memo.get(scope[0], scope[1], probe) if memo is not None else MISSING
+        if value is MISSING:
+            try:
+                value = run_probe(metta, probe)
+            except Exception as e:
+                logger.warning(f"MeTTa query '{probe}' failed: {e}")
+                continue
+            if memo is not None:
+                memo.put(scope[0], scope[1], probe, value)
+        if value is None:
+            continue
+
+        counts[1] += 1
+        if kind == "query":
+            results.append({'entity': entity, 'relation': relation, 'value': value})
+            logger.info(f"✅ MeTTa query found: {relation}({entity}) = {value}")
+        else:
+            results.append({'relation': relation, 'object': entity, 'subject': value})
+            logger.info(f"✅ MeTTa inverse query found: {relation}^-1({entity}) = {value}")
+    return results, outcomes
+
+# ============================================================================
+# Cost Model
+# ============================================================================
+
+class StageCostModel:
+    """
+    EWMA per-stage costs (ms) and per-(question class, probe kind) hit
+    rates, persisted so a restarted agent plans with what it learned
+    """
+
+    def __init__(self, path: Path = PLANNER_STATS_PATH, alpha: float = EWMA_ALPHA):
+        self.path = Path(path)
+        self.alpha = alpha
+        self.costs_ms: Dict[str, float] = dict(DEFAULT_STAGE_COSTS_MS)
+        self.samples: Dict[str, int] = {}
+        # "lookup:query" -> [ewma hit rate, probes observed]
+        self.hit_rates: Dict[str, List[float]] = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def load(self) -> "StageCostModel":
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+            self.costs_ms.update(data.get("costs_ms", {}))
+            self.samples.update(data.get("samples", {}))
+            self.hit_rates.update(data.get("hit_rates", {}))
+        except (OSError, ValueError):
+            pass
+        return self
+
+    def observe(self, stage: str, ms: float, count: int = 1) -> None:
+        """Record a stage timing; count > 1 spreads ms over that many units (e.g. probes)"""
+        if count <= 0:
+            return
+        unit_ms = ms / count
+        with self._lock:
+            previous = self.costs_ms.get(stage)
+            self.costs_ms[stage] = unit_ms if previous is None or not self.samples.get(stage) else previous + self.alpha * (unit_ms - previous)
+            self.samples[stage] = self.samples.get(stage, 0) + count
+            self._dirty = True
+
+    def estimate(self, stage: str) -> float:
+        with self._lock:
+            return self.costs_ms.get(stage, 0.0)
+
+    def observe_probes(self, question_class: str, outcomes: Dict[str, List[int]]) -> None:
+        with self._lock:
+            for kind, (issued, hits) in outcomes.items():
+                if not issued:
+                    continue
+                key = f"{question_class}:{kind}"
+                rate, seen = self.hit_rates.get(key, [hits / issued, 0])
+                self.hit_rates[key] = [rate + self.alpha * (hits / issued - rate), seen + issued]
+                self._dirty = True
+
+    def hit_rate(self, question_class: str, kind: str) -> Tuple[float, int]:
+        with self._lock:
+            rate, seen = self.hit_rates.get(f"{question_class}:{kind}", [1.0, 0])
+            return rate, int(seen)
+
+    def save(self) -> None:
+        """Write the model if it changed since the last save"""
+        with self._lock:
+            if not self._dirty:
+                return
+            snapshot = {"costs_ms": dict(self.costs_ms), "samples": dict(self.samples), "hit_rates": dict(self.hit_rates)}
+            self._dirty = False
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(snapshot, f)
+        os.replace(tmp_path, self.path)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "costs_ms": {stage: round(ms, 3) for stage, ms in self.costs_ms.items()},
+                "samples": dict(self.samples),
+                "hit_rates": {key: {"rate": round(rate, 4), "probes": int(seen)} for key, (rate, seen) in self.hit_rates.items()},
+            }
+
+# ============================================================================
+# Planner
+# ============================================================================
+
+class QueryPlan:
+    """Pipeline choices for one question"""
+
+    def __init__(self, question_type: Optional[str], search_k: int, adaptive: bool):
+        self.question_type = question_type  # extractive lookup type, None for open questions
+        self.question_class = "lookup" if question_type else "open"
+        self.search_k = search_k
+        self.adaptive = adaptive
+        self.try_extractive = question_type is not None
+        self.probes: List[Probe] = []
+        self.pruned_probes = 0  # candidates the knowledge graph can't match
+        self.skipped_probe_kinds: List[str] = []
+
+    def describe(self) -> str:
+        kinds = ", ".join(f"{kind}={sum(1 for p in self.probes if p[0] == kind)}" for kind in ("query", "query-inverse"))
+        return (
+            f"{self.question_type or 'open'} question, search k={self.search_k}, probes {kinds} ({self.pruned_probes} pruned)"
+            f"{', extractive first' if self.try_extractive else ''}"
+        )
+
+
+class QueryPlanner:
+    """
+    Plans each Knowledge Agent query from the question and its retrieval scores.
+
+    - Question type comes from the extractive classifier: lookups ("when was
+      X born") vs open questions that need synthesis.
+    - Facts: PLANNER_SEARCH_K candidates are fetched and an adaptive prefix
+      kept: above the score floor, at most MAX_FACTS for the question class,
+      and cut at the first score gap of PLANNER_SCORE_GAP. Hybrid results
+      are cut at a PLANNER_FUSED_GAP drop in relative fused score instead.
+    - Probes: entities the question names exactly (entity linker), then
+      entities and relations from the kept facts' triples, narrowed for
+      lookups to those the question names; inverse probes only for
+      who/which questions. The count is capped by PLANNER_METTA_BUDGET_MS
+      over the learned per-probe cost, and a probe kind whose learned hit
+      rate for this question class is negligible is skipped (except for a
+      small exploration rate, so it can recover).
+    - Synthesis: lookups try the extractive answer before the LLM.
+
+    With the planner disabled it reproduces the original fixed pipeline.
+    """
+
+    def __init__(self, cost_model: Optional[StageCostModel] = None, enabled: bool = QUERY_PLANNER_ENABLED):
+        self.cost_model = cost_model or StageCostModel().load()
+        self.enabled = enabled
+        self.plans = 0
+        self.probes_planned = 0
+        self.probes_baseline = 0
+        self.kinds_skipped = 0
+        self.entities_linked = 0
+        self.probes_pruned = 0
+        self.probe_hits = 0
+        self.entities_linked_beyond_retrieval = 0
+
+    def plan(self, query: str) -> QueryPlan:
+        self.plans += 1
+        if not self.enabled:
+            return QueryPlan(classify_question(query), FIXED_TOP_K, adaptive=False)
+        return QueryPlan(classify_question(query), PLANNER_SEARCH_K, adaptive=True)
+
+    def select_facts(self, plan: QueryPlan, search_results: Dict[str, List]) -> Dict[str, List]:
+        """Adaptive top-k over score-ordered search results"""
+        if not plan.adaptive:
+            return search_results
+
+        fused = search_results.get("fused_scores")
+        if fused is not None:
+            # hybrid_search already held vector candidates to the cosine floor and
+            # let lexical matches in below it on purpose. RRF scores are ordinal, so
+            # gaps are taken relative to the best hit: a step down one ranking
+            # barely moves them, losing the other retriever's vote halves them
+            scores = [score / fused[0] for score in fused] if fused and fused[0] > 0 else []
+            floor, gap = 0.0, PLANNER_FUSED_GAP
+        else:
+            scores = search_results.get("scores", [])
+            floor, gap = PLANNER_SCORE_FLOOR, PLANNER_SCORE_GAP
+
+        keep = 0
+        for i, score in enumerate(scores[:MAX_FACTS[plan.question_class]]):
+            if score < floor:
+                break
+            if i > 0 and scores[i - 1] - score >= gap:
+                break
+            keep = i + 1
+        return {key: values[:keep] for key, values in search_results.items()}
+
+    def _prune(self, plan: QueryPlan, probes: List[Probe], existence: Optional[ExistenceIndex]) -> List[Probe]:
+        """Drop probes whose (entity, relation) pair isn't in the knowledge graph"""
+        if existence is None or not EXISTENCE_PRUNING_ENABLED:
+            return probes
+        kept, pruned = existence.prune(probes)
+        plan.pruned_probes += pruned
+        self.probes_pruned += pruned
+        return kept
+
+    def plan_probes(
+        self,
+        plan: QueryPlan,
+        query: str,
+        triples: List[Dict[str, Any]],
+        linked: Optional[List[LinkedEntity]] = None,
+        existence: Optional[ExistenceIndex] = None
+    ) -> List[Probe]:
+        """
+        Probes for the question from the retrieved triples, plus entities the
+        question names exactly (linked), which go first even when retrieval
+        missed them; their relations come from the entity dictionary. With an
+        existence index, probes that cannot match are pruned before the
+        probe budget is applied.
+        """
+        baseline = fixed_probes(query, triples)
+        self.probes_baseline += len(baseline)
+        if not plan.adaptive:
+            plan.probes = self._prune(plan, baseline, existence)
+            self.probes_planned += len(plan.probes)
+            return plan.probes
+
+        question_words = content_words(query)
+        for word in list(question_words):
+            question_words |= QUESTION_SYNONYMS.get(word, set())
+
+        linked = linked or []
+        retrieved_terms = {t.get(key) for t in triples for key in ('subject', 'object')}
+        self.entities_linked += len(linked)
+        self.entities_linked_beyond_retrieval += sum(1 for e in linked if e.term not in retrieved_terms)
+
+        entities = list(dict.fromkeys(
+            [e.term for e in linked if e.subject_relations] + [t.get('subject', '') for t in triples if t.get('subject')]
+        ))
+        relations = list(dict.fromkeys(
+            [t.get('relation', '') for t in triples if t.get('relation')]
+            + [r for e in linked for r in e.subject_relations + e.object_relations]
+        ))
+
+        if plan.question_class == "lookup":
+            hints = TYPE_HINTS.get(plan.question_type, set())
+            named_entities = [e for e in entities if words_overlap(content_words(e), question_words)]
+            matching_relations = [
+                r for r in relations
+                if words_overlap(content_words(r), question_words) or words_overlap(content_words(r), hints)
+            ]
+            entities = named_entities or entities[:1]
+            relations = matching_relations or relations[:2]
+        else:
+            entities, relations = entities[:3], relations[:3]
+
+        candidates: List[Probe] = [("query", r, e) for e in entities for r in relations]
+        if plan.question_type == "who" or query.lower().lstrip().startswith("which"):
+            # The answer is a subject: look it up from the objects the question names
+            objects = list(dict.fromkeys(
+                [e.term for e in linked if e.object_relations] + [t.get('object', '') for t in triples if t.get('object')]
+            ))
+            named_objects = [o for o in objects if words_overlap(content_words(o), question_words)] or entities[:2]
+            # Relations a linked object is known to take come first
+            inverse_relations = list(dict.fromkeys(
+                [r for e in linked if e.term in named_objects[:2] for r in e.object_relations] + relations
+            ))
+            candidates += [("query-inverse", r, o) for r in inverse_relations[:3] for o in named_objects[:2]]
+
+        candidates = self._prune(plan, list(dict.fromkeys(candidates)), existence)
+
+        # Skip probe kinds that (almost) never hit for this question class
+        kept: List[Probe] = []
+        for kind in ("query", "query-inverse"):
+            kind_probes = [p for p in candidates if p[0] == kind]
+            if not kind_probes:
+                continue
+            rate, seen = self.cost_model.hit_rate(plan.question_class, kind)
+            if seen >= PLANNER_MIN_SAMPLES and rate < PLANNER_MIN_HIT_RATE and random.random() >= PLANNER_EXPLORE_RATE:
+                plan.skipped_probe_kinds.append(kind)
+                self.kinds_skipped += 1
+                continue
+            kept.extend(kind_probes)
+
+        probe_cost = max(self.cost_model.estimate("metta_probe"), 1e-3)
+        budget = max(1, int(PLANNER_METTA_BUDGET_MS / probe_cost))
+        plan.probes = kept[:min(budget, MAX_PROBES[plan.question_class])]
+        self.probes_planned += len(plan.probes)
+        return plan.probes
+
+    def record_stage(self, stage: str, ms: float, count: int = 1) -> None:
+        self.cost_model.observe(stage, ms, count)
+
+    def record_probes(self, plan: QueryPlan, outcomes: Dict[str, List[int]]) -> None:
+        self.probe_hits += sum(hits for _, hits in outcomes.values())
+        self.cost_model.observe_probes(plan.question_class, outcomes)
+
+    def estimated_cost_ms(self, plan: QueryPlan, needs_llm: bool) -> float:
+        """Modelled latency of a plan's stages"""
+        cost = self.cost_model.estimate("encode") + self.cost_model.estimate("search")
+        cost += len(plan.probes) * self.cost_model.estimate("metta_probe")
+        if plan.try_extractive:
+            cost += self.cost_model.estimate("extractive")
+        if needs_llm:
+            cost += self.cost_model.estimate("llm")
+        return cost
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "plans": self.plans,
+            "probes_planned": self.probes_planned,
+            "probes_baseline": self.probes_baseline,
+            "probes_pruned": self.probes_pruned,
+            "probe_hits": self.probe_hits,
+            "probe_hit_rate": round(self.probe_hits / self.probes_planned, 4) if self.probes_planned else 0.0,
+            "probe_kinds_skipped": self.kinds_skipped,
+            "entities_linked": self.entities_linked,
+            "entities_linked_beyond_retrieval": self.entities_linked_beyond_retrieval,
+            "cost_model": self.cost_model.stats(),
+        }
+
+# ============================================================================
+# Replay
+# ============================================================================
+
+def load_replay_queries(path: Path) -> List[Dict[str, str]]:
+    """JSON lines of {"token_id": ..., "query": ...}"""
+    queries = []
+    with open(path, "r") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                item = json.loads(line)
+                queries.append({"token_id": item["token_id"], "query": item["query"]})
+    return queries
+
+
+def replay(queries: List[Dict[str, str]], kb_cache, encoder) -> Dict[str, Dict[str, Any]]:
+    """
+    Run a query set through the fixed and the planned pipelines.
+
+    Search and MeTTa are executed and timed; LLM synthesis is not called but
+    charged at the cost model's LLM estimate whenever the pipeline would
+    have needed it. Coverage is the share of queries that end with an
+    answer (extractive, or evidence for synthesis); MeTTa recall is the
+    share of the fixed pipeline's MeTTa hits the planned one also found.
+    """
+    from bm25_index import search_facts
+    from extractive import ExtractiveAnswerer
+
+    cost_model = StageCostModel(path=Path(os.devnull))
+    planners = {"fixed": QueryPlanner(cost_model, enabled=False), "planned": QueryPlanner(cost_model, enabled=True)}
+    extractive = ExtractiveAnswerer(enabled=True)
+    totals = {mode: {"latency_ms": 0.0, "answered": 0, "llm_calls": 0, "probes": 0, "pruned": 0, "metta_hits": 0} for mode in planners}
+    recall_hits = recall_total = 0
+
+    for item in queries:
+        kb = kb_cache.get_or_load(item["token_id"])
+        if kb.faiss_index is None or kb.metta is None:
+            logger.warning(f"⚠️ Skipping {item['token_id']}: knowledge base incomplete")
+            continue
+
+        start = time.perf_counter()
+        query_vector = encoder.encode([item["query"]]).astype("float32")
+        encode_ms = (time.perf_counter() - start) * 1000
+        cost_model.observe("encode", encode_ms)
+
+        found = {}
+        for mode, planner in planners.items():
+            plan = planner.plan(item["query"])
+
+            start = time.perf_counter()
+            results = planner.select_facts(plan, search_facts(kb, item["query"], query_vector, plan.search_k))
+            search_ms = (time.perf_counter() - start) * 1000
+
+            linked = kb.entity_linker.link(item["query"]) if kb.entity_linker is not None else []
+            # The fixed pipeline stays unpruned so the report shows what pruning saves
+            planner.plan_probes(plan, item["query"], results["triples"], linked, kb.existence if planner.enabled else None)
+            start = time.perf_counter()
+            with kb.metta_lock:
+                metta_results, outcomes = execute_probes(kb.metta, plan.probes)
+            metta_ms = (time.perf_counter() - start) * 1000
+            if mode == "planned":
+                cost_model.observe("search", search_ms)
+                cost_model.observe("metta_probe", metta_ms, len(plan.probes))
+                planner.record_probes(plan, outcomes)
+
+            answer = None
+            if results["facts"] and plan.try_extractive:
+                answer = extractive.answer(item["query"], results["scores"], results["triples"], metta_results)
+            needs_llm = bool(results["facts"]) and answer is None
+
+            t = totals[mode]
+            t["latency_ms"] += encode_ms + search_ms + metta_ms + (cost_model.estimate("llm") if needs_llm else 0.0)
+            t["answered"] += 1 if results["facts"] else 0
+            t["llm_calls"] += 1 if needs_llm else 0
+            t["probes"] += len(plan.probes)
+            t["pruned"] += plan.pruned_probes
+            t["metta_hits"] += len(metta_results)
+            found[mode] = {json.dumps(r, sort_keys=True) for r in metta_results}
+
+        recall_total += len(found["fixed"])
+        recall_hits += len(found["fixed"] & found["planned"])
+
+    count = max(1, len(queries))
+    report = {
+        mode: {
+            "mean_latency_ms": round(t["latency_ms"] / count, 1),
+            "coverage": round(t["answered"] / count, 4),
+            "llm_calls": t["llm_calls"],
+            "mean_probes": round(t["probes"] / count, 2),
+            "mean_pruned": round(t["pruned"] / count, 2),
+            "metta_hits": t["metta_hits"],
+        }
+        for mode, t in totals.items()
+    }
+    report["planned"]["metta_recall"] = round(recall_hits / recall_total, 4) if recall_total else None
+    return report
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Replay a query set through the fixed and planned Knowledge Agent pipelines")
+    parser.add_argument("queries", type=Path, help="JSON lines of {\"token_id\": ..., \"query\": ...}")
+    parser.add_argument("--llm-ms", type=float, default=DEFAULT_STAGE_COSTS_MS["llm"], help="Charged per LLM synthesis the pipeline would make")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+    DEFAULT_STAGE_COSTS_MS["llm"] = args.llm_ms
+
+    from kb_cache import KnowledgeBaseCache
+    from query_encoder import get_local_query_encoder
+
+    queries = load_replay_queries(args.queries)
+    report = replay(queries, KnowledgeBaseCache(), get_local_query_encoder())
+
+    print("=" * 78)
+    print(f"📊 QUERY PLANNER REPLAY ({len(queries)} queries, LLM charged at {args.llm_ms:.0f}ms)")
+    print("=" * 78)
+    print(f"{'pipeline':<10}{'mean ms':>10}{'coverage':>10}{'LLM calls':>11}{'probes/q':>10}{'pruned/q':>10}{'MeTTa hits':>12}")
+    for mode in ("fixed", "planned"):
+        r = report[mode]
+        print(f"{mode:<10}{r['mean_latency_ms']:>10.1f}{r['coverage']:>10.2%}{r['llm_calls']:>11}{r['mean_probes']:>10.2f}{r['mean_pruned']:>10.2f}{r['metta_hits']:>12}")
+    recall = report["planned"]["metta_recall"]
+    print(f"Planned MeTTa recall vs fixed: {'n/a' if recall is None else f'{recall:.2%}'}")
+    print("=" * 78)
+
+
+if __name__ == "__main__":
+    main()
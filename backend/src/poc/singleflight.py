@@ -0,0 +1,126 @@
+"""
+EchoLink Single-Flight
+Coalesces concurrent identical requests onto one in-flight execution
+"""
+
+import asyncio
+import logging
+from functools import partial
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+
+from metrics import Counters
+
+logger = logging.getLogger(__name__)
+
+Publish = Callable[[Any], Awaitable[None]]
+
+
+class _Flight:
+    def __init__(self):
+        self.task: Optional[asyncio.Task] = None
+        self.callers = 0
+        self.listeners: List[Publish] = []
+
+
+class _Publisher:
+    """The publish callback handed to work functions"""
+
+    def __init__(self, flight: _Flight):
+        self._flight = flight
+
+    @property
+    def has_listeners(self) -> bool:
+        """Whether any attached caller currently wants progress (callers may join later)"""
+        return bool(self._flight.listeners)
+
+    async def __call__(self, value: Any) -> None:
+        for listener in list(self._flight.listeners):
+            try:
+                await listener(value)
+            except Exception as e:
+                # One caller's broken listener shouldn't stall the shared work
+                logger.warning(f"⚠️ Single-flight listener failed: {e}")
+
+
+class SingleFlight:
+    """
+    One execution per key at a time; callers that arrive while it runs
+    await the same result (or the same exception).
+
+    The work runs in its own task, so a caller that is cancelled only stops
+    waiting: the others still get the result. When every caller has gone,
+    the work is cancelled. The key is released when the work finishes, so
+    failures are never cached and the next call starts fresh.
+
+    Work functions receive a publish callback that forwards progress (e.g.
+    partial answers) to the listeners of every caller currently attached;
+    its has_listeners property says whether anyone is listening right now.
+    """
+
+    def __init__(self):
+        self._flights: Dict[Hashable, _Flight] = {}
+        self.counters = Counters()
+        self.max_callers = 0
+
+    def _finished(self, key: Hashable, flight: _Flight, task: asyncio.Task) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        if task.cancelled():
+            return
+        if task.exception() is not None:  # also marks the exception retrieved
+            self.counters.inc("errors")
+
+    async def do(self, key: Hashable, fn: Callable[[Publish], Awaitable[Any]], listener: Optional[Publish] = None) -> Any:
+        """
+        Run fn(publish) for key, or join the run already in flight.
+
+        Args:
+            key: Identity of the work; equal keys share one execution
+            fn: Coroutine function doing the work, given a publish callback
+            listener: Optional async callback receiving published progress
+
+        Returns:
+            fn's result, shared by every caller of the same flight
+        """
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight()
+            flight.task = asyncio.get_running_loop().create_task(fn(_Publisher(flight)))
+            flight.task.add_done_callback(partial(self._finished, key, flight))
+            self._flights[key] = flight
+            self.counters.inc("executions")
+        else:
+            self.counters.inc("coalesced")
+
+        flight.callers += 1
+        self.max_callers = max(self.max_callers, flight.callers)
+        if listener is not None:
+            flight.listeners.append(listener)
+        try:
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if not flight.task.done():
+                self.counters.inc("cancelled_callers")
+            raise
+        finally:
+            flight.callers -= 1
+            if listener is not None:
+                flight.listeners.remove(listener)
+            if flight.callers == 0 and not flight.task.done():
+                flight.task.cancel()
+                self.counters.inc("abandoned")
+
+    def stats(self) -> Dict[str, Any]:
+        counts = self.counters.snapshot()
+        executions = counts.get("executions", 0)
+        coalesced = counts.get("coalesced", 0)
+        return {
+            "in_flight": len(self._flights),
+            "executions": executions,
+            "coalesced": coalesced,
+            "coalesced_ratio": round(coalesced / (executions + coalesced), 4) if executions + coalesced else 0.0,
+            "errors": counts.get("errors", 0),
+            "cancelled_callers": counts.get("cancelled_callers", 0),
+            "abandoned": counts.get("abandoned", 0),
+            "max_callers": self.max_callers,
+        }
@@ -32,6 +32,10 @@ start_agent() {
     sleep 2
 }
 
+# Start the shared embedding server first so agents on this node reuse one model copy
+export EMBED_SERVER_SOCKET="${EMBED_SERVER_SOCKET:-/tmp/echolink-embed.sock}"
+start_agent "EmbeddingServer" "embedding_server.py" "unix:$EMBED_SERVER_SOCKET"
+
 # Start Payment Agent (Port 8001)
 start_agent "PaymentAgent" "payment_agent.py" "8005"
 
@@ -47,6 +51,7 @@ echo "========================================"
 echo "📡 Orchestrator Agent: http://localhost:8004"
 echo "💳 Payment Agent: http://localhost:8005"
 echo "🧠 Knowledge Agent: http://localhost:8006"
+echo "🧮 Embedding Server: $EMBED_SERVER_SOCKET"
 echo ""
 echo "🔗 REST API Endpoints:"
 echo "  POST http://localhost:8000/query - Main query endpoint"
@@ -0,0 +1,87 @@
+"""
+Answer cache tests (run with pytest from backend/src/poc)
+"""
+
+import numpy as np
+
+import answer_cache
+from answer_cache import AnswerCache, normalize_question
+
+
+def _vector(*values):
+    return np.array(values, dtype=np.float32)
+
+
+def test_exact_tier_matches_normalized_questions():
+    cache = AnswerCache()
+    cache.put("tok", "v1", "Where was Marie Curie born? [token:42]", "Warsaw")
+    assert normalize_question("Where was Marie Curie born? [token:42]") == "where was marie curie born"
+    assert cache.get_exact("tok", "v1", "where was  MARIE curie born") == "Warsaw"
+    assert cache.get_exact("tok", "v1", "Where did Marie Curie die?") is None
+
+
+def test_semantic_tier_returns_the_best_match_above_the_threshold():
+    cache = AnswerCache(semantic_threshold=0.9)
+    cache.put("tok", "v1", "birthplace of curie", "Warsaw", _vector(1, 0, 0))
+    cache.put("tok", "v1", "curie's spouse", "Pierre Curie", _vector(0, 1, 0))
+    cache.put("tok", "v1", "no embedding", "ignored")
+
+    assert cache.get_semantic("tok", "v1", _vector(0.98, 0.1, 0)) == "Warsaw"
+    assert cache.get_semantic("tok", "v1", _vector(0.1, 3, 0)) == "Pierre Curie"  # unnormalized input
+    assert cache.get_semantic("tok", "v1", _vector(0.7, 0.7, 0)) is None
+    assert cache.stats()["semantic_hits"] == 2 and cache.stats()["misses"] == 1
+
+
+def test_entries_are_scoped_to_token_and_kb_version():
+    cache = AnswerCache(semantic_threshold=0.9)
+    cache.put("tok", "v1", "birthplace of curie", "Warsaw", _vector(1, 0))
+
+    assert cache.get_exact("tok", "v2", "birthplace of curie") is None
+    assert cache.get_exact("other", "v1", "birthplace of curie") is None
+    assert cache.get_semantic("tok", "v2", _vector(1, 0)) is None
+
+    cache.put("tok", "v2", "birthplace of curie", "Warsaw, Poland", _vector(1, 0))
+    assert cache.invalidate_token("tok", version="v2") == 1
+    assert cache.get_exact("tok", "v1", "birthplace of curie") is None
+    assert cache.get_semantic("tok", "v2", _vector(1, 0)) == "Warsaw, Poland"
+
+
+def test_least_recently_used_entries_are_evicted_from_both_tiers():
+    cache = AnswerCache(max_entries=2, semantic_threshold=0.9)
+    cache.put("tok", "v1", "a", "A", _vector(1, 0, 0))
+    cache.put("tok", "v1", "b", "B", _vector(0, 1, 0))
+    assert cache.get_exact("tok", "v1", "a") == "A"  # b is now least recently used
+    cache.put("tok", "v1", "c", "C", _vector(0, 0, 1))
+
+    assert cache.get_exact("tok", "v1", "b") is None
+    assert cache.get_semantic("tok", "v1", _vector(0, 1, 0)) is None
+    assert cache.get_semantic("tok", "v1", _vector(1, 0, 0)) == "A"
+    assert cache.get_semantic("tok", "v1", _vector(0, 0, 1)) == "C"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_expired_entries_are_dropped_from_both_tiers(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(answer_cache.time, "time", lambda: now[0])
+    cache = AnswerCache(ttl_seconds=60, semantic_threshold=0.9)
+    cache.put("tok", "v1", "old", "stale answer", _vector(1, 0))
+    now[0] += 30
+    cache.put("tok", "v1", "newer", "fresh answer", _vector(0.99, 0.14))
+
+    now[0] += 45  # "old" is 75s old, "newer" 45s
+    assert cache.get_semantic("tok", "v1", _vector(1, 0)) == "fresh answer"
+    assert cache.get_exact("tok", "v1", "old") is None
+    assert cache.stats()["expirations"] == 1 and cache.stats()["entries"] == 1
+
+
+def test_semantic_rows_are_reused_after_removal():
+    cache = AnswerCache(max_entries=4, semantic_threshold=0.99)
+    rng = np.random.default_rng(0)
+    questions = {f"q{i}": rng.normal(size=16) for i in range(50)}
+    for question, vector in questions.items():
+        cache.put("tok", "v1", question, question.upper(), vector)
+
+    for question in list(questions)[-4:]:
+        assert cache.get_semantic("tok", "v1", questions[question]) == question.upper()
+    assert cache.get_semantic("tok", "v1", questions["q0"]) is None
+    assert len(cache._semantic[("tok", "v1")].matrix) == 8  # freed rows reused, no growth
@@ -0,0 +1,85 @@
+"""
+BM25 index and hybrid search tests (run with pytest from backend/src/poc)
+"""
+
+import math
+
+import numpy as np
+import pytest
+
+from bm25_index import BM25Index, hybrid_search, reciprocal_rank_fusion, tokenize
+
+FACTS = [
+    "Marie Curie born_in Warsaw",
+    "Marie Curie award Nobel Prize in Physics",
+    "Marie Curie award Nobel Prize in Chemistry",
+    "Pierre Curie spouse Marie Curie",
+    "Warsaw capital_of Poland",
+    "Albert Einstein born_in Ulm on 14 March 1879",
+]
+
+
+def _reference_bm25(texts, query, k1=1.2, b=0.75):
+    docs = [tokenize(text) for text in texts]
+    avg_length = sum(len(d) for d in docs) / len(docs)
+    scores = []
+    for doc in docs:
+        score = 0.0
+        for term in set(tokenize(query)):
+            df = sum(1 for d in docs if term in d)
+            if not df:
+                continue
+            tf = doc.count(term)
+            idf = math.log(1 + (len(docs) - df + 0.5) / (df + 0.5))
+            score += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * len(doc) / avg_length))
+        scores.append(score)
+    return np.array(scores, dtype=np.float32)
+
+
+@pytest.mark.parametrize("query", ["Where was Marie Curie born?", "Nobel Prize physics", "capital of poland", "1879"])
+def test_scores_match_okapi_bm25(query):
+    index = BM25Index.build(FACTS, k1=1.2, b=0.75)
+    np.testing.assert_allclose(index.scores(query), _reference_bm25(FACTS, query), rtol=1e-5, atol=1e-6)
+
+
+def test_search_returns_only_matching_documents_best_first():
+    index = BM25Index.build(FACTS)
+    scores, ids = index.search("Curie Warsaw", top_k=10)
+    assert ids[0] == 0  # the only fact with both terms
+    assert set(ids.tolist()) == {0, 1, 2, 3, 4}
+    assert list(scores) == sorted(scores, reverse=True)
+    assert len(index.search("what is the", top_k=10)[1]) == 0  # stopwords only
+
+
+def test_save_load_round_trip(tmp_path):
+    index = BM25Index.build(FACTS + ["Zürich café naïve"])
+    path = tmp_path / "bm25_tok.npz"
+    index.save(path)
+    loaded = BM25Index.load(path)
+
+    assert loaded.vocab == index.vocab and loaded.num_docs == index.num_docs
+    for query in ["Marie Curie", "zürich café", "1879 Ulm"]:
+        np.testing.assert_array_equal(loaded.scores(query), index.scores(query))
+    assert BM25Index.load(tmp_path / "missing.npz") is None
+
+
+def test_rrf_rewards_agreement_between_rankings():
+    fused = dict(reciprocal_rank_fusion([[1, 2, 3], [3, 1, 4]], k=60))
+    assert fused[1] == pytest.approx(1 / 61 + 1 / 62)
+    assert fused[1] > fused[3] > fused[2] > fused[4]
+
+
+def test_hybrid_search_lets_exact_lexical_matches_in_below_the_cosine_floor():
+    faiss = pytest.importorskip("faiss")
+    vectors = np.eye(len(FACTS), dtype=np.float32)
+    vectors[5] = 0.0  # the Einstein fact is useless to the vector retriever
+    index = faiss.IndexFlatIP(len(FACTS))
+    index.add(vectors)
+    query_vector = np.eye(len(FACTS), dtype=np.float32)[[0]]
+
+    vector_only = hybrid_search(index, None, "born 1879", query_vector, top_k=3)
+    hybrid = hybrid_search(index, BM25Index.build(FACTS), "born 1879", query_vector, top_k=3)
+
+    assert [hit[0] for hit in vector_only] == [0]
+    assert [hit[0] for hit in hybrid][:2] == [0, 5]
+    assert dict((i, cosine) for i, cosine, _ in hybrid)[5] == 0.0
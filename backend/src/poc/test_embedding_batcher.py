@@ -0,0 +1,97 @@
+"""
+Embedding micro-batching tests (run with pytest from backend/src/poc)
+"""
+
+import asyncio
+import threading
+
+import numpy as np
+import pytest
+
+from embedding_batcher import EmbeddingBatcher
+
+
+class RecordingEncoder:
+    """Blocking batch encoder that records each batch it is given"""
+
+    def __init__(self, fail_on=None):
+        self.batches = []
+        self.fail_on = fail_on
+        self._lock = threading.Lock()
+
+    def __call__(self, texts):
+        with self._lock:
+            self.batches.append(list(texts))
+        if self.fail_on is not None and self.fail_on in texts:
+            raise RuntimeError("model crashed")
+        return np.array([[len(text), i] for i, text in enumerate(texts)], dtype=np.float32)
+
+
+def test_concurrent_encodes_share_batches_and_keep_their_rows():
+    encoder = RecordingEncoder()
+    batcher = EmbeddingBatcher(encoder, max_batch_size=8, max_wait_ms=20)
+    texts = [f"question {'x' * i}" for i in range(20)]
+
+    async def scenario():
+        try:
+            return await asyncio.gather(*(batcher.encode(text) for text in texts))
+        finally:
+            batcher.close()
+
+    vectors = asyncio.run(scenario())
+    assert [len(batch) for batch in encoder.batches] == [8, 8, 4]
+    assert [vector[0] for vector in vectors] == [len(text) for text in texts]
+    assert batcher.stats()["batches"] == 3 and batcher.stats()["items"] == 20
+
+
+def test_a_lone_request_is_flushed_after_the_wait():
+    encoder = RecordingEncoder()
+    batcher = EmbeddingBatcher(encoder, max_batch_size=32, max_wait_ms=5)
+
+    async def scenario():
+        try:
+            return await asyncio.wait_for(batcher.encode("only one"), timeout=1)
+        finally:
+            batcher.close()
+
+    assert asyncio.run(scenario())[0] == len("only one")
+    assert encoder.batches == [["only one"]]
+
+
+def test_an_encoder_failure_reaches_every_caller_in_the_batch_only():
+    encoder = RecordingEncoder(fail_on="poison")
+    batcher = EmbeddingBatcher(encoder, max_batch_size=3, max_wait_ms=20)
+
+    async def scenario():
+        try:
+            return await asyncio.gather(
+                *(batcher.encode(text) for text in ["a", "poison", "b", "c", "d"]),
+                return_exceptions=True
+            )
+        finally:
+            batcher.close()
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(r, RuntimeError) for r in results[:3])
+    assert [r[0] for r in results[3:]] == [1, 1]  # the next batch still encodes
+    assert encoder.batches == [["a", "poison", "b"], ["c", "d"]]
+
+
+def test_a_cancelled_caller_is_left_out_of_the_batch():
+    encoder = RecordingEncoder()
+    batcher = EmbeddingBatcher(encoder, max_batch_size=8, max_wait_ms=30)
+
+    async def scenario():
+        try:
+            gone = asyncio.create_task(batcher.encode("gave up"))
+            kept = asyncio.create_task(batcher.encode("still here"))
+            await asyncio.sleep(0.005)
+            gone.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await gone
+            return await kept
+        finally:
+            batcher.close()
+
+    assert asyncio.run(scenario())[0] == len("still here")
+    assert encoder.batches == [["still here"]]
@@ -0,0 +1,63 @@
+"""
+Entity linker tests (run with pytest from backend/src/poc)
+"""
+
+from entity_linker import EntityLinker
+
+TRIPLES = [
+    {"subject": "Marie Curie", "relation": "born_in", "object": "Warsaw"},
+    {"subject": "Marie Curie", "relation": "award", "object": "Nobel Prize in Physics"},
+    {"subject": "Pierre Curie", "relation": "spouse", "object": "Marie Curie"},
+    {"subject": "Albert Einstein", "relation": "born_in", "object": "Ulm"},
+    {"subject": "Art Garfunkel", "relation": "member_of", "object": "Simon & Garfunkel"},
+    {"subject": "Warsaw", "relation": "capital_of", "object": "Poland"},
+    {"subject": "University of Paris", "relation": "located_in", "object": "Paris"},
+    {"subject": "Alphonse Mucha", "relation": "movement", "object": "Art"},
+]
+
+
+def _terms(linker, question):
+    return [entity.term for entity in linker.link(question)]
+
+
+def test_full_names_link_regardless_of_case_and_punctuation():
+    linker = EntityLinker.build(TRIPLES)
+    assert _terms(linker, "Where was MARIE-CURIE born?") == ["Marie Curie"]
+    linked = linker.link("Who did Pierre Curie marry?")[0]
+    assert (linked.term, linked.surface) == ("Pierre Curie", "pierre curie")
+    assert linked.subject_relations == ["spouse"]
+    assert linker.link("Where is Warsaw?")[0].object_relations == ["born_in"]
+
+
+def test_only_whole_words_match():
+    linker = EntityLinker.build(TRIPLES)
+    assert _terms(linker, "When did the war start?") == []  # "art" inside "start"
+    assert _terms(linker, "Warsawians and Ulmer") == []
+    assert _terms(linker, "Tell me about Ulm and art") == ["Ulm", "Art"]
+
+
+def test_unambiguous_last_names_become_aliases():
+    linker = EntityLinker.build(TRIPLES)
+    assert _terms(linker, "When was Einstein born?") == ["Albert Einstein"]
+    # "curie" would be ambiguous between Marie and Pierre, so neither gets it
+    assert _terms(linker, "What did Curie discover?") == []
+    # Only subjects get aliases: "Simon & Garfunkel" is an object
+    assert _terms(linker, "Garfunkel albums") == ["Art Garfunkel"]
+    # A last word that is another entity's full name stays with that entity
+    assert _terms(linker, "Which of these is in Paris?") == ["Paris"]
+
+
+def test_overlapping_matches_resolve_leftmost_longest():
+    linker = EntityLinker.build(TRIPLES)
+    assert _terms(linker, "Marie Curie and Pierre Curie in Warsaw, Poland") == ["Marie Curie", "Pierre Curie", "Warsaw", "Poland"]
+    assert _terms(linker, "Did Marie Curie win the Nobel Prize in Physics?") == ["Marie Curie", "Nobel Prize in Physics"]
+
+
+def test_save_load_round_trip(tmp_path):
+    linker = EntityLinker.build(TRIPLES)
+    path = tmp_path / "entity_dict_tok.json"
+    linker.save(path)
+    loaded = EntityLinker.load(path)
+    question = "Was Einstein born in Ulm like Marie Curie?"
+    assert _terms(loaded, question) == _terms(linker, question) == ["Albert Einstein", "Ulm", "Marie Curie"]
+    assert EntityLinker.load(tmp_path / "missing.json") is None
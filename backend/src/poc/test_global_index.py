@@ -0,0 +1,47 @@
+"""
+Global fact index tests (run with pytest from backend/src/poc)
+"""
+
+import os
+
+import numpy as np
+import pytest
+
+pytest.importorskip("faiss")
+
+import global_index
+from global_index import GlobalFactIndex
+
+
+def _unit_vectors(n: int, dimension: int = 8, seed: int = 0) -> np.ndarray:
+    vectors = np.random.default_rng(seed).normal(size=(n, dimension)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def test_token_filtered_search_stays_within_the_echo(tmp_path):
+    index = GlobalFactIndex(tmp_path, num_shards=2)
+    index.add_echo("a", _unit_vectors(3, seed=1), ["a0", "a1", "a2"])
+    index.add_echo("b", _unit_vectors(3, seed=2), ["b0", "b1", "b2"])
+
+    hits = index.search(_unit_vectors(1, seed=1)[0], top_k=5, token_id="b")
+    assert {hit["token_id"] for hit in hits} == {"b"}
+    assert {hit["fact"] for hit in hits} == {"b0", "b1", "b2"}
+
+
+def test_reader_refreshing_mid_write_never_keeps_stale_facts(tmp_path, monkeypatch):
+    writer = GlobalFactIndex(tmp_path, num_shards=1)
+    writer.add_echo("tok", _unit_vectors(2), ["old fact 0", "old fact 1"])
+    reader = GlobalFactIndex(tmp_path, num_shards=1).load()
+
+    # Another process refreshes after every file the writer swaps in
+    replace = os.replace
+    def replace_then_refresh(src, dst):
+        replace(src, dst)
+        reader.refresh()
+    monkeypatch.setattr(global_index.os, "replace", replace_then_refresh)
+    writer.add_echo("tok", _unit_vectors(2, seed=3), ["new fact 0", "new fact 1"])
+    monkeypatch.undo()
+
+    reader.refresh()
+    hits = reader.search(_unit_vectors(1, seed=3)[0], top_k=2, token_id="tok")
+    assert sorted(hit["fact"] for hit in hits) == ["new fact 0", "new fact 1"]
@@ -0,0 +1,96 @@
+"""
+Knowledge base cache and watcher tests (run with pytest from backend/src/poc)
+"""
+
+import asyncio
+import json
+
+import numpy as np
+import pytest
+
+faiss = pytest.importorskip("faiss")
+
+import kb_cache
+from kb_cache import KnowledgeBaseCache, KnowledgeBaseWatcher, knowledge_base_paths, load_knowledge_base
+
+
+def _write_artifacts(token_id: str, facts, directory=kb_cache.KNOWLEDGE_BASES_DIR):
+    directory.mkdir(parents=True, exist_ok=True)
+    faiss_file = directory / f"fact_index_{token_id}.faiss"
+    mapping_file = directory / f"fact_mapping_{token_id}.json"
+    index = faiss.IndexFlatIP(4)
+    index.add(np.eye(4, dtype=np.float32)[:len(facts)])
+    faiss.write_index(index, str(faiss_file))
+    with open(mapping_file, "w") as f:
+        json.dump({"facts": facts, "triples": [], "count": len(facts)}, f)
+
+
+@pytest.fixture
+def kb_dir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def test_query_before_ingest_is_reloaded_once_artifacts_settle(kb_dir):
+    cache = KnowledgeBaseCache()
+    watcher = KnowledgeBaseWatcher(cache)
+
+    async def scenario():
+        await watcher.poll()  # baseline: nothing ingested yet
+        early = cache.get_or_load("tok")  # a query arrives before ingest finishes
+        assert early.version == "" and early.faiss_index is None
+
+        _write_artifacts("tok", ["Marie Curie born_in Warsaw"])
+        reloaded = []
+        for _ in range(3):
+            reloaded += await watcher.poll()
+        return reloaded
+
+    assert asyncio.run(scenario()) == ["tok"]
+    kb = cache.get("tok")
+    assert kb.faiss_index is not None and kb.faiss_index.ntotal == 1
+    assert kb.version == load_knowledge_base("tok").version != ""
+
+
+def test_partial_kb_cached_at_startup_is_reloaded(kb_dir):
+    _write_artifacts("tok", ["Marie Curie born_in Warsaw"])
+    cache = KnowledgeBaseCache()
+    stale = load_knowledge_base("tok")
+    stale.version = "partial"  # as if loaded while ingest was still writing artifacts
+    cache.put(stale)
+
+    assert asyncio.run(KnowledgeBaseWatcher(cache).poll()) == ["tok"]
+    assert cache.get("tok").version == load_knowledge_base("tok").version
+
+
+def test_root_dir_artifacts_are_watched(kb_dir):
+    cache = KnowledgeBaseCache()
+    watcher = KnowledgeBaseWatcher(cache)
+    _write_artifacts("rooted", ["Marie Curie born_in Warsaw"], directory=kb_dir)
+    assert knowledge_base_paths("rooted")[0].parent == kb_dir.relative_to(kb_dir)  # root fallback
+
+    async def scenario():
+        await watcher.poll()
+        cache.get_or_load("rooted")
+        _write_artifacts("rooted", ["Marie Curie born_in Warsaw", "Pierre Curie spouse Marie Curie"], directory=kb_dir)
+        reloaded = []
+        for _ in range(2):
+            reloaded += await watcher.poll()
+        return reloaded
+
+    assert asyncio.run(scenario()) == ["rooted"]
+    assert cache.get("rooted").faiss_index.ntotal == 2
+
+
+def test_rebuilt_bm25_and_entity_dictionary_change_the_version(kb_dir):
+    from bm25_index import BM25Index, bm25_path
+    from entity_linker import EntityLinker, entity_dict_path
+
+    _write_artifacts("tok", ["Marie Curie born_in Warsaw"])
+    before = load_knowledge_base("tok").version
+    BM25Index.build(["Marie Curie born_in Warsaw"]).save(bm25_path("tok"))
+    with_bm25 = load_knowledge_base("tok")
+    assert with_bm25.bm25 is not None and with_bm25.version != before
+    EntityLinker.build([{"subject": "Marie Curie", "relation": "born_in", "object": "Warsaw"}]).save(entity_dict_path("tok"))
+    assert load_knowledge_base("tok").version not in (before, with_bm25.version)
+    assert kb_cache.scan_manifest()["tok"] == load_knowledge_base("tok").version
@@ -0,0 +1,81 @@
+"""
+Knowledge graph existence index tests (run with pytest from backend/src/poc)
+"""
+
+import random
+
+import pytest
+
+from kg_existence import EXISTENCE_BLOOM_FPR, BloomFilter, ExistenceIndex
+
+
+def _atoms(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    triples = {
+        (f"rel_{rng.randrange(20)}", f"Entity_{rng.randrange(400)}", f"Entity_{rng.randrange(400)}")
+        for _ in range(count)
+    }
+    return [f"(= ({r} {s} {o}))" for r, s, o in sorted(triples)], triples
+
+
+def _all_probes(triples):
+    relations = sorted({r for r, _, _ in triples}) + ["rel_unknown"]
+    entities = sorted({s for _, s, _ in triples} | {o for _, _, o in triples}) + ["Entity_unknown"]
+    return [(kind, r, e) for kind in ("query", "query-inverse") for r in relations for e in entities]
+
+
+def _matchable(triples, probes):
+    subject_pairs = {(r, s) for r, s, _ in triples}
+    object_pairs = {(r, o) for r, _, o in triples}
+    return [
+        p for p in probes
+        if (p[1], p[2]) in (subject_pairs if p[0] == "query" else object_pairs)
+    ]
+
+
+def test_exact_index_admits_exactly_the_probes_that_can_match():
+    atoms, triples = _atoms(300)
+    index = ExistenceIndex.from_atoms(atoms)
+    assert index.exact and index.complete
+
+    probes = _all_probes(triples)
+    kept, pruned = index.prune(probes)
+    assert kept == _matchable(triples, probes)
+    assert pruned == len(probes) - len(kept) > 0
+
+
+def test_bloom_index_has_no_false_negatives():
+    atoms, triples = _atoms(3000)
+    index = ExistenceIndex.from_atoms(atoms, bloom_min_pairs=1)
+    assert not index.exact
+
+    probes = _all_probes(triples)
+    matching = _matchable(triples, probes)
+    doomed = sorted(set(probes) - set(matching))
+    assert all(index.admits(*p) for p in matching)
+    assert sum(index.admits(*p) for p in doomed) / len(doomed) < 2 * EXISTENCE_BLOOM_FPR
+
+
+@pytest.mark.parametrize("fpr", [0.001, 0.01, 0.05])
+def test_bloom_filter_false_positive_rate_is_near_the_target(fpr):
+    bloom = BloomFilter(5000, fpr)
+    bloom.update(f"member:{i}" for i in range(5000))
+    assert all(f"member:{i}" in bloom for i in range(5000))
+    false_positives = sum(f"stranger:{i}" in bloom for i in range(50000))
+    assert false_positives / 50000 < 2 * fpr
+
+
+def test_probe_terms_are_spelled_as_metta_symbols():
+    index = ExistenceIndex.from_atoms(["(= (born_in Marie_Curie Warsaw))"])
+    assert index.admits("query", "born in", "Marie Curie")
+    assert index.admits("query-inverse", "born-in", "Warsaw")
+    assert not index.admits("query", "born_in", "Warsaw")
+
+
+def test_an_unparsable_atom_makes_the_index_admit_everything():
+    atoms, triples = _atoms(50)
+    index = ExistenceIndex.from_atoms(atoms + ["(is-eco-friendly Solar)"])
+    assert not index.complete
+
+    probes = _all_probes(triples)
+    assert index.prune(probes) == (probes, 0)
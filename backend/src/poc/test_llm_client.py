@@ -0,0 +1,143 @@
+"""
+ASI:One client tests against the local stub server (run with pytest from backend/src/poc)
+"""
+
+import asyncio
+import random
+import re
+import time
+
+import pytest
+
+pytest.importorskip("openai")
+pytest.importorskip("httpx")
+
+import utils
+from llm_stub_server import StubBehavior, start_stub_server
+from utils import ASIOneLLM
+
+
+@pytest.fixture(scope="module")
+def server():
+    server = start_stub_server(StubBehavior(latency_ms=10.0, jitter_ms=2.0))
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def stub(server):
+    # Each test starts from a healthy upstream and a fixed random sequence
+    server.behavior.__init__(latency_ms=10.0, jitter_ms=2.0)
+    random.seed(0)
+    return server
+
+
+def test_sequential_calls_reuse_pooled_connections(stub):
+    async def scenario():
+        llm = ASIOneLLM(api_key="stub", base_url=stub.base_url)
+        before = stub.connections
+        for i in range(20):
+            await llm.generate(f"pooling {i}")
+        await llm.aclose()
+        return stub.connections - before
+
+    assert asyncio.run(scenario()) <= 2
+
+
+@pytest.mark.parametrize("status", [503, 429])
+def test_transient_errors_are_retried_with_jittered_backoff(stub, monkeypatch, caplog, status):
+    monkeypatch.setattr(utils, "LLM_RETRY_BASE_MS", 20.0)
+    stub.behavior.error_rate, stub.behavior.error_status = 0.3, status
+
+    async def scenario():
+        llm = ASIOneLLM(api_key="stub", base_url=stub.base_url)
+        failures = 0
+        for i in range(30):
+            try:
+                await llm.generate(f"retry {i}")
+            except Exception:
+                failures += 1
+        await llm.aclose()
+        return llm, failures
+
+    with caplog.at_level("WARNING", logger="utils"):
+        llm, failures = asyncio.run(scenario())
+    backoffs = [float(m) for m in re.findall(r"retry 1/\d+ in (\d+)ms", caplog.text)]
+    assert llm.retries > 0 and failures < 5
+    assert len(set(backoffs)) > 1  # full jitter, not a fixed delay
+
+
+def test_non_transient_errors_are_not_retried(stub):
+    stub.behavior.error_rate, stub.behavior.error_status = 1.0, 400
+
+    async def scenario():
+        llm = ASIOneLLM(api_key="stub", base_url=stub.base_url)
+        with pytest.raises(Exception):
+            await llm.generate("bad request")
+        await llm.aclose()
+        return llm
+
+    llm = asyncio.run(scenario())
+    assert llm.retries == 0 and llm.errors == 1
+
+
+def test_hung_upstream_fails_at_the_applied_deadline(stub):
+    stub.behavior.slow_rate, stub.behavior.slow_ms = 1.0, 3000
+
+    async def scenario():
+        llm = ASIOneLLM(api_key="stub", base_url=stub.base_url, deadline_s=60)
+        start = time.perf_counter()
+        with pytest.raises(asyncio.TimeoutError) as excinfo:
+            await llm.generate("deadline", deadline_s=0.5)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        await llm.aclose()
+        return llm, excinfo.value, elapsed_ms
+
+    llm, error, elapsed_ms = asyncio.run(scenario())
+    assert elapsed_ms < 800
+    assert "0.5s deadline" in str(error)  # the override, not the client default
+    assert llm.timeouts == 1
+
+
+def test_stream_deadline_reports_the_applied_deadline(stub):
+    stub.behavior.slow_rate, stub.behavior.slow_ms = 1.0, 3000
+
+    async def scenario():
+        llm = ASIOneLLM(api_key="stub", base_url=stub.base_url, deadline_s=60)
+        with pytest.raises(asyncio.TimeoutError) as excinfo:
+            async for _ in llm.generate_stream("deadline", deadline_s=0.5):
+                pass
+        await llm.aclose()
+        return excinfo.value
+
+    assert "0.5s deadline" in str(asyncio.run(scenario()))
+
+
+def test_hedging_after_p95_cuts_the_tail(stub):
+    stub.behavior.slow_rate, stub.behavior.slow_ms = 0.03, 500
+
+    async def scenario(hedge):
+        llm = ASIOneLLM(api_key="stub", base_url=stub.base_url, hedge=hedge)
+        for i in range(200):
+            await llm.generate(f"hedge {i}")
+        await llm.aclose()
+        return llm
+
+    plain, hedged = asyncio.run(scenario(False)), asyncio.run(scenario(True))
+    assert plain.hedges == 0
+    assert hedged.hedges > 0 and hedged.hedge_wins > 0
+    assert hedged.call_latency.percentile(99) < plain.call_latency.percentile(99) / 2
+
+
+def test_streamed_deltas_concatenate_to_the_full_answer(stub):
+    async def scenario():
+        llm = ASIOneLLM(api_key="stub", base_url=stub.base_url)
+        deltas = [delta async for delta in llm.generate_stream("stream me")]
+        full = await llm.generate("stream me")
+        await llm.aclose()
+        return deltas, full
+
+    deltas, full = asyncio.run(scenario())
+    assert len(deltas) > 1
+    assert "".join(deltas) == full
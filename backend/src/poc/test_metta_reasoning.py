@@ -0,0 +1,62 @@
+"""
+Relation extraction and MeTTa reasoning tests (run with pytest from backend/src/poc)
+"""
+
+import pytest
+
+from metta_reasoning_module import chunk_text, triples_to_metta_facts
+
+
+TRIPLES = [
+    {"subject": "Bitcoin", "relation": "uses", "object": "Proof of Work"},
+    {"subject": "Bitcoin", "relation": "has", "object": "energy intensive mining"},
+    {"subject": "Solar Power", "relation": "is", "object": "eco-friendly"},
+    {"subject": "Marie Curie", "relation": "born in", "object": "Warsaw"},
+]
+
+
+@pytest.fixture
+def metta_kb():
+    pytest.importorskip("hyperon")
+    from metta_reasoning_module import MeTTaKnowledgeBase
+
+    kb = MeTTaKnowledgeBase()
+    kb.add_facts(triples_to_metta_facts(TRIPLES))
+    return kb
+
+
+def test_reason_batch_answers_every_subject_in_one_evaluation(metta_kb):
+    calls = []
+    run = metta_kb.metta.run
+    metta_kb.metta.run = lambda program: calls.append(program) or run(program)
+
+    deductions = metta_kb.reason_batch(["Bitcoin", "Solar Power", "Marie Curie", "Nobody"])
+
+    assert deductions == {
+        "Bitcoin": ["uses Proof-of-Work", "is-energy-intensive"],
+        "Solar Power": ["is-eco-friendly"],
+        "Marie Curie": ["born-in Warsaw"],
+        "Nobody": [],
+    }
+    assert sum("match" in program for program in calls) == 1
+
+
+def test_reason_batch_leaves_no_markers_behind(metta_kb):
+    metta_kb.reason_batch(["Bitcoin", "Marie Curie"])
+    assert metta_kb.metta.run("!(match &self (reason-subject $s) $s)") == [[]]
+    assert metta_kb.reason("Bitcoin") == ["uses Proof-of-Work", "is-energy-intensive"]
+
+
+def test_chunks_stay_sentence_aligned_with_one_sentence_overlap():
+    sentences = [f"Sentence {i} is about topic {i}." for i in range(12)]
+    chunks = chunk_text(" ".join(sentences), chunk_size=100)
+
+    assert chunks[0].startswith(sentences[0]) and chunks[-1].endswith(sentences[-1])
+    assert all(len(chunk) <= 100 for chunk in chunks)
+    for previous, chunk in zip(chunks, chunks[1:]):
+        assert chunk.startswith(previous.rsplit(". ", 1)[-1])  # last sentence carried over
+
+
+def test_overlap_is_dropped_when_it_would_overflow_the_chunk():
+    a, b, c = ("A" * 449 + ".", "B" * 449 + ".", "C" * 449 + ".")
+    assert chunk_text(f"{a} {b} {c}", chunk_size=400) == [a, b, c]
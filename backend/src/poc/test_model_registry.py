@@ -0,0 +1,73 @@
+"""
+Model registry tests (run with pytest from backend/src/poc)
+"""
+
+import sys
+import types
+
+import model_registry
+from model_registry import ModelRegistry
+
+
+class FakeParameter:
+    def __init__(self, count):
+        self.count = count
+
+    def numel(self):
+        return self.count
+
+    def element_size(self):
+        return 4
+
+
+class FakeModel:
+    def __init__(self, name):
+        self.name = name
+
+    def parameters(self):
+        return [FakeParameter(1024 * 1024)]  # 4 MB
+
+    def buffers(self):
+        return []
+
+    def eval(self):
+        return self
+
+
+def _fake_transformers(loads):
+    def from_pretrained(name):
+        loads.append(name)
+        return FakeModel(name)
+
+    return types.SimpleNamespace(
+        AutoTokenizer=types.SimpleNamespace(from_pretrained=lambda name: f"tokenizer:{name}"),
+        AutoModelForSeq2SeqLM=types.SimpleNamespace(from_pretrained=from_pretrained),
+        pipeline=lambda task, model, tokenizer, device: types.SimpleNamespace(model=model, tokenizer=tokenizer),
+    )
+
+
+def test_rebel_pipeline_and_pair_share_one_sized_entry(monkeypatch):
+    loads = []
+    monkeypatch.setitem(sys.modules, "transformers", _fake_transformers(loads))
+    monkeypatch.setattr(model_registry, "registry", ModelRegistry(memory_budget_mb=6))
+
+    extractor = model_registry.get_rebel_pipeline("rebel")
+    tokenizer, model = model_registry.get_rebel("rebel")
+    assert (tokenizer, model) == (extractor.tokenizer, extractor.model)
+    assert loads == ["rebel"]
+    assert model_registry.registry.stats()["total_mb"] == 4.0
+
+
+def test_evicting_rebel_releases_the_pipeline_too(monkeypatch):
+    loads = []
+    monkeypatch.setitem(sys.modules, "transformers", _fake_transformers(loads))
+    registry = ModelRegistry(memory_budget_mb=6)
+    monkeypatch.setattr(model_registry, "registry", registry)
+
+    model_registry.get_rebel_pipeline("rebel")
+    model_registry.get_rebel("other-rebel")  # 8 MB total, over the budget
+    assert not registry.is_loaded(("rebel", "rebel"))
+    assert list(registry.stats()["loaded"]) == [str(("rebel", "other-rebel"))]
+
+    model_registry.get_rebel("rebel")
+    assert loads == ["rebel", "other-rebel", "rebel"]
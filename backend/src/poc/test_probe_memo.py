@@ -0,0 +1,64 @@
+"""
+Probe memo tests (run with pytest from backend/src/poc)
+"""
+
+from probe_memo import MISSING, ProbeMemo
+
+PROBE = "!(query born_in Marie_Curie)"
+
+
+def test_memoized_empty_results_are_distinct_from_misses():
+    memo = ProbeMemo()
+    assert memo.get("tok", "v1", PROBE) is MISSING
+    memo.put("tok", "v1", PROBE, None)
+    memo.put("tok", "v1", "!(query award Marie_Curie)", "[[Nobel_Prize]]")
+
+    assert memo.get("tok", "v1", PROBE) is None
+    assert memo.get("tok", "v1", "!(query award Marie_Curie)") == "[[Nobel_Prize]]"
+    assert memo.stats()["hits"] == 2 and memo.stats()["misses"] == 1
+
+
+def test_a_new_kb_version_never_reads_old_results():
+    memo = ProbeMemo()
+    memo.put("tok", "v1", PROBE, "[[Warsaw]]")
+    memo.put("other", "v1", PROBE, "[[Ulm]]")
+
+    assert memo.get("tok", "v2", PROBE) is MISSING
+    memo.put("tok", "v2", PROBE, "[[Warsaw_Poland]]")
+    assert memo.get("tok", "v2", PROBE) == "[[Warsaw_Poland]]"
+    assert memo.get("other", "v1", PROBE) == "[[Ulm]]"
+
+
+def test_invalidation_keeps_only_the_current_version():
+    memo = ProbeMemo()
+    memo.put("tok", "v1", PROBE, "[[Warsaw]]")
+    memo.put("tok", "v1", "!(query award Marie_Curie)", None)
+    memo.put("tok", "v2", PROBE, "[[Warsaw_Poland]]")
+    memo.put("other", "v1", PROBE, "[[Ulm]]")
+
+    assert memo.invalidate_token("tok", version="v2") == 2
+    assert memo.get("tok", "v1", PROBE) is MISSING
+    assert memo.get("tok", "v2", PROBE) == "[[Warsaw_Poland]]"
+    assert memo.get("other", "v1", PROBE) == "[[Ulm]]"
+
+    assert memo.invalidate_token("tok") == 1  # no version drops them all
+    assert memo.get("tok", "v2", PROBE) is MISSING
+    assert memo.stats()["invalidations"] == 3
+
+
+def test_least_recently_used_probes_are_evicted():
+    memo = ProbeMemo(max_entries=2)
+    memo.put("tok", "v1", "a", "A")
+    memo.put("tok", "v1", "b", "B")
+    assert memo.get("tok", "v1", "a") == "A"  # b is now least recently used
+    memo.put("tok", "v1", "c", "C")
+
+    assert memo.get("tok", "v1", "b") is MISSING
+    assert memo.get("tok", "v1", "a") == "A" and memo.get("tok", "v1", "c") == "C"
+    assert memo.stats()["evictions"] == 1
+
+
+def test_a_disabled_memo_stores_nothing():
+    memo = ProbeMemo(enabled=False)
+    memo.put("tok", "v1", PROBE, "[[Warsaw]]")
+    assert memo.get("tok", "v1", PROBE) is MISSING
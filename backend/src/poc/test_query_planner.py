@@ -0,0 +1,49 @@
+"""
+Query planner fact selection tests (run with pytest from backend/src/poc)
+"""
+
+from bm25_index import reciprocal_rank_fusion
+from query_planner import QueryPlanner, StageCostModel
+
+
+def _planner():
+    return QueryPlanner(StageCostModel(path="/nonexistent/planner_stats.json"), enabled=True)
+
+
+def _results(scores, fused=None):
+    results = {
+        "facts": [f"fact {i}" for i in range(len(scores))],
+        "triples": [{} for _ in scores],
+        "scores": scores,
+    }
+    if fused is not None:
+        results["fused_scores"] = fused
+    return results
+
+
+def test_vector_results_stop_at_the_floor_and_the_first_gap():
+    planner = _planner()
+    plan = planner.plan("Tell me about Marie Curie")
+    assert plan.question_class == "open"
+    assert planner.select_facts(plan, _results([0.8, 0.75, 0.5, 0.45]))["facts"] == ["fact 0", "fact 1"]
+    assert planner.select_facts(plan, _results([0.3, 0.25, 0.15]))["facts"] == ["fact 0", "fact 1"]
+
+
+def test_hybrid_results_cut_where_the_retrievers_stop_agreeing():
+    # Facts 0-2 ranked by both retrievers, 3-5 by only one of them
+    fused = reciprocal_rank_fusion([[0, 1, 2, 3, 4], [1, 0, 2, 5]])
+    ids = [doc_id for doc_id, _ in fused]
+    planner = _planner()
+    plan = planner.plan("Tell me about Marie Curie")
+    selected = planner.select_facts(plan, _results([0.5] * len(fused), [score for _, score in fused]))
+    assert set(ids[:3]) == {0, 1, 2}
+    assert selected["facts"] == ["fact 0", "fact 1", "fact 2"]
+
+
+def test_hybrid_lexical_hits_below_the_cosine_floor_are_kept():
+    # Nothing agreed on: a lexical-only exact match ranks alongside vector-only hits
+    fused = reciprocal_rank_fusion([[0, 1], [2]])
+    planner = _planner()
+    plan = planner.plan("Tell me about Marie Curie")
+    selected = planner.select_facts(plan, _results([0.6, 0.55, 0.05], [score for _, score in fused]))
+    assert len(selected["facts"]) == 3
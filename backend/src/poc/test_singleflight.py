@@ -0,0 +1,116 @@
+"""
+Single-flight coalescing tests (run with pytest from backend/src/poc)
+"""
+
+import asyncio
+
+import pytest
+
+from singleflight import SingleFlight
+
+
+def test_concurrent_callers_share_one_execution():
+    flight = SingleFlight()
+    runs = []
+
+    async def work(publish):
+        runs.append(1)
+        await asyncio.sleep(0.01)
+        return "answer"
+
+    async def scenario():
+        return await asyncio.gather(*(flight.do("key", work) for _ in range(10)))
+
+    assert asyncio.run(scenario()) == ["answer"] * 10
+    assert len(runs) == 1
+    assert flight.stats()["executions"] == 1 and flight.stats()["coalesced"] == 9
+    assert flight.stats()["max_callers"] == 10 and flight.stats()["in_flight"] == 0
+
+
+def test_an_exception_reaches_every_waiter_and_is_not_cached():
+    flight = SingleFlight()
+    runs = []
+
+    async def failing(publish):
+        runs.append(1)
+        await asyncio.sleep(0.01)
+        raise ValueError("upstream down")
+
+    async def scenario():
+        results = await asyncio.gather(*(flight.do("key", failing) for _ in range(3)), return_exceptions=True)
+        retry = await flight.do("key", lambda publish: asyncio.sleep(0, result="recovered"))
+        return results, retry
+
+    results, retry = asyncio.run(scenario())
+    assert all(isinstance(r, ValueError) and str(r) == "upstream down" for r in results)
+    assert len(runs) == 1 and flight.stats()["errors"] == 1
+    assert retry == "recovered"
+
+
+def test_cancelling_one_waiter_leaves_the_shared_work_running():
+    flight = SingleFlight()
+
+    async def work(publish):
+        await asyncio.sleep(0.05)
+        return "answer"
+
+    async def scenario():
+        leaving = asyncio.create_task(flight.do("key", work))
+        staying = asyncio.create_task(flight.do("key", work))
+        await asyncio.sleep(0.01)
+        leaving.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leaving
+        return await staying
+
+    assert asyncio.run(scenario()) == "answer"
+    assert flight.stats()["cancelled_callers"] == 1 and flight.stats()["abandoned"] == 0
+
+
+def test_cancelling_the_last_waiter_abandons_the_flight():
+    flight = SingleFlight()
+    cancelled = []
+
+    async def work(publish):
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            cancelled.append(1)
+            raise
+
+    async def scenario():
+        callers = [asyncio.create_task(flight.do("key", work)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        for caller in callers:
+            caller.cancel()
+        await asyncio.gather(*callers, return_exceptions=True)
+        await asyncio.sleep(0)  # let the abandoned work observe its cancellation
+
+    asyncio.run(scenario())
+    assert cancelled == [1]
+    assert flight.stats()["abandoned"] == 1 and flight.stats()["in_flight"] == 0
+
+
+def test_progress_reaches_callers_that_join_after_the_work_started():
+    flight = SingleFlight()
+    received = []
+
+    async def work(publish):
+        listening = [publish.has_listeners]
+        await asyncio.sleep(0.02)
+        listening.append(publish.has_listeners)
+        await publish("partial")
+        return listening
+
+    async def listener(value):
+        received.append(value)
+
+    async def scenario():
+        first = asyncio.create_task(flight.do("key", work))  # no listener, like a chat message
+        await asyncio.sleep(0.01)
+        second = asyncio.create_task(flight.do("key", work, listener=listener))
+        return await first, await second
+
+    first, second = asyncio.run(scenario())
+    assert first == second == [False, True]
+    assert received == ["partial"]
@@ -0,0 +1,89 @@
+"""
+Whisper long-audio windowing tests (run with pytest from backend/src/poc)
+"""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+torch = pytest.importorskip("torch")
+transformers = pytest.importorskip("transformers")
+pytest.importorskip("librosa")
+
+import transcribe_audio
+from transcribe_audio import SAMPLE_RATE, LocalWhisperTranscriber, audio_windows
+
+WINDOW = 30 * SAMPLE_RATE
+
+
+class WindowProcessor:
+    """Whisper's real feature extractor; decoding reports which window each row was"""
+
+    def __init__(self, silent_windows=()):
+        self.feature_extractor = transformers.WhisperFeatureExtractor()
+        self.silent_windows = set(silent_windows)
+        self.batch_lengths = []
+        self.window_samples = []
+
+    def __call__(self, audio, sampling_rate, return_tensors):
+        self.batch_lengths.append(len(audio))
+        self.window_samples.extend(len(a) for a in audio)
+        return self.feature_extractor(audio, sampling_rate=sampling_rate, return_tensors=return_tensors)
+
+    def batch_decode(self, predicted_ids, skip_special_tokens):
+        texts = []
+        for row in predicted_ids.tolist():
+            window = row[0]
+            texts.append("" if window in self.silent_windows else f" window {window} ")
+        return texts
+
+
+class RecordingModel:
+    """Returns the running window number per input row, checking Whisper's input shape"""
+
+    def __init__(self):
+        self.windows_seen = 0
+
+    def generate(self, input_features):
+        assert tuple(input_features.shape[1:]) == (80, 3000)  # one padded 30s window per row
+        rows = input_features.shape[0]
+        ids = torch.arange(self.windows_seen, self.windows_seen + rows).unsqueeze(1)
+        self.windows_seen += rows
+        return ids
+
+
+def _transcriber(processor):
+    transcriber = LocalWhisperTranscriber("openai/whisper-tiny", backend="torch", device="cpu", num_threads=1)
+    transcriber.processor, transcriber.model = processor, RecordingModel()
+    return transcriber
+
+
+def test_audio_windows_cover_the_waveform_in_30s_steps():
+    assert audio_windows(75 * SAMPLE_RATE) == [(0, WINDOW), (WINDOW, 2 * WINDOW), (2 * WINDOW, 75 * SAMPLE_RATE)]
+    assert audio_windows(WINDOW) == [(0, WINDOW)]
+    assert audio_windows(10) == [(0, 10)]
+    assert audio_windows(0) == [(0, 0)]
+
+
+def test_long_audio_is_transcribed_window_by_window_in_batches(monkeypatch):
+    monkeypatch.setattr(transcribe_audio, "WHISPER_CHUNK_BATCH", 2)
+    processor = WindowProcessor()
+    audio = np.zeros(75 * SAMPLE_RATE, dtype=np.float32)
+
+    segments = _transcriber(processor).transcribe_segments(audio)
+
+    assert processor.batch_lengths == [2, 1]
+    assert processor.window_samples == [WINDOW, WINDOW, 15 * SAMPLE_RATE]
+    assert segments == [
+        {"start": 0.0, "end": 30.0, "text": "window 0"},
+        {"start": 30.0, "end": 60.0, "text": "window 1"},
+        {"start": 60.0, "end": 75.0, "text": "window 2"},
+    ]
+
+
+def test_silent_windows_produce_no_segment():
+    processor = WindowProcessor(silent_windows={1})
+    audio = np.zeros(70 * SAMPLE_RATE, dtype=np.float32)
+
+    segments = _transcriber(processor).transcribe_segments(audio)
+
+    assert [(s["start"], s["end"], s["text"]) for s in segments] == [(0.0, 30.0, "window 0"), (60.0, 70.0, "window 2")]
@@ -0,0 +1,43 @@
+"""
+Transcript cache tests (run with pytest from backend/src/poc)
+"""
+
+import json
+import threading
+
+from transcript_cache import TranscriptCache
+
+
+def test_concurrent_writers_of_one_entry_never_collide(tmp_path):
+    cache = TranscriptCache(cache_dir=str(tmp_path), max_mb=64)
+    settings = {"model": "base", "language": "en"}
+    errors = []
+
+    def write(worker):
+        try:
+            for i in range(50):
+                cache.put("same-media", f"worker {worker} take {i} " * 200, [], settings)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=write, args=(w,)) for w in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    assert cache.get("same-media")["text"].startswith("worker ")
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["same-media.json", "stats.json"]
+
+
+def test_get_hits_misses_and_lru_eviction(tmp_path):
+    cache = TranscriptCache(cache_dir=str(tmp_path), max_mb=0.01)
+    assert cache.get("a") is None
+    cache.put("a", "x" * 6000, [], {})
+    assert cache.get("a")["text"] == "x" * 6000
+    cache.put("b", "y" * 6000, [], {})
+
+    assert cache.get("a") is None and cache.get("b") is not None
+    assert cache.stats() == {"hits": 2, "misses": 2, "evictions": 1}
+    assert json.loads((tmp_path / "b.json").read_text())["settings"] == {}
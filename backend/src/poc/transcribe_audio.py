@@ -6,9 +6,12 @@ Uses local Whisper model for transcription without requiring API keys
 
 import sys
 import os
+import re
+import time
 import argparse
 import logging
 from pathlib import Path
+from typing import Optional, List, Dict, Any, Tuple
 
 # Add the current directory to Python path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
@@ -24,83 +27,394 @@ except ImportError as e:
     print("pip install torch transformers librosa")
     sys.exit(1)
 
+from transcript_cache import TranscriptCache
+from model_registry import ONNX_CACHE_DIR, registry
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# ============================================================================
+# Backend Configuration
+# ============================================================================
+
+# Short model sizes accepted by --model-size, mapped to HuggingFace checkpoints
+WHISPER_MODEL_SIZES = {
+    "tiny": "openai/whisper-tiny",
+    "base": "openai/whisper-base",
+    "small": "openai/whisper-small",
+    "medium": "openai/whisper-medium",
+    "large-v2": "openai/whisper-large-v2",
+}
+
+# torch:        fp32 transformers model (CUDA if available)
+# int8:         transformers model with dynamic int8 quantization of Linear layers (CPU)
+# ctranslate2:  faster-whisper / CTranslate2 runtime with int8 weights (CPU)
+# onnx:         ONNX Runtime export via optimum (CPU)
+WHISPER_BACKENDS = ("torch", "int8", "ctranslate2", "onnx")
+
+SAMPLE_RATE = 16000  # Whisper expects 16kHz
+# Whisper's input window; the transformers backends transcribe longer audio window by window
+CHUNK_SECONDS = 30
+# Windows decoded together in one generate() call
+WHISPER_CHUNK_BATCH = int(os.getenv("WHISPER_CHUNK_BATCH", "4"))
+
+
+def configure_cpu_threads(num_threads: Optional[int] = None) -> int:
+    """Pin torch intra/inter-op thread pools for CPU inference"""
+    if not num_threads:
+        num_threads = int(os.getenv("WHISPER_NUM_THREADS", "0")) or os.cpu_count() or 1
+    
+    torch.set_num_threads(num_threads)
+    try:
+        # Can only be set once, before any inter-op parallel work has started
+        torch.set_num_interop_threads(max(1, num_threads // 2))
+    except RuntimeError:
+        pass
+    
+    return num_threads
+
+
+def audio_windows(num_samples: int, window: int = CHUNK_SECONDS * SAMPLE_RATE) -> List[Tuple[int, int]]:
+    """(start, end) sample ranges of the consecutive Whisper windows covering a waveform"""
+    return [(start, min(start + window, num_samples)) for start in range(0, max(num_samples, 1), window)]
+
+
+def load_audio(audio_path: str) -> np.ndarray:
+    """Load and resample an audio/video file to 16kHz mono"""
+    audio, _ = librosa.load(audio_path, sr=SAMPLE_RATE)
+    return audio
+
+
 class LocalWhisperTranscriber:
-    """Local Whisper transcription using transformers library"""
+    """Local Whisper transcription with selectable inference backend"""
     
-    def __init__(self, model_name="openai/whisper-base"):
-        """Initialize the transcriber with a Whisper model"""
+    def __init__(
+        self,
+        model_name: str = "openai/whisper-base",
+        backend: str = "torch",
+        device: Optional[str] = None,
+        num_threads: Optional[int] = None,
+        cache: Optional[TranscriptCache] = None
+    ):
+        """
+        Initialize the transcriber with a Whisper model.
+        
+        Args:
+            model_name: HuggingFace Whisper checkpoint (e.g. "openai/whisper-base")
+            backend: One of WHISPER_BACKENDS
+            device: Force "cpu" or "cuda" (torch backend only, default auto)
+            num_threads: CPU threads for inference (default WHISPER_NUM_THREADS or all cores)
+            cache: Optional TranscriptCache consulted before running inference
+        """
+        if backend not in WHISPER_BACKENDS:
+            raise ValueError(f"Unknown Whisper backend '{backend}', expected one of {WHISPER_BACKENDS}")
+        
         self.model_name = model_name
+        self.backend = backend
+        self.cache = cache
         self.processor = None
         self.model = None
-        self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        
+        # Only the fp32 torch backend can run on GPU; the optimized backends are CPU runtimes
+        if backend == "torch":
+            self.device = device or ("cuda" if torch.cuda.is_available() else "cpu")
+        else:
+            self.device = "cpu"
+        
+        self.num_threads = configure_cpu_threads(num_threads) if self.device == "cpu" else None
         
         logger.info(f"🚀 Initializing Whisper transcriber with model: {model_name}")
-        logger.info(f"🖥️ Using device: {self.device}")
+        logger.info(f"⚙️ Backend: {backend}")
+        logger.info(f"🖥️ Using device: {self.device}" + (f" ({self.num_threads} threads)" if self.num_threads else ""))
         
     def load_model(self):
-        """Load the Whisper model and processor"""
+        """Load (or reuse) the Whisper model and processor for the selected backend"""
         try:
-            logger.info("📥 Loading Whisper model...")
-            self.processor = WhisperProcessor.from_pretrained(self.model_name)
-            self.model = WhisperForConditionalGeneration.from_pretrained(self.model_name)
-            self.model.to(self.device)
+            loaders = {
+                "ctranslate2": self._load_ctranslate2,
+                "onnx": self._load_onnx,
+            }
+            loader = loaders.get(self.backend, self._load_transformers)
+            self.processor, self.model = registry.get(
+                ("whisper", self.model_name, self.backend, self.device), loader
+            )
             logger.info("✅ Whisper model loaded successfully")
         except Exception as e:
             logger.error(f"❌ Failed to load Whisper model: {e}")
             raise
     
+    def _load_transformers(self):
+        """Load the transformers model, optionally with dynamic int8 quantization"""
+        processor = WhisperProcessor.from_pretrained(self.model_name)
+        model = WhisperForConditionalGeneration.from_pretrained(self.model_name)
+        
+        if self.backend == "int8":
+            model = torch.quantization.quantize_dynamic(
+                model, {torch.nn.Linear}, dtype=torch.qint8
+            )
+        
+        model.to(self.device)
+        model.eval()
+        return processor, model
+    
+    def _load_ctranslate2(self):
+        """Load the CTranslate2 (faster-whisper) runtime with int8 weights"""
+        try:
+            from faster_whisper import WhisperModel
+        except ImportError:
+            raise ImportError("ctranslate2 backend requires: pip install faster-whisper")
+        
+        # faster-whisper takes the short size name ("base") rather than the HF repo id
+        size = self.model_name.split("/")[-1].replace("whisper-", "")
+        model = WhisperModel(
+            size,
+            device="cpu",
+            compute_type="int8",
+            cpu_threads=self.num_threads or 0
+        )
+        return None, model
+    
+    def _load_onnx(self):
+        """Load the ONNX Runtime model via optimum, exporting it on first use only"""
+        try:
+            from optimum.onnxruntime import ORTModelForSpeechSeq2Seq
+        except ImportError:
+            raise ImportError("onnx backend requires: pip install optimum[onnxruntime]")
+        
+        processor = WhisperProcessor.from_pretrained(self.model_name)
+        export_dir = ONNX_CACHE_DIR / self.model_name.replace("/", "__")
+        if (export_dir / "encoder_model.onnx").exists():
+            model = ORTModelForSpeechSeq2Seq.from_pretrained(export_dir)
+        else:
+            logger.info(f"📦 Exporting {self.model_name} to ONNX in {export_dir}")
+            model = ORTModelForSpeechSeq2Seq.from_pretrained(self.model_name, export=True)
+            model.save_pretrained(export_dir)
+        return processor, model
+    
+    def settings(self) -> Dict[str, Any]:
+        """Settings that change transcription output (part of the transcript cache key)"""
+        # chunk_seconds: transcripts cached before chunking covered only the first window
+        return {"model": self.model_name, "backend": self.backend, "chunk_seconds": CHUNK_SECONDS}
+    
+    def transcribe_segments(self, audio: np.ndarray) -> List[Dict[str, Any]]:
+        """Transcribe a 16kHz mono waveform into timed segments"""
+        if self.backend == "ctranslate2":
+            segments, _ = self.model.transcribe(audio, beam_size=1)
+            return [
+                {"start": segment.start, "end": segment.end, "text": segment.text.strip()}
+                for segment in segments
+            ]
+        
+        # The processor pads or truncates to one 30s window, so split long audio
+        # into consecutive windows (one segment each) and decode them in batches
+        windows = audio_windows(len(audio))
+        segments = []
+        for batch_start in range(0, len(windows), WHISPER_CHUNK_BATCH):
+            batch = windows[batch_start:batch_start + WHISPER_CHUNK_BATCH]
+            input_features = self.processor(
+                [audio[start:end] for start, end in batch],
+                sampling_rate=SAMPLE_RATE,
+                return_tensors="pt"
+            ).input_features
+            if self.backend != "onnx":
+                input_features = input_features.to(self.device)
+            
+            # Generate transcription
+            with torch.no_grad():
+                predicted_ids = self.model.generate(input_features)
+            
+            texts = self.processor.batch_decode(predicted_ids, skip_special_tokens=True)
+            for (start, end), text in zip(batch, texts):
+                if text.strip():
+                    segments.append({
+                        "start": start / SAMPLE_RATE,
+                        "end": end / SAMPLE_RATE,
+                        "text": text.strip()
+                    })
+        return segments
+    
+    def transcribe_audio(self, audio: np.ndarray) -> str:
+        """Transcribe a 16kHz mono waveform"""
+        return " ".join(segment["text"] for segment in self.transcribe_segments(audio))
+    
     def transcribe_file(self, audio_path: str) -> str:
         """Transcribe an audio file using local Whisper model"""
+        return self.transcribe_file_with_segments(audio_path)["text"]
+    
+    def transcribe_file_with_segments(self, audio_path: str) -> Dict[str, Any]:
+        """Transcribe an audio file, returning {"text", "segments"}; served from the cache when possible"""
         try:
             logger.info(f"🎵 Transcribing audio file: {audio_path}")
             
-            # Load and preprocess audio
-            audio, sr = librosa.load(audio_path, sr=16000)  # Whisper expects 16kHz
+            cache_key = None
+            if self.cache:
+                cache_key = self.cache.make_key(audio_path, self.settings())
+                cached = self.cache.get(cache_key)
+                stats = self.cache.stats()
+                if cached:
+                    logger.info(f"💾 Transcript cache hit (hits={stats['hits']}, misses={stats['misses']})")
+                    return {"text": cached["text"], "segments": cached["segments"]}
+                logger.info(f"💾 Transcript cache miss (hits={stats['hits']}, misses={stats['misses']})")
             
-            # Process audio
-            input_features = self.processor(
-                audio, 
-                sampling_rate=16000, 
-                return_tensors="pt"
-            ).input_features.to(self.device)
+            # Model loading is deferred until we know inference is actually needed
+            if self.model is None:
+                self.load_model()
+            
+            # Load and preprocess audio
+            audio = load_audio(audio_path)
             
-            # Generate transcription
             logger.info("🎤 Generating transcription...")
-            with torch.no_grad():
-                predicted_ids = self.model.generate(input_features)
+            segments = self.transcribe_segments(audio)
+            transcription = " ".join(segment["text"] for segment in segments)
             
-            # Decode transcription
-            transcription = self.processor.batch_decode(predicted_ids, skip_special_tokens=True)[0]
+            if self.cache:
+                self.cache.put(cache_key, transcription, segments, self.settings())
             
             logger.info("✅ Transcription completed successfully")
-            return transcription
+            return {"text": transcription, "segments": segments}
             
         except Exception as e:
             logger.error(f"❌ Transcription failed: {e}")
             raise
 
+# ============================================================================
+# Backend Benchmark
+# ============================================================================
+
+def word_error_rate(reference: str, hypothesis: str) -> float:
+    """Word-level Levenshtein distance normalized by reference length"""
+    ref = re.sub(r"[^\w\s']", " ", reference.lower()).split()
+    hyp = re.sub(r"[^\w\s']", " ", hypothesis.lower()).split()
+    if not ref:
+        return 0.0 if not hyp else 1.0
+    
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        current = [i] + [0] * len(hyp)
+        for j, hyp_word in enumerate(hyp, 1):
+            current[j] = min(
+                previous[j] + 1,                              # deletion
+                current[j - 1] + 1,                           # insertion
+                previous[j - 1] + (ref_word != hyp_word)      # substitution
+            )
+        previous = current
+    
+    return previous[-1] / len(ref)
+
+
+def benchmark_backends(
+    audio_files: List[str],
+    model_name: str,
+    backends: List[str],
+    num_threads: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """
+    Benchmark CPU backends against the fp32 torch reference.
+    
+    Real-time factor (RTF) is inference seconds per second of audio; WER is
+    measured against the fp32 CPU transcript of the same file. Every backend
+    transcribes the whole file (the transformers ones in 30s windows), so
+    RTF and WER cover the same audio.
+    
+    Returns:
+        One result dict per backend with load time, RTF and mean WER
+    """
+    audio = {path: load_audio(path) for path in audio_files}
+    audio_seconds = sum(len(samples) for samples in audio.values()) / SAMPLE_RATE
+    
+    references = {}
+    results = []
+    
+    # fp32 runs first so every other backend has a reference transcript
+    ordered = ["torch"] + [b for b in backends if b != "torch"]
+    for backend in ordered:
+        transcriber = LocalWhisperTranscriber(model_name, backend=backend, device="cpu", num_threads=num_threads)
+        
+        load_start = time.perf_counter()
+        transcriber.load_model()
+        load_seconds = time.perf_counter() - load_start
+        
+        # Warm up once so one-time graph/kernel setup isn't billed to the first file
+        first = next(iter(audio.values()))
+        transcriber.transcribe_audio(first[:SAMPLE_RATE])
+        
+        inference_seconds = 0.0
+        wers = []
+        for path, samples in audio.items():
+            start = time.perf_counter()
+            text = transcriber.transcribe_audio(samples)
+            inference_seconds += time.perf_counter() - start
+            
+            if backend == "torch":
+                references[path] = text
+            wers.append(word_error_rate(references[path], text))
+        
+        results.append({
+            "backend": backend,
+            "load_seconds": load_seconds,
+            "inference_seconds": inference_seconds,
+            "rtf": inference_seconds / audio_seconds if audio_seconds else 0.0,
+            "wer_vs_fp32": sum(wers) / len(wers) if wers else 0.0,
+        })
+        
+        # Free each backend before loading the next so they don't compete for RAM
+        registry.unload(("whisper", model_name, backend, "cpu"))
+    
+    return results
+
+
+def print_benchmark(results: List[Dict[str, Any]]) -> None:
+    """Print benchmark results as a table"""
+    print("=" * 80)
+    print("📊 WHISPER BACKEND BENCHMARK")
+    print("=" * 80)
+    print(f"{'backend':<14}{'load (s)':>12}{'infer (s)':>12}{'RTF':>10}{'WER vs fp32':>14}")
+    for r in results:
+        print(f"{r['backend']:<14}{r['load_seconds']:>12.2f}{r['inference_seconds']:>12.2f}"
+              f"{r['rtf']:>10.3f}{r['wer_vs_fp32']:>13.1%}")
+    print("=" * 80)
+
 def main():
     """Main function for command-line usage"""
     parser = argparse.ArgumentParser(description="Transcribe audio/video files using local Whisper")
     parser.add_argument("input_file", help="Path to the audio/video file to transcribe")
     parser.add_argument("--model", default="openai/whisper-base", help="Whisper model to use")
+    parser.add_argument("--model-size", choices=sorted(WHISPER_MODEL_SIZES), help="Shorthand for --model (e.g. tiny, base, small)")
+    parser.add_argument("--backend", default=os.getenv("WHISPER_BACKEND", "torch"), choices=WHISPER_BACKENDS, help="Inference backend")
+    parser.add_argument("--device", choices=["cpu", "cuda"], help="Force device for the torch backend")
+    parser.add_argument("--threads", type=int, help="CPU threads for inference")
+    parser.add_argument("--benchmark", nargs="*", metavar="BACKEND", help="Benchmark backends (default: all) on the input file instead of transcribing")
+    parser.add_argument("--no-cache", action="store_true", help="Skip the transcript cache")
     parser.add_argument("--output", help="Output file path (optional)")
     
     args = parser.parse_args()
+    model_name = WHISPER_MODEL_SIZES[args.model_size] if args.model_size else args.model
     
     # Check if input file exists
     if not os.path.exists(args.input_file):
         print(f"❌ Input file not found: {args.input_file}")
         sys.exit(1)
     
+    if args.benchmark is not None:
+        results = benchmark_backends(
+            [args.input_file],
+            model_name,
+            args.benchmark or list(WHISPER_BACKENDS),
+            num_threads=args.threads
+        )
+        print_benchmark(results)
+        return
+    
     try:
         # Initialize transcriber
-        transcriber = LocalWhisperTranscriber(args.model)
-        transcriber.load_model()
+        transcriber = LocalWhisperTranscriber(
+            model_name,
+            backend=args.backend,
+            device=args.device,
+            num_threads=args.threads,
+            cache=None if args.no_cache else TranscriptCache()
+        )
         
         # Transcribe file
         transcription = transcriber.transcribe_file(args.input_file)
@@ -0,0 +1,131 @@
+"""
+EchoLink Transcript Cache
+Content-addressed on-disk cache of Whisper transcripts with size-capped LRU eviction
+"""
+
+import os
+import json
+import hashlib
+import logging
+import tempfile
+from pathlib import Path
+from typing import Optional, Dict, Any
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.getenv("TRANSCRIPT_CACHE_DIR", "transcript_cache")
+DEFAULT_MAX_MB = float(os.getenv("TRANSCRIPT_CACHE_MAX_MB", "512"))
+
+STATS_FILE = "stats.json"
+
+
+def hash_file(path: str, chunk_size: int = 1 << 20) -> str:
+    """SHA-256 of the raw media bytes, streamed so large videos aren't held in memory"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _write_json(path: Path, data: Any) -> None:
+    """
+    Atomically replace path with data. The temp file gets a unique name so
+    processes transcribing the same media don't write into each other's file.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f"{path.stem}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+class TranscriptCache:
+    """
+    Transcript cache keyed by media content hash plus transcription settings.
+
+    Each entry is one JSON file holding the transcript and its segments. Entry
+    mtime doubles as the LRU clock: hits touch the file, and writes evict the
+    least recently used entries until the directory fits in max_bytes. Hit and
+    miss counters are persisted next to the entries so they accumulate across
+    the short-lived transcription processes.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_mb: float = DEFAULT_MAX_MB):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def make_key(self, media_path: str, settings: Dict[str, Any]) -> str:
+        """Build the cache key from the media hash and the settings that affect output"""
+        settings_blob = json.dumps(settings, sort_keys=True)
+        return hashlib.sha256(f"{hash_file(media_path)}:{settings_blob}".encode()).hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached {"text", "segments"} entry, or None on a miss"""
+        path = self._entry_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            os.utime(path)  # bump LRU position
+        except (OSError, ValueError):
+            self._record("misses")
+            return None
+
+        self._record("hits")
+        return entry
+
+    def put(self, key: str, text: str, segments: list, settings: Dict[str, Any]) -> None:
+        """Store a transcript and evict LRU entries beyond the size cap"""
+        entry = {"text": text, "segments": segments, "settings": settings}
+        _write_json(self._entry_path(key), entry)
+        self._evict()
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until the cache fits in max_bytes"""
+        entries = []
+        total = 0
+        for path in self.cache_dir.glob("*.json"):
+            if path.name == STATS_FILE:
+                continue
+            stat = path.stat()
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        entries.sort()
+        evicted = 0
+        while total > self.max_bytes and len(entries) > 1:
+            _, size, path = entries.pop(0)
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+            evicted += 1
+
+        if evicted:
+            self._record("evictions", evicted)
+            logger.info(f"🧹 Evicted {evicted} transcript cache entries ({total / 1024 / 1024:.1f} MB kept)")
+
+    def _record(self, counter: str, amount: int = 1) -> None:
+        """Increment a persisted counter"""
+        stats = self.stats()
+        stats[counter] = stats.get(counter, 0) + amount
+        try:
+            _write_json(self.cache_dir / STATS_FILE, stats)
+        except OSError as e:
+            logger.warning(f"Failed to update transcript cache stats: {e}")
+
+    def stats(self) -> Dict[str, int]:
+        """Cumulative hit/miss/eviction counts"""
+        try:
+            with open(self.cache_dir / STATS_FILE, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"hits": 0, "misses": 0, "evictions": 0}
@@ -4,63 +4,275 @@ ASI:One LLM integration and query processing pipeline
 """
 
 import os
-from openai import OpenAI
-from typing import Optional
+import time
+import random
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Optional, AsyncIterator
 import logging
+from lazy_imports import lazy_import
+from metrics import LatencyHistogram
 from metta_reasoning_module import extract_relations_and_reason
 
+# openai (and httpx/pydantic under it) is imported when the first client is built
+openai = lazy_import("openai")
+httpx = lazy_import("httpx")
+
 logger = logging.getLogger(__name__)
 
+ASI_ONE_BASE_URL = os.getenv("ASI_ONE_BASE_URL", "https://api.asi1.ai/v1")
+# Whole-call budget: retries, backoff and hedges all have to fit inside it
+LLM_DEADLINE_SECONDS = float(os.getenv("LLM_DEADLINE_SECONDS", "60"))
+LLM_CONNECT_TIMEOUT_SECONDS = float(os.getenv("LLM_CONNECT_TIMEOUT_SECONDS", "5"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_RETRY_BASE_MS = float(os.getenv("LLM_RETRY_BASE_MS", "250"))
+LLM_RETRY_MAX_MS = float(os.getenv("LLM_RETRY_MAX_MS", "4000"))
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+LLM_KEEPALIVE_SECONDS = float(os.getenv("LLM_KEEPALIVE_SECONDS", "60"))
+# Send a duplicate request when the first is slower than the recent p95
+LLM_HEDGE = os.getenv("LLM_HEDGE", "0") == "1"
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+
+SYSTEM_PROMPT = "You are an advanced AI assistant for the EchoLink Protocol, powered by hybrid neural and symbolic AI."
+
+
+def _is_transient(error: Exception) -> bool:
+    """Connection failures, timeouts, 408/409/429 and 5xx are worth retrying"""
+    if isinstance(error, (openai.APIConnectionError, openai.RateLimitError, openai.InternalServerError)):
+        return True
+    return isinstance(error, openai.APIStatusError) and error.status_code in (408, 409)
+
 
 class ASIOneLLM:
     """
     ASI:One LLM client (replaces OpenRouter).
-    Uses OpenAI client with ASI:One base URL.
+
+    Uses the async OpenAI client with ASI:One base URL over one pooled
+    keep-alive httpx transport, so generation never blocks the event loop
+    and repeated calls reuse warm TLS connections. Every call has a
+    deadline; transient failures are retried with full-jitter exponential
+    backoff inside it, and with hedging enabled a duplicate request is sent
+    once the first has run longer than the recent p95.
     """
     
-    def __init__(self, api_key: str, model: str = "asi1-mini"):
+    def __init__(
+        self,
+        api_key: str,
+        model: str = "asi1-mini",
+        base_url: str = ASI_ONE_BASE_URL,
+        deadline_s: float = LLM_DEADLINE_SECONDS,
+        max_retries: int = LLM_MAX_RETRIES,
+        hedge: bool = LLM_HEDGE
+    ):
         """
         Initialize ASI:One LLM client.
         
         Args:
             api_key: ASI:One API key
             model: Model name ("asi1-mini" or "asi1-large")
+            base_url: OpenAI-compatible endpoint (point at llm_stub_server.py locally)
+            deadline_s: Default per-call deadline in seconds
+            max_retries: Retries on transient errors within the deadline
+            hedge: Send a hedged duplicate after the p95 delay
         """
-        self.client = OpenAI(
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=LLM_MAX_CONNECTIONS,
+                max_keepalive_connections=LLM_MAX_CONNECTIONS,
+                keepalive_expiry=LLM_KEEPALIVE_SECONDS
+            ),
+            timeout=httpx.Timeout(deadline_s, connect=LLM_CONNECT_TIMEOUT_SECONDS)
+        )
+        # Retries are ours (deadline-aware, jittered); the SDK's own are disabled
+        self.client = openai.AsyncOpenAI(
             api_key=api_key,
-            base_url="https://api.asi1.ai/v1"
+            base_url=base_url,
+            http_client=http_client,
+            max_retries=0
         )
         self.model = model
+        self.deadline_s = deadline_s
+        self.max_retries = max_retries
+        self.hedge = hedge
+
+        # Single-attempt latency drives the hedge delay; call latency includes retries
+        self.attempt_latency = LatencyHistogram()
+        self.call_latency = LatencyHistogram()
+        self.calls = 0
+        self.retries = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.hedges = 0
+        self.hedge_wins = 0
         logger.info(f"ASI:One LLM initialized with model: {model}")
+
+    def _request(self, prompt: str, max_tokens: int, stream: bool = False) -> Callable[[], Awaitable[Any]]:
+        def call():
+            return self.client.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": SYSTEM_PROMPT},
+                    {"role": "user", "content": prompt}
+                ],
+                max_tokens=max_tokens,
+                temperature=0.7,
+                stream=stream
+            )
+        return call
+
+    async def _attempt(self, call: Callable[[], Awaitable[Any]]) -> Any:
+        start = time.perf_counter()
+        result = await call()
+        self.attempt_latency.observe((time.perf_counter() - start) * 1000)
+        return result
+
+    def hedge_delay_ms(self) -> Optional[float]:
+        """Delay before a hedged duplicate, None until enough latency samples exist"""
+        if not self.hedge or self.attempt_latency.count < LLM_HEDGE_MIN_SAMPLES:
+            return None
+        return self.attempt_latency.percentile(LLM_HEDGE_PERCENTILE)
+
+    async def _hedged(self, call: Callable[[], Awaitable[Any]]) -> Any:
+        """First successful result of the request and (if it is slow) one duplicate"""
+        delay_ms = self.hedge_delay_ms()
+        if delay_ms is None:
+            return await self._attempt(call)
+
+        primary = asyncio.ensure_future(self._attempt(call))
+        tasks = [primary]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay_ms / 1000)
+            if not done:
+                self.hedges += 1
+                tasks.append(asyncio.ensure_future(self._attempt(call)))
+
+            pending = set(tasks)
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            self.hedge_wins += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def _call_with_retries(self, call: Callable[[], Awaitable[Any]], deadline: float, deadline_s: float, hedge: bool) -> Any:
+        loop = asyncio.get_running_loop()
+        attempt = 0
+        while True:
+            remaining = deadline - loop.time()
+            try:
+                if remaining <= 0:
+                    raise asyncio.TimeoutError()
+                return await asyncio.wait_for(self._hedged(call) if hedge else call(), remaining)
+            except asyncio.TimeoutError:
+                self.timeouts += 1
+                raise asyncio.TimeoutError(f"ASI:One call exceeded its {deadline_s:g}s deadline") from None
+            except Exception as e:
+                if attempt >= self.max_retries or not _is_transient(e):
+                    self.errors += 1
+                    raise
+                # Full jitter keeps agents that failed together from retrying together
+                backoff_ms = random.uniform(0, min(LLM_RETRY_MAX_MS, LLM_RETRY_BASE_MS * 2 ** attempt))
+                attempt += 1
+                self.retries += 1
+                logger.warning(f"⚠️ ASI:One transient error ({type(e).__name__}), retry {attempt}/{self.max_retries} in {backoff_ms:.0f}ms")
+                await asyncio.sleep(min(backoff_ms / 1000, max(0.0, deadline - loop.time())))
     
-    async def generate(self, prompt: str, max_tokens: int = 2000) -> str:
+    async def generate(self, prompt: str, max_tokens: int = 2000, deadline_s: Optional[float] = None) -> str:
         """
         Generate text using ASI:One LLM.
         
         Args:
             prompt: Input prompt
             max_tokens: Maximum tokens to generate
+            deadline_s: Override the client's per-call deadline
             
         Returns:
             Generated text
         """
+        self.calls += 1
+        start = time.perf_counter()
+        deadline_s = deadline_s or self.deadline_s
+        deadline = asyncio.get_running_loop().time() + deadline_s
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are an advanced AI assistant for the EchoLink Protocol, powered by hybrid neural and symbolic AI."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=max_tokens,
-                temperature=0.7
-            )
-            
+            response = await self._call_with_retries(self._request(prompt, max_tokens), deadline, deadline_s, hedge=True)
             answer = response.choices[0].message.content
+            self.call_latency.observe((time.perf_counter() - start) * 1000)
             return answer
             
         except Exception as e:
             logger.error(f"ASI:One LLM error: {e}")
             raise
+    
+    async def generate_stream(self, prompt: str, max_tokens: int = 2000, deadline_s: Optional[float] = None) -> AsyncIterator[str]:
+        """
+        Stream generated text as it is produced.
+        
+        Opening the stream is retried like generate(); once deltas have been
+        yielded a failure is raised rather than retried. Streams are not
+        hedged, and the deadline covers the whole stream.
+        
+        Args:
+            prompt: Input prompt
+            max_tokens: Maximum tokens to generate
+            deadline_s: Override the client's per-call deadline
+            
+        Yields:
+            Text deltas in order; their concatenation equals generate()'s answer
+        """
+        self.calls += 1
+        start = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        deadline_s = deadline_s or self.deadline_s
+        deadline = loop.time() + deadline_s
+        stream = None
+        try:
+            stream = await self._call_with_retries(self._request(prompt, max_tokens, stream=True), deadline, deadline_s, hedge=False)
+            
+            chunks = stream.__aiter__()
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(chunks.__anext__(), max(0.0, deadline - loop.time()))
+                except StopAsyncIteration:
+                    break
+                except asyncio.TimeoutError:
+                    self.timeouts += 1
+                    raise asyncio.TimeoutError(f"ASI:One stream exceeded its {deadline_s:g}s deadline") from None
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+            
+            self.call_latency.observe((time.perf_counter() - start) * 1000)
+            
+        except Exception as e:
+            logger.error(f"ASI:One LLM stream error: {e}")
+            raise
+        finally:
+            if stream is not None:
+                await stream.close()
+
+    async def aclose(self) -> None:
+        """Close pooled connections"""
+        await self.client.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "retries": self.retries,
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "hedge_delay_ms": self.hedge_delay_ms(),
+            "attempt_latency": self.attempt_latency.snapshot(),
+            "call_latency": self.call_latency.snapshot(),
+        }
 
 
 async def process_advanced_query(
@@ -0,0 +1,145 @@
+"""
+EchoLink Knowledge Agent Warmup
+Startup warmup and popular-Echo preloading, with readiness tracking
+"""
+
+import os
+import json
+import time
+import asyncio
+import logging
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Comma-separated tokens always preloaded at startup, ahead of popular ones
+PRELOAD_TOKENS = [t.strip() for t in os.getenv("PRELOAD_TOKENS", "").split(",") if t.strip()]
+# Additional most-queried Echos (from recorded query frequency) to preload
+PRELOAD_TOP_N = int(os.getenv("PRELOAD_TOP_N", "5"))
+QUERY_FREQUENCY_PATH = Path(os.getenv("QUERY_FREQUENCY_PATH", "knowledge_bases/query_frequency.json"))
+
+
+class QueryFrequency:
+    """Per-token query counts, persisted so popularity survives restarts"""
+
+    def __init__(self, path: Path = QUERY_FREQUENCY_PATH):
+        self.path = Path(path)
+        self.counts: Counter = Counter()
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def load(self) -> "QueryFrequency":
+        try:
+            with open(self.path, "r") as f:
+                self.counts = Counter(json.load(f))
+        except (OSError, ValueError):
+            pass
+        return self
+
+    def record(self, token_id: str) -> None:
+        with self._lock:
+            self.counts[token_id] += 1
+            self._dirty = True
+
+    def top(self, n: int) -> List[str]:
+        with self._lock:
+            return [token for token, _ in self.counts.most_common(n)]
+
+    def save(self) -> None:
+        """Write counts if they changed since the last save"""
+        with self._lock:
+            if not self._dirty:
+                return
+            snapshot = dict(self.counts)
+            self._dirty = False
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(snapshot, f)
+        os.replace(tmp_path, self.path)
+
+
+def preload_candidates(frequency: QueryFrequency, top_n: int = PRELOAD_TOP_N) -> List[str]:
+    """Configured tokens first, then the most-queried ones, without duplicates"""
+    popular = [t for t in frequency.top(top_n + len(PRELOAD_TOKENS)) if t not in PRELOAD_TOKENS]
+    return PRELOAD_TOKENS + popular[:top_n]
+
+
+class Warmup:
+    """
+    Runs the Knowledge Agent warmup in the background and tracks readiness.
+
+    States: "cold" -> "warming" -> "ready" (or "failed" if the models could
+    not be loaded). Once the models are up, queries are served while the
+    remaining Echos preload one by one through the executor's "load" stage,
+    so warmup never holds more than one load slot.
+    """
+
+    def __init__(self):
+        self.state = "cold"
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.steps: Dict[str, float] = {}
+        self.preloaded: List[str] = []
+        self.failed: Dict[str, str] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.state == "ready"
+
+    def start(self, engine, tokens: List[str]) -> None:
+        """Schedule warmup on the running loop (idempotent)"""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self.run(engine, tokens))
+
+    async def _step(self, name: str, coro) -> Any:
+        start = time.perf_counter()
+        result = await coro
+        self.steps[name] = round((time.perf_counter() - start) * 1000, 1)
+        return result
+
+    async def run(self, engine, tokens: List[str]) -> None:
+        self.state = "warming"
+        self.started_at = time.time()
+        logger.info(f"🔥 Warmup started (preloading {len(tokens)} Echos)")
+
+        try:
+            await self._step("initialize", engine.initialize())
+
+            # First encode/search pays lazy CUDA/BLAS/tokenizer setup; do it now
+            vector = await self._step("encode", engine.embedder.encode("warmup query"))
+            await self._step("search", engine.executor.run("search", engine.global_index.search, vector, 1))
+        except Exception as e:
+            self.state = "failed"
+            self.failed["models"] = str(e)
+            logger.error(f"❌ Warmup failed: {e}")
+            return
+
+        for token_id in tokens:
+            try:
+                await self._step(f"load:{token_id}", engine.preload_knowledge_base(token_id))
+                self.preloaded.append(token_id)
+            except Exception as e:
+                self.failed[token_id] = str(e)
+                logger.warning(f"⚠️ Could not preload Echo {token_id}: {e}")
+
+        self.state = "ready"
+        self.finished_at = time.time()
+        logger.info(
+            f"✅ Warm in {self.finished_at - self.started_at:.1f}s "
+            f"({len(self.preloaded)} Echos preloaded, {len(self.failed)} failed)"
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "duration_s": round((self.finished_at or time.time()) - self.started_at, 2) if self.started_at else None,
+            "steps_ms": dict(self.steps),
+            "preloaded": list(self.preloaded),
+            "failed": dict(self.failed),
+        }